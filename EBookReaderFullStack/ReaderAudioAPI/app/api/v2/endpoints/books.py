@@ -1,23 +1,51 @@
 import os
 import re
+import glob
+import time
 import uuid
+import logging
 import shutil
-from typing import List
-from app.core.constants import resolve_ffmpeg_path
+import hashlib
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional
+from app.core.constants import (
+    resolve_ffmpeg_path, MAX_UPLOAD_BYTES, PARSE_STALE_SECONDS, UPLOAD_CHUNK_SIZE, UPLOAD_DIR, WORKER_MODE,
+)
 import subprocess
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form, BackgroundTasks
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from sqlalchemy import insert, literal, or_, select
 from sqlalchemy.orm import Session
 
 import ebooklib
 from ebooklib import epub
 from bs4 import BeautifulSoup
 
+from app.core.admission import admission, client_key
 from app.core.database import get_db, SessionLocal
+from app.core.profiling import profile_stage
+from app.core.metrics import CHUNKS_INSERTED, EPUB_PARSE_SECONDS, FFMPEG_RENDER_SECONDS
 from app.models.book import Book, Chunk
-from app.schemas.book import BookSchema, BookSummary, ChunkSchema
+from app.models.cast import CastEntry
+from app.models.lexicon import LexiconEntry
+from app.schemas.book import BookSchema, BookSummary, CastUpdate, ChunkSchema, ChunkUpdate
+from app.schemas.lexicon import LexiconUpdate
+from app.services.audio_index import audio_index, parse_timestamp
+from app.services.audio_store import audio_store
+from app.services.book_stats import book_stats, progress
+from app.services.chunk_edits import edit_chunk, update_cast, update_lexicon
+from app.services.dialogue import dialogue_service
+from app.services.emotion_profiles import emotion_profiles
+from app.services.exports import MEDIA_TYPES, exporter
+from app.services.job_queue import job_queue
+from app.services.lexicon import chunk_terms, lexicon
+from app.services.search import chunk_search
+from app.services.settings_store import settings_store
+from app.services.storage_gc import storage_gc
 from app.services.tts import tts_service
+from app.services.voice_registry import voice_registry
 
 import os
 import subprocess
@@ -29,11 +57,15 @@ from sqlalchemy.orm import Session
 
 from app.core.database import SessionLocal
 from app.models.book import Chunk
-from app.utils.srt import generate_sentence_srt
+from app.services.subtitles import FORMATS, MODES, subtitle_engine
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-UPLOAD_DIR = "oas_assets/uploads"
+# Arama sonuç sayfası üst sınırı
+SEARCH_MAX_LIMIT = 100
+
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # ============================
@@ -75,7 +107,7 @@ def clean_text(text: str) -> str:
     text = re.sub(r"<[^>]+>", "", text)
 
     text = re.sub(
-        r"[^a-zA-Z0-9çğıöşüÇĞİÖŞÜ.,!?;:\s\-\(\)'\"\u2018\u2019\u201c\u201d]",
+        r"[^a-zA-Z0-9çğıöşüÇĞİÖŞÜ.,!?;:\s\-\(\)'\"\u2018\u2019\u201c\u201d\u00ab\u00bb\u2013\u2014]",
         " ",
         text,
     )
@@ -94,6 +126,43 @@ def clean_text(text: str) -> str:
 MAX_CHARS = 180
 MIN_CHARS = 30
 
+
+def toc_titles(book) -> dict:
+    """
+    EPUB içindekiler → {doküman yolu: başlık}. Bir dokümana
+    birden fazla giriş düşüyorsa (alt başlık çapaları) ilki.
+    """
+    titles = {}
+
+    def walk(entries):
+        for entry in entries:
+            if isinstance(entry, tuple):
+                section, children = entry
+                walk([section])
+                walk(children)
+                continue
+            href = getattr(entry, "href", None)
+            title = (getattr(entry, "title", None) or "").strip()
+            if href and title:
+                titles.setdefault(href.split("#")[0], title)
+
+    walk(book.toc or [])
+    return titles
+
+
+def chapter_title(item, soup, toc: dict, chapter: int) -> str:
+    """
+    İçindekiler girişi; yoksa dokümanın ilk başlığı;
+    o da yoksa "Bölüm N".
+    """
+    name = item.get_name()
+    title = toc.get(name) or toc.get(os.path.basename(name))
+    if not title:
+        heading = soup.find(["h1", "h2", "h3"])
+        title = heading.get_text(" ", strip=True) if heading else ""
+    return re.sub(r"\s+", " ", title).strip()[:200] or f"Bölüm {chapter + 1}"
+
+
 def extract_chapters_iteratively(epub_path: str):
     book = epub.read_epub(epub_path)
 
@@ -102,14 +171,20 @@ def extract_chapters_iteratively(epub_path: str):
 
     yield {"type": "metadata", "title": title, "author": author}
 
+    toc = toc_titles(book)
     buffer = ""
 
+    # Chunk çıkan her EPUB dokümanı bir bölüm sayılır.
+    # Chunk’lar bölüm sınırını aşmaz (altyazı / export aralıkları için).
+    chapter = -1
+
     for item in book.get_items():
         if item.get_type() != ebooklib.ITEM_DOCUMENT:
             continue
 
         soup = BeautifulSoup(item.get_content(), "html.parser")
         elements = soup.find_all(["p", "h1", "h2", "h3", "h4", "h5"])
+        chunks = []
 
         for el in elements:
             text = clean_text(el.get_text())
@@ -130,7 +205,7 @@ def extract_chapters_iteratively(epub_path: str):
                             temp += " " + w
                         else:
                             if len(temp.strip()) >= MIN_CHARS:
-                                yield {"type": "chunk", "content": temp.strip()}
+                                chunks.append(temp.strip())
                             temp = w
                     buffer = temp
                     continue
@@ -139,11 +214,30 @@ def extract_chapters_iteratively(epub_path: str):
                     buffer += (" " if buffer else "") + s
                 else:
                     if len(buffer.strip()) >= MIN_CHARS:
-                        yield {"type": "chunk", "content": buffer.strip()}
+                        chunks.append(buffer.strip())
                     buffer = s
 
+        # Bölüm sonu: kısa kalan son parça bu bölümün son
+        # chunk’ına eklenir, sonraki bölüme taşınmaz
+        tail = buffer.strip()
+        if len(tail) >= MIN_CHARS:
+            chunks.append(tail)
+        elif tail and chunks:
+            chunks[-1] = f"{chunks[-1]} {tail}"
+
+        # Chunk çıkmayan kısa doküman (başlık sayfası) bölüm
+        # sayılmaz; metni sonraki dokümanın ilk chunk’ına geçer
+        if not chunks:
+            continue
+        buffer = ""
+
+        chapter += 1
+        yield {"type": "chapter", "chapter": chapter, "title": chapter_title(item, soup, toc, chapter)}
+        for content in chunks:
+            yield {"type": "chunk", "content": content, "chapter": chapter}
+
     if len(buffer.strip()) >= MIN_CHARS:
-        yield {"type": "chunk", "content": buffer.strip()}
+        yield {"type": "chunk", "content": buffer.strip(), "chapter": max(chapter, 0)}
 
 
 # ============================
@@ -151,40 +245,64 @@ def extract_chapters_iteratively(epub_path: str):
 # ============================
 
 async def parse_book_background(book_id: str, file_path: str):
+    parse_start = time.perf_counter()
     try:
-        iterator = extract_chapters_iteratively(file_path)
-        meta = next(iterator)
+        with profile_stage(f"parse-{book_id}"):
+            iterator = extract_chapters_iteratively(file_path)
+            meta = next(iterator)
 
-        with SessionLocal() as db:
-            book = db.query(Book).filter(Book.id == book_id).first()
-            book.title = meta["title"]
-            book.author = meta["author"]
-            book.status = "parsing"
-            db.commit()
+            with SessionLocal() as db:
+                book = db.query(Book).filter(Book.id == book_id).first()
+                book.title = meta["title"]
+                book.author = meta["author"]
+                book.status = "parsing"
+                db.commit()
 
-        idx = 0
-        for item in iterator:
-            if item["type"] != "chunk":
-                continue
+            idx = 0
+            chapter_titles = []
+            for item in iterator:
+                if item["type"] == "chapter":
+                    chapter_titles.append(item["title"])
+                    continue
+                if item["type"] != "chunk":
+                    continue
 
-            with SessionLocal() as db:
-                db.add(
-                    Chunk(
-                        book_id=book_id,
-                        index=idx,
-                        text=item["content"],
-                        status="pending",
-                        emotion="neutral",
+                with SessionLocal() as db:
+                    db.add(
+                        Chunk(
+                            book_id=book_id,
+                            index=idx,
+                            chapter=item.get("chapter"),
+                            text=item["content"],
+                            status="pending",
+                            emotion="neutral",
+                        )
                     )
-                )
+                    db.commit()
+                CHUNKS_INSERTED.inc()
+                idx += 1
+
+            with SessionLocal() as db:
+                # Diyalog chunk’larına konuşan + ses (tek tarama)
+                dialogue_service.attribute_book(db, book_id)
+
+                book = db.query(Book).filter(Book.id == book_id).first()
+                book.chapter_titles = chapter_titles
+                book.status = "analyzing_emotions"
                 db.commit()
-            idx += 1
 
+    except Exception as e:
+        # Bozuk EPUB vb.: kitap "failed" olur, yarım chunk’lar
+        # silinir; aynı dosya tekrar yüklenince yeniden parse edilir
+        logger.error(f"Parse hatası | book={book_id}: {e}", exc_info=True)
         with SessionLocal() as db:
-            book = db.query(Book).filter(Book.id == book_id).first()
-            book.status = "analyzing_emotions"
+            db.query(Chunk).filter(Chunk.book_id == book_id).delete(synchronize_session=False)
+            db.query(Book).filter(Book.id == book_id).update({"status": "failed"}, synchronize_session=False)
             db.commit()
 
+    else:
+        EPUB_PARSE_SECONDS.observe(time.perf_counter() - parse_start)
+
         await tts_service.add_to_queue(book_id)
 
     finally:
@@ -192,49 +310,230 @@ async def parse_book_background(book_id: str, file_path: str):
             os.remove(file_path)
 
 
+# ============================
+# UPLOAD
+# ============================
+
+async def save_upload(file: UploadFile, path: str) -> str:
+    """
+    Upload’u büyük bloklar halinde diske yazar, bu sırada
+    sha256 hesaplar. Limit aşılırsa yarım dosya silinir.
+    """
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(413, "File too large")
+
+    hasher = hashlib.sha256()
+    size = 0
+    tmp_path = path + ".part"
+
+    try:
+        with open(tmp_path, "wb") as f:
+            while True:
+                block = await file.read(UPLOAD_CHUNK_SIZE)
+                if not block:
+                    break
+                size += len(block)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(413, "File too large")
+                hasher.update(block)
+                f.write(block)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return hasher.hexdigest()
+
+
+def clone_parsed_chunks(db: Session, source_id: str, target_id: str) -> int:
+    """
+    Aynı EPUB’un daha önce parse edilmiş chunk’larını
+    (metin + duygu + konuşan) yeni kitaba tek INSERT ...
+    SELECT ile kopyalar. Sadece ses yeniden sentezlenir;
+    yeni kitabın oyuncu listesi boş olduğu için diyaloglar
+    da kitabın sesiyle başlar.
+    """
+    rows = select(
+        literal(target_id),
+        Chunk.index,
+        Chunk.chapter,
+        Chunk.text,
+        Chunk.emotion,
+        Chunk.emotion_analyzed,
+        Chunk.speaker,
+        literal("pending"),
+    ).where(Chunk.book_id == source_id)
+
+    result = db.execute(
+        insert(Chunk).from_select(
+            ["book_id", "index", "chapter", "text", "emotion", "emotion_analyzed", "speaker", "status"], rows
+        )
+    )
+    return result.rowcount
+
+
 # ============================
 # API ENDPOINTS
 # ============================
 
 @router.post("/upload")
 async def upload_book(
+    request: Request,
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    voice_id: str = Form("canan"),
-    speed: float = Form(1.0),
-    steps: int = Form(10),
+    voice_id: Optional[str] = Form(None),
+    speed: Optional[float] = Form(None),
+    steps: Optional[int] = Form(None),
     db: Session = Depends(get_db),
 ):
     if not file.filename.endswith(".epub"):
         raise HTTPException(400, "Only EPUB supported")
 
+    # İstemci kovası + parse sırasında yer; dolu ise 429
+    # (dosya diske yazılmadan önce)
+    admission.upload_buckets.take(client_key(request))
+    ticket = admission.parses.reserve()
+    try:
+        return await _accept_upload(background_tasks, ticket, file, voice_id, speed, steps, db)
+    except BaseException:
+        ticket.cancel()
+        raise
+
+
+async def _accept_upload(background_tasks, ticket, file, voice_id, speed, steps, db):
+
+    # Formda verilmeyen değerler kullanıcı ayarlarından (snapshot)
+    voice_id = voice_id or settings_store.get_str("voiceId", "canan")
+    speed = speed if speed is not None else settings_store.get_float("speed", 1.0)
+    steps = steps if steps is not None else settings_store.get_int("steps", 10)
+
     book_id = str(uuid.uuid4())
     path = os.path.join(UPLOAD_DIR, f"{book_id}.epub")
 
-    with open(path, "wb") as f:
-        shutil.copyfileobj(file.file, f)
-
-    db.add(
-        Book(
-            id=book_id,
-            title="Processing...",
-            author="Processing...",
-            voice_id=voice_id,
-            speed=speed,
-            steps=steps,
-            status="parsing",
+    content_hash = await save_upload(file, path)
+
+    # Aynı dosya + aynı ses daha önce yüklendiyse mevcut kitap döner
+    # (parse’ı yarıda kalmış eski kitap hariç)
+    stale_before = datetime.utcnow() - timedelta(seconds=PARSE_STALE_SECONDS)
+    existing = (
+        db.query(Book)
+        .filter(
+            Book.content_hash == content_hash,
+            Book.voice_id == voice_id,
+            Book.status != "failed",
+            or_(Book.status != "parsing", Book.created_at >= stale_before),
         )
+        .order_by(Book.created_at)
+        .first()
     )
+    if existing:
+        os.remove(path)
+        ticket.cancel()
+        return {"book_id": existing.id, "deduplicated": True}
+
+    # Aynı dosya başka sesle parse edildiyse parse/duygu analizi atlanır
+    source = (
+        db.query(Book)
+        .filter(
+            Book.content_hash == content_hash,
+            Book.status.notin_(["parsing", "failed"]),
+        )
+        .order_by(Book.created_at)
+        .first()
+    )
+
+    book = Book(
+        id=book_id,
+        title=source.title if source else "Processing...",
+        author=source.author if source else "Processing...",
+        chapter_titles=source.chapter_titles if source else None,
+        voice_id=voice_id,
+        speed=speed,
+        steps=steps,
+        content_hash=content_hash,
+        status="analyzing_emotions" if source else "parsing",
+    )
+    db.add(book)
+    db.flush()
+
+    if source:
+        os.remove(path)
+        ticket.cancel()
+        copied = clone_parsed_chunks(db, source.id, book_id)
+        db.commit()
+        CHUNKS_INSERTED.inc(copied)
+        await tts_service.add_to_queue(book_id)
+        return {"book_id": book_id, "reused_chunks_from": source.id}
+
     db.commit()
 
-    background_tasks.add_task(parse_book_background, book_id, path)
+    # Parse, havuzda sırası gelince koşar
+    background_tasks.add_task(ticket.run, parse_book_background, book_id, path)
     return {"book_id": book_id}
 
 
+# -------------------------------------------------
+# Kütüphane: kitaplar + ilerleme (book_stats),
+# kitap sayısından bağımsız tek sorgu
+# -------------------------------------------------
 @router.get("/", response_model=List[BookSummary])
 def list_books(db: Session = Depends(get_db)):
-    return db.query(Book).order_by(Book.created_at.desc()).all()
+    return [
+        BookSummary.model_validate(row.Book).model_copy(update=progress(row._asdict()))
+        for row in book_stats.listing(db)
+    ]
+
+
+# -------------------------------------------------
+# Tam metin arama (kütüphane / kitap)
+#
+# Her sonuç: kitap, chunk index, bölüm, vurgulu kesit ve
+# sesteki başlangıç anı (start, saniye; sentezlenmemiş
+# chunk’ta null). Oynatıcı /audio-range ya da /seek ile
+# doğrudan oraya atlar.
+# -------------------------------------------------
+@router.get("/search")
+def search_library(q: str, limit: int = 20, offset: int = 0, db: Session = Depends(get_db)):
+    limit = min(max(limit, 1), SEARCH_MAX_LIMIT)
+    return chunk_search.search(db, q, limit=limit, offset=max(offset, 0))
+
+
+# -------------------------------------------------
+# Disk kullanımı (kitap bazlı) ve yetim dosya taraması
+# -------------------------------------------------
+@router.get("/storage")
+async def storage_usage():
+    usage = await asyncio.to_thread(storage_gc.usage)
+    with SessionLocal() as db:
+        known = {book_id for (book_id,) in db.query(Book.id)}
+
+    books = {book_id: row for book_id, row in usage.items() if book_id in known}
+    orphans = [row for book_id, row in usage.items() if book_id not in known]
+    return {
+        "total_bytes": sum(row["bytes"] for row in usage.values()),
+        "books": books,
+        "orphan_files": sum(row["files"] for row in orphans),
+        "orphan_bytes": sum(row["bytes"] for row in orphans),
+        "last_sweep": storage_gc.last_sweep,
+    }
 
+@router.post("/storage/sweep")
+async def storage_sweep(grace: Optional[float] = None):
+    if grace is None:
+        return await asyncio.to_thread(storage_gc.sweep)
+    return await asyncio.to_thread(storage_gc.sweep, max(grace, 0.0))
+
+@router.get("/{book_id}/search")
+def search_book(book_id: str, q: str, limit: int = 20, offset: int = 0, db: Session = Depends(get_db)):
+    if db.query(Book.id).filter(Book.id == book_id).first() is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    limit = min(max(limit, 1), SEARCH_MAX_LIMIT)
+    return chunk_search.search(db, q, book_id=book_id, limit=limit, offset=max(offset, 0))
+
+@router.get("/{book_id}/storage")
+async def book_storage(book_id: str):
+    usage = await asyncio.to_thread(storage_gc.usage, book_id)
+    return usage.get(book_id, {"files": 0, "bytes": 0})
 
 @router.get("/{book_id}", response_model=BookSchema)
 def get_book(book_id: str, db: Session = Depends(get_db)):
@@ -242,10 +541,8 @@ def get_book(book_id: str, db: Session = Depends(get_db)):
     if not book:
         raise HTTPException(404)
 
-    total = db.query(Chunk).filter(Chunk.book_id == book_id).count()
     data = BookSchema.from_orm(book)
-    data.total_chunks = total
-    return data
+    return data.model_copy(update=book_stats.get(db, book_id))
 
 
 @router.get("/{book_id}/chunks", response_model=List[ChunkSchema])
@@ -260,13 +557,261 @@ def get_chunks(book_id: str, offset: int = 0, limit: int = 20, db: Session = Dep
     )
 
 
+# -------------------------------------------------
+# Chunk metni / duygusu / konuşanı düzeltme
+#
+# Sadece bu chunk yeniden sentezlenir; altyazı ve ses
+# indeksinin sadece etkilenen kısımları yenilenir.
+# Konuşan değişip ses aynı kalırsa sentez gerekmez.
+# -------------------------------------------------
+@router.patch("/{book_id}/chunks/{index}")
+def patch_chunk(book_id: str, index: int, update: ChunkUpdate, db: Session = Depends(get_db)):
+    emotion = update.emotion.lower() if update.emotion else None
+    if emotion and emotion not in emotion_profiles.emotions():
+        raise HTTPException(status_code=400, detail=f"Bilinmeyen duygu: {emotion}")
+
+    try:
+        changes = edit_chunk(db, book_id, index, text=update.text, emotion=emotion, speaker=update.speaker)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if changes is None:
+        raise HTTPException(status_code=404, detail="Chunk not found")
+
+    status = "pending" if set(changes) - {"speaker"} else "updated" if changes else "unchanged"
+    return {"status": status, "index": index, "changed": sorted(changes)}
+
+
+# -------------------------------------------------
+# Kitabın telaffuz sözlüğü
+#
+# PUT {"entries": {"Peeta": "Pita", "Gale": null}}
+# Sadece değişen terimleri içeren chunk’lar yeniden
+# sentezlenir (ters indeksle bulunur).
+# -------------------------------------------------
+@router.get("/{book_id}/lexicon")
+def get_lexicon(book_id: str, db: Session = Depends(get_db)):
+    return lexicon.entries(db, book_id)
+
+
+@router.put("/{book_id}/lexicon")
+def put_lexicon(book_id: str, update: LexiconUpdate, db: Session = Depends(get_db)):
+    if not db.query(Book.id).filter(Book.id == book_id).first():
+        raise HTTPException(status_code=404, detail="Book not found")
+    return update_lexicon(db, book_id, update.entries)
+
+
+@router.delete("/{book_id}/lexicon/{term}")
+def delete_lexicon_term(book_id: str, term: str, db: Session = Depends(get_db)):
+    if term not in lexicon.entries(db, book_id):
+        raise HTTPException(status_code=404, detail="Terim bulunamadı")
+    return update_lexicon(db, book_id, {term: None})
+
+
+# -------------------------------------------------
+# Kitabın oyuncu listesi (diyalogda konuşan → ses)
+#
+# PUT {"entries": {"Peeta": "damien_black", "*": "canan",
+#                  "Gale": null}}
+# "*" konuşanı listede olmayan diyaloglar içindir.
+# Sadece sesi değişen diyalog chunk’ları yeniden
+# sentezlenir.
+# -------------------------------------------------
+@router.get("/{book_id}/cast")
+def get_cast(book_id: str, db: Session = Depends(get_db)):
+    if not db.query(Book.id).filter(Book.id == book_id).first():
+        raise HTTPException(status_code=404, detail="Book not found")
+    return {
+        "cast": dialogue_service.cast(db, book_id),
+        "speakers": dialogue_service.speakers(db, book_id),
+    }
+
+
+@router.put("/{book_id}/cast")
+def put_cast(book_id: str, update: CastUpdate, db: Session = Depends(get_db)):
+    if not db.query(Book.id).filter(Book.id == book_id).first():
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    entries = {}
+    for speaker, voice_id in update.entries.items():
+        if voice_id is not None:
+            voice_id = voice_id.lower().replace(" ", "_")
+            if voice_registry.resolve(voice_id, "neutral") is None:
+                raise HTTPException(status_code=400, detail=f"Bilinmeyen ses: {voice_id}")
+        entries[speaker] = voice_id
+
+    return update_cast(db, book_id, entries)
+
+
+@router.patch("/{book_id}/progress")
+async def update_progress(book_id: str, last_index: int, db: Session = Depends(get_db)):
+    book = db.query(Book).filter(Book.id == book_id).first()
+    if not book:
+        raise HTTPException(404)
+
+    book.last_chunk_index = max(0, last_index)
+    db.commit()
+
+    # Worker dinleyicinin önündeki pencereyi öne alır.
+    # Parse sürerken kuyruğa parser kendisi ekler.
+    await tts_service.report_position(
+        book_id,
+        book.last_chunk_index,
+        resume=book.status != "parsing",
+    )
+
+    return {"status": "ok", "last_chunk_index": book.last_chunk_index}
+
+
+@router.post("/{book_id}/align")
+async def align_book(book_id: str):
+    scheduled = await tts_service.align_missing(book_id)
+    return {"status": "ok", "scheduled": scheduled}
+
+
+@router.get("/{book_id}/subtitles")
+def get_subtitles(
+    book_id: str,
+    fmt: str = "srt",
+    mode: str = "sentence",
+    chapter: Optional[int] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+):
+    if fmt not in FORMATS or mode not in MODES:
+        raise HTTPException(400, f"fmt: {list(FORMATS)} | mode: {list(MODES)}")
+
+    media_type, _ = FORMATS[fmt]
+    return StreamingResponse(
+        subtitle_engine.stream(book_id, fmt, mode, chapter=chapter, start=start, end=end),
+        media_type=media_type,
+        headers={"Content-Disposition": f'inline; filename="{book_id}.{fmt}"'},
+    )
+
+
+# -------------------------------------------------
+# Chunk WAV’ı: sıcak katmandaysa dosyanın kendisi,
+# pack’teyse offset tablosundan okunan dilim + header
+# -------------------------------------------------
+def chunk_audio_response(book_id: str, index: int, headers: Optional[dict] = None, filename: Optional[str] = None):
+    source = audio_store.locate(book_id, index)
+    if source is not None and not source.packed:
+        return FileResponse(source.path, media_type="audio/wav", headers=headers, filename=filename)
+
+    try:
+        data = audio_store.wav_bytes(book_id, index)
+    except ValueError as e:
+        # Pack yeniden yazılıyor / bozuk kayıt
+        raise HTTPException(409, f"Ses şu an okunamıyor: {e}")
+    if data is None:
+        raise HTTPException(404, "Ses bulunamadı")
+
+    headers = dict(headers or {})
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return Response(content=data, media_type="audio/wav", headers=headers)
+
+
 @router.get("/{book_id}/audio/{index}")
 def get_audio(book_id: str, index: int, db: Session = Depends(get_db)):
     chunk = db.query(Chunk).filter(Chunk.book_id == book_id, Chunk.index == index).first()
     if not chunk or not chunk.audio_path:
         raise HTTPException(404)
 
-    return FileResponse(chunk.audio_path, media_type="audio/wav")
+    return chunk_audio_response(book_id, index)
+
+
+# -------------------------------------------------
+# "Speak now": chunk’ı (verilmezse okuyucunun önündeki
+# ilk pending chunk’ı) streaming sentezler; ses parçaları
+# üretildikçe chunked HTTP ile gönderilir ve sonuç
+# normal chunk WAV’ı olarak kaydedilir.
+# -------------------------------------------------
+@router.get("/{book_id}/speak")
+async def speak_now(book_id: str, index: Optional[int] = None, db: Session = Depends(get_db)):
+    book = db.query(Book).filter(Book.id == book_id).first()
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+
+    chunk = tts_service.pick_speak_chunk(db, book_id, index)
+    if not chunk:
+        raise HTTPException(status_code=404, detail="Sentezlenecek chunk yok")
+
+    headers = {"X-Chunk-Index": str(chunk.index)}
+
+    if chunk.status == "completed" and audio_store.locate(book_id, chunk.index) is not None:
+        return chunk_audio_response(book_id, chunk.index, headers)
+
+    # Model bu process’te değil: chunk’tan başlayan öncelikli
+    # pencere işi açılır, istemci /audio/{index}’i yoklar
+    if WORKER_MODE == "external":
+        job_queue.request_window(book_id, chunk.index, force=True)
+        return JSONResponse(
+            {"status": "queued", "index": chunk.index},
+            status_code=202,
+            headers={**headers, "Retry-After": "2"},
+        )
+
+    if not tts_service.claim_chunk(db, chunk):
+        raise HTTPException(status_code=409, detail="Chunk şu an sentezleniyor")
+
+    return StreamingResponse(
+        tts_service.stream_chunk(book_id, chunk.id, book.voice_id or "canan"),
+        media_type="audio/wav",
+        headers=headers,
+    )
+
+
+# -------------------------------------------------
+# Kitap içi zaman → chunk (ses indeksinde binary search)
+# -------------------------------------------------
+@router.get("/{book_id}/seek")
+async def seek_book(book_id: str, t: str):
+    try:
+        seconds = parse_timestamp(t)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Geçersiz zaman")
+
+    index = await asyncio.to_thread(audio_index.get, book_id)
+    if not len(index.records):
+        raise HTTPException(status_code=404, detail="Tamamlanmış ses yok")
+
+    return {**index.seek(seconds), "duration": round(index.duration, 3)}
+
+
+# -------------------------------------------------
+# Zaman aralığını tek WAV olarak döner
+#
+# ?start=03:12:45&end=03:15:00 (ya da saniye)
+# PCM, chunk WAV’larından mmap ile dilimlenir.
+# -------------------------------------------------
+@router.get("/{book_id}/audio-range")
+async def get_audio_range(book_id: str, start: str, end: str):
+    try:
+        start_s, end_s = parse_timestamp(start), parse_timestamp(end)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Geçersiz zaman")
+    if end_s <= start_s:
+        raise HTTPException(status_code=422, detail="end, start’tan büyük olmalı")
+
+    try:
+        index = await asyncio.to_thread(audio_index.get, book_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if not len(index.records) or start_s >= index.duration:
+        raise HTTPException(status_code=416, detail="Aralık ses dışında")
+
+    nbytes, pcm = index.pcm_range(start_s, end_s)
+
+    def body():
+        yield index.wav_header(nbytes)
+        yield from pcm
+
+    return StreamingResponse(
+        body(),
+        media_type="audio/wav",
+        headers={"Content-Length": str(44 + nbytes)},
+    )
 
 
 
@@ -293,6 +838,8 @@ async def upload_voice(
     with open(target_path, "wb") as f:
         shutil.copyfileobj(file.file, f)
 
+    voice_registry.refresh()
+
     return {
         "status": "ok",
         "voice_id": voice_id,
@@ -300,66 +847,81 @@ async def upload_voice(
         "path": target_path,
     }
 
+# -------------------------------------------------
+# Kitap videosu (siyah arka plan + altyazı), thread içinde.
+# Ara WAV render’a özeldir: aynı kitabın iki modu
+# aynı anda render edilse de birbirini ezmez.
+# -------------------------------------------------
+def render_video(index, srt_path: str, mp4_path: str, book_id: str, mode: str, render_key: str):
+    audio_dir = os.path.dirname(mp4_path)
+    wav_path = f"{audio_dir}/full_{book_id}.{mode}.{render_key}.wav"
+    tmp_path = f"{audio_dir}/{book_id}.{mode}.{render_key}.{os.getpid()}.tmp.mp4"
+
+    try:
+        with FFMPEG_RENDER_SECONDS.time(kind="concat"):
+            index.write_wav(wav_path)
+
+        with FFMPEG_RENDER_SECONDS.time(kind="video"):
+            subprocess.run(
+                [
+                    resolve_ffmpeg_path(),
+                    "-y",
+                    "-f", "lavfi",
+                    "-i", "color=c=black:s=1280x720:r=25",
+                    "-i", wav_path,
+                    "-vf", f"subtitles={srt_path}",
+                    "-c:v", "libx264",
+                    "-pix_fmt", "yuv420p",
+                    "-c:a", "aac",
+                    "-shortest",
+                    tmp_path,
+                ],
+                check=True,
+            )
+
+        os.replace(tmp_path, mp4_path)
+
+        # Eski parmak izli render’lar (replace’ten sonra). Glob
+        # sadece {book_id}.{mode}.{12 hex}.mp4 ile eşleşir;
+        # devam eden render’ların {key}.{pid}.tmp.mp4’üne dokunulmaz
+        rendered = f"{audio_dir}/{glob.escape(book_id)}.{mode}.{'[0-9a-f]' * 12}.mp4"
+        for stale in glob.glob(rendered):
+            if stale != mp4_path and not stale.endswith(".tmp.mp4"):
+                os.remove(stale)
+    finally:
+        for path in (wav_path, tmp_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
 @router.get("/{book_id}/download-video")
-async def download_video(book_id: str):
+async def download_video(request: Request, book_id: str, word_level: bool = False):
     audio_dir = "oas_assets/audio"
     os.makedirs(audio_dir, exist_ok=True)
 
-    wav_path = f"{audio_dir}/full_{book_id}.wav"
-    srt_path = f"{audio_dir}/{book_id}.srt"
-    mp4_path = f"{audio_dir}/{book_id}.mp4"
-    list_path = f"{audio_dir}/{book_id}_list.txt"
+    mode = "word" if word_level else "sentence"
 
-    ffmpeg_path = resolve_ffmpeg_path()
+    # Tam kitap WAV’ı ses indeksinden yazılır (WAV + pack
+    # katmanları, yeniden encode yok; ffmpeg concat gerekmez)
+    index = await asyncio.to_thread(audio_index.get, book_id)
+    if not len(index.records):
+        raise HTTPException(400, "Hazır ses yok")
 
-    with SessionLocal() as db:
-        chunks = (
-            db.query(Chunk)
-            .filter(Chunk.book_id == book_id, Chunk.status == "completed")
-            .order_by(Chunk.index)
-            .all()
-        )
+    srt_path = subtitle_engine.ensure_file(book_id, "srt", mode)
 
-        if not chunks:
-            raise HTTPException(400, "Hazır ses yok")
-
-    with open(list_path, "w", encoding="utf-8") as f:
-        for c in chunks:
-            f.write(f"file '{os.path.abspath(c.audio_path)}'\n")
-
-    subprocess.run(
-        [
-            ffmpeg_path,
-            "-y",
-            "-f", "concat",
-            "-safe", "0",
-            "-i", list_path,
-            "-c", "copy",
-            wav_path,
-        ],
-        check=True,
-    )
+    # Render, ses indeksi + altyazı parmak izine göre
+    # cache’lenir; chunk düzenlenmediyse tekrar render yok
+    render_key = hashlib.sha1(f"{index.fingerprint}|{os.path.basename(srt_path)}".encode()).hexdigest()[:12]
+    mp4_path = f"{audio_dir}/{book_id}.{mode}.{render_key}.mp4"
 
-    srt_data, _ = generate_sentence_srt(chunks)
-    with open(srt_path, "w", encoding="utf-8") as f:
-        f.write(srt_data)
-
-    subprocess.run(
-        [
-            ffmpeg_path,
-            "-y",
-            "-f", "lavfi",
-            "-i", "color=c=black:s=1280x720:r=25",
-            "-i", wav_path,
-            "-vf", f"subtitles={srt_path}",
-            "-c:v", "libx264",
-            "-pix_fmt", "yuv420p",
-            "-c:a", "aac",
-            "-shortest",
+    if not os.path.exists(mp4_path):
+        # Aynı render devam ediyorsa ona bağlanılır; yoksa
+        # istemci kovası + render havuzu (dolu ise 429)
+        await admission.render(
             mp4_path,
-        ],
-        check=True,
-    )
+            client_key(request),
+            lambda: asyncio.to_thread(render_video, index, srt_path, mp4_path, book_id, mode, render_key),
+        )
 
     return FileResponse(
         mp4_path,
@@ -368,51 +930,101 @@ async def download_video(book_id: str):
     )
 
 
-
-@router.delete("/{book_id}")
-def delete_book(book_id: str, db: Session = Depends(get_db)):
-    book = db.query(Book).filter(Book.id == book_id).first()
-
-    if not book:
+# -------------------------------------------------
+# Offline indirme paketleri
+#
+# Worker bölümler bittikçe arka planda encode eder;
+# kitap bittiğinde paketler genelde hazırdır. Hazır
+# değilse (EXPORT_PREBUILD=0, cache temizlendi) istek
+# render havuzunda üretir ve bekler.
+# -------------------------------------------------
+@router.get("/{book_id}/exports")
+def export_status(book_id: str, db: Session = Depends(get_db)):
+    status = exporter.status(db, book_id)
+    if status is None:
         raise HTTPException(status_code=404, detail="Book not found")
+    return status
 
 
-    chunks = db.query(Chunk).filter(Chunk.book_id == book_id).all()
+@router.get("/{book_id}/export")
+async def download_export(request: Request, book_id: str, fmt: str = "m4b", db: Session = Depends(get_db)):
+    if fmt not in exporter.formats:
+        raise HTTPException(400, f"Geçersiz format (desteklenen: {', '.join(exporter.formats)})")
 
+    plan = exporter.plan(db, book_id)
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Book not found")
+    if not plan.complete:
+        raise HTTPException(status_code=409, detail="Kitap henüz tamamen sentezlenmedi")
 
-    audio_dir = "oas_assets/audio"
+    path = exporter.package_path(plan, fmt)
+    if not os.path.exists(path):
+        try:
+            await admission.render(path, client_key(request), lambda: exporter.build(book_id))
+        except ValueError as e:
+            # Chunk sesi eksik / farklı formatta
+            raise HTTPException(status_code=409, detail=f"Paket hazırlanamadı: {e}")
+        except subprocess.CalledProcessError as e:
+            error = (e.stderr or b"").decode(errors="replace")[-500:]
+            raise HTTPException(status_code=503, detail=f"Paket hazırlanamadı (ffmpeg {e.returncode}): {error}")
+        except RuntimeError as e:
+            raise HTTPException(status_code=503, detail=f"Paket hazırlanamadı: {e}")
+    if not os.path.exists(path):
+        # Build sürerken chunk düzenlendi: yeni anahtar
+        raise HTTPException(status_code=409, detail="Kitap değişti, paket yeniden hazırlanıyor")
+
+    return FileResponse(path, media_type=MEDIA_TYPES[fmt], filename=exporter.download_name(plan, fmt))
+
+
+
+# -------------------------------------------------
+# Kalan chunk WAV’larını kitabın pack dosyasına taşır
+# (eski kitaplar); repack=true geçersiz kayıtları atar.
+# -------------------------------------------------
+@router.post("/{book_id}/pack")
+async def pack_book(book_id: str, repack: bool = False, db: Session = Depends(get_db)):
+    if not db.query(Book.id).filter(Book.id == book_id).first():
+        raise HTTPException(status_code=404, detail="Book not found")
 
-    for chunk in chunks:
-        if chunk.audio_path and os.path.exists(chunk.audio_path):
-            try:
-                os.remove(chunk.audio_path)
-            except Exception:
-                pass
-        else:
-            fallback = os.path.join(audio_dir, f"{book_id}_{chunk.index}.wav")
-            if os.path.exists(fallback):
-                try:
-                    os.remove(fallback)
-                except Exception:
-                    pass
+    result = await asyncio.to_thread(audio_store.pack_book, book_id)
 
+    if repack:
+        busy = (
+            job_queue.book_active(book_id)
+            or db.query(Chunk.id).filter(Chunk.book_id == book_id, Chunk.status == "processing").first()
+        )
+        if busy:
+            raise HTTPException(status_code=409, detail="Kitap şu an sentezleniyor")
+        result["repack"] = await asyncio.to_thread(audio_store.repack, book_id)
 
-    for chunk in chunks:
-        db.delete(chunk)
+    audio_index.mark_stale(book_id)
+    return result
 
 
-    epub_path = os.path.join(UPLOAD_DIR, f"{book_id}.epub")
-    if os.path.exists(epub_path):
-        try:
-            os.remove(epub_path)
-        except Exception:
-            pass
+# -------------------------------------------------
+# Kitap silme
+#
+# DB satırları toplu DELETE ile anında silinir; ses,
+# video, altyazı, indeks ve EPUB dosyaları arka planda
+# kaldırılır (uzun kitapta binlerce dosya).
+# -------------------------------------------------
+@router.delete("/{book_id}")
+def delete_book(book_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    exists = db.query(Book.id).filter(Book.id == book_id).first()
 
+    if not exists:
+        raise HTTPException(status_code=404, detail="Book not found")
 
-    db.delete(book)
+    db.query(Chunk).filter(Chunk.book_id == book_id).delete(synchronize_session=False)
+    db.query(LexiconEntry).filter(LexiconEntry.book_id == book_id).delete(synchronize_session=False)
+    db.query(CastEntry).filter(CastEntry.book_id == book_id).delete(synchronize_session=False)
+    db.query(Book).filter(Book.id == book_id).delete(synchronize_session=False)
     db.commit()
 
-    return {"status": "deleted", "book_id": book_id}
-
+    chunk_terms.invalidate(book_id)
+    lexicon.forget(book_id)
 
+    job_queue.cancel_book(book_id)
+    background_tasks.add_task(storage_gc.purge_book_async, book_id)
 
+    return {"status": "deleted", "book_id": book_id}
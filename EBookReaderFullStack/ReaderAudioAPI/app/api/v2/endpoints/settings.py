@@ -1,26 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
-from typing import Dict, Any
-import json
+from typing import Dict, Any, List
+import asyncio
+import re
 
 from app.core.database import get_db
-from app.models.user_setting import UserSetting
+from app.core.etag import etag_matches
+from app.schemas.emotion_profile import EmotionProfileSchema, EmotionProfileUpdate
+from app.services.emotion_profiles import GLOBAL_VOICE, emotion_profiles
+from app.services.settings_store import settings_store
 
 router = APIRouter()
 
+# LLM’in tek kelime olarak döneceği etiket
+EMOTION_NAME = re.compile(r"[a-z]{2,20}")
+
 @router.get("/")
-async def get_settings(db: Session = Depends(get_db)):
-    settings = db.query(UserSetting).all()
-    return {s.key: json.loads(s.value) for s in settings}
+def get_settings(request: Request):
+    # Ayarlar bellekte hazır JSON olarak tutulur
+    content, etag = settings_store.response()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
 
 @router.post("/")
-async def update_settings(settings: Dict[str, Any], db: Session = Depends(get_db)):
-    for key, value in settings.items():
-        db_setting = db.query(UserSetting).filter(UserSetting.key == key).first()
-        if db_setting:
-            db_setting.value = json.dumps(value)
-        else:
-            db_setting = UserSetting(key=key, value=json.dumps(value))
-            db.add(db_setting)
-    db.commit()
+def update_settings(settings: Dict[str, Any]):
+    # Tüm anahtarlar tek INSERT ... ON CONFLICT ile yazılır
+    settings_store.update(settings)
     return {"status": "success"}
+
+
+# -------------------------------------------------
+# Duygu profilleri (XTTS sentez ayarları)
+#
+# voice_id verilmezse "*" (tüm sesler) profili düzenlenir.
+# Çalışan worker’lar değişikliği restart olmadan alır.
+# -------------------------------------------------
+@router.get("/emotion-profiles", response_model=List[EmotionProfileSchema])
+async def list_emotion_profiles():
+    return await asyncio.to_thread(emotion_profiles.list)
+
+@router.put("/emotion-profiles/{emotion}", response_model=EmotionProfileSchema)
+async def update_emotion_profile(
+    emotion: str,
+    update: EmotionProfileUpdate,
+    voice_id: str = GLOBAL_VOICE,
+    db: Session = Depends(get_db),
+):
+    if not EMOTION_NAME.fullmatch(emotion.lower()):
+        raise HTTPException(status_code=400, detail="Geçersiz duygu adı")
+    return emotion_profiles.upsert(db, emotion, update.model_dump(exclude_none=True), voice_id)
+
+@router.delete("/emotion-profiles/{emotion}")
+async def delete_emotion_profile(emotion: str, voice_id: str = GLOBAL_VOICE, db: Session = Depends(get_db)):
+    try:
+        deleted = emotion_profiles.delete(db, emotion, voice_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Profil bulunamadı")
+    return {"status": "deleted"}
@@ -1,10 +1,73 @@
-from fastapi import APIRouter
+import os
+import uuid
+
+from fastapi import APIRouter, File, Form, HTTPException, Request, Response, UploadFile
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 from typing import List
-from app.core.constants import VoiceStyle, load_voice_styles
+from app.core.admission import admission, client_key
+from app.core.constants import UPLOAD_DIR, VoiceStyle
+from app.core.etag import etag_matches
+from app.schemas.voice import VoiceSegments
+from app.services.voice_onboarding import voice_onboarding
+from app.services.voice_registry import voice_registry
 
 
 router = APIRouter(tags=["voices"])
 
 @router.get("/", response_model=List[VoiceStyle])
-def list_voices():
-    return load_voice_styles()
\ No newline at end of file
+def list_voices(request: Request):
+    # Katalog bellekte hazır JSON olarak tutulur
+    headers = {"ETag": voice_registry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, voice_registry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=voice_registry.styles_json, media_type="application/json", headers=headers)
+
+
+# -------------------------------------------------
+# Uzun kayıttan yeni ses (ya da sese yeni duygular)
+#
+# segments: '[{"emotion": "neutral", "start": "00:00:40", "duration": 15}, ...]'
+# Kaynak ffmpeg’in okuyabildiği her format olabilir
+# (wav, mp3, m4a, video). Bir segment bile geçmezse
+# hiçbir dosya yazılmaz, 422 ile rapor döner.
+# -------------------------------------------------
+@router.post("/onboard")
+async def onboard_voice(
+    request: Request,
+    file: UploadFile = File(...),
+    voice_id: str = Form(...),
+    segments: str = Form(...),
+    dry_run: bool = Form(False),
+):
+    from app.api.v2.endpoints.books import save_upload
+
+    # Upload ile aynı istemci kovası
+    admission.upload_buckets.take(client_key(request))
+
+    try:
+        parsed = VoiceSegments.model_validate_json(f'{{"segments": {segments}}}')
+    except ValidationError as e:
+        raise HTTPException(400, f"Geçersiz segment listesi: {e.errors()[0]['msg']}")
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    source_path = os.path.join(UPLOAD_DIR, f"voice-{uuid.uuid4().hex}")
+    try:
+        await save_upload(file, source_path)
+        report = await voice_onboarding.onboard(
+            source_path,
+            voice_id,
+            [segment.model_dump() for segment in parsed.segments],
+            dry_run=dry_run,
+        )
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+    except RuntimeError as e:
+        raise HTTPException(422, str(e))
+    finally:
+        if os.path.exists(source_path):
+            os.remove(source_path)
+
+    if report["status"] == "rejected":
+        return JSONResponse(report, status_code=422)
+    return report
@@ -0,0 +1,293 @@
+import math
+import time
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.constants import (
+    MAX_CONCURRENT_PARSES,
+    MAX_CONCURRENT_RENDERS,
+    MAX_QUEUED_PARSES,
+    MAX_QUEUED_RENDERS,
+    RENDER_BURST,
+    RENDER_RATE_PER_MIN,
+    TRUST_FORWARDED_FOR,
+    UPLOAD_BURST,
+    UPLOAD_RATE_PER_MIN,
+)
+from app.core.metrics import ADMISSION_ACTIVE, ADMISSION_REJECTED, RENDER_SHARED
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# KABUL KONTROLÜ (upload / render)
+#
+# Her /upload bir arka plan parse’ı, her /download-video
+# dakikalarca süren bir ffmpeg render’ı başlatır. Sınırsız
+# kabul edilirse CPU, RAM ve disk birlikte tükenir.
+#
+# 1) İstemci başına token bucket: dakikada N istek,
+#    anlık en fazla burst. Boşsa 429 + Retry-After
+#    (kovanın bir token dolma süresi)
+# 2) İş tipi başına havuz: aynı anda en fazla
+#    concurrency iş koşar, en fazla queue iş sırada
+#    bekler. Sıra doluysa 429 + Retry-After (ortalama iş
+#    süresinden tahmin)
+# 3) Aynı anahtarlı (aynı kitap + aynı render parmak izi)
+#    devam eden render’a yeni istekler bağlanır; N eşzamanlı
+#    indirme tek render paylaşır, havuzda yer tutmaz
+#
+# Durum process içidir; birden fazla API process’i
+# varsa sınırlar process başınadır.
+# ======================================================
+
+# Bellekte tutulan en fazla istemci kovası (LRU)
+MAX_CLIENTS = 10000
+
+# Retry-After hesabında iş süresi bilinmiyorsa (saniye)
+DEFAULT_JOB_SECONDS = 30.0
+
+
+class AdmissionRejected(Exception):
+    """
+    İstek kabul edilmedi; main.py’de 429 + Retry-After olur.
+    """
+
+    def __init__(self, kind: str, reason: str, retry_after: float):
+        super().__init__(f"{kind}: {reason}")
+        self.kind = kind
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def client_key(request) -> str:
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class TokenBuckets:
+    """
+    İstemci başına token bucket (dakikada rate, en fazla burst).
+    """
+
+    def __init__(self, kind: str, per_minute: float, burst: int, max_clients: int = MAX_CLIENTS):
+        self.kind = kind
+        self.rate = per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_clients = max_clients
+
+        # client -> (token, son güncelleme)
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    # -------------------------------------------------
+    # Bir token harcar; kova boşsa AdmissionRejected
+    # -------------------------------------------------
+    def take(self, client: str):
+        if self.rate <= 0:
+            return
+
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (float(self.burst), now))
+        tokens = min(float(self.burst), tokens + (now - updated) * self.rate)
+
+        if tokens < 1.0:
+            self._remember(client, tokens, now)
+            ADMISSION_REJECTED.inc(kind=self.kind, reason="rate")
+            raise AdmissionRejected(self.kind, "rate", (1.0 - tokens) / self.rate)
+
+        self._remember(client, tokens - 1.0, now)
+
+    def _remember(self, client: str, tokens: float, now: float):
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+
+
+class Ticket:
+    """
+    Havuzda ayrılmış yer. run() slot boşalana kadar
+    sırada bekler, işi koşar, yeri bırakır. Hiç
+    çalıştırılmayacaksa cancel() çağrılır.
+    """
+
+    def __init__(self, pool: "WorkPool"):
+        self.pool = pool
+        self._done = False
+
+    async def run(self, fn: Callable[..., Awaitable], *args):
+        if self._done:
+            raise RuntimeError("Ticket zaten kullanıldı")
+        self._done = True
+
+        await self.pool._acquire()
+        start = time.monotonic()
+        try:
+            return await fn(*args)
+        finally:
+            self.pool._release(time.monotonic() - start)
+
+    def cancel(self):
+        if not self._done:
+            self._done = True
+            self.pool._unreserve()
+
+
+class WorkPool:
+    """
+    Aynı anda en fazla concurrency iş, sırada en fazla
+    queue iş. Sayaçlar event loop içinde (kilit gerekmez).
+    """
+
+    def __init__(self, kind: str, concurrency: int, queue: int):
+        self.kind = kind
+        self.concurrency = max(1, concurrency)
+        self.queue = max(0, queue)
+
+        self.active = 0
+        self.waiting = 0
+        self._waiters: deque = deque()
+
+        # Tamamlanan işlerin ortalama süresi (EWMA)
+        self.average_seconds: Optional[float] = None
+
+        ADMISSION_ACTIVE.set(0, kind=kind, state="active")
+        ADMISSION_ACTIVE.set(0, kind=kind, state="waiting")
+
+    def _gauges(self):
+        ADMISSION_ACTIVE.set(self.active, kind=self.kind, state="active")
+        ADMISSION_ACTIVE.set(self.waiting, kind=self.kind, state="waiting")
+
+    def retry_after(self) -> float:
+        average = self.average_seconds or DEFAULT_JOB_SECONDS
+        return average * (self.waiting + 1) / self.concurrency
+
+    # -------------------------------------------------
+    # Yer ayırır; koşan + bekleyen sınırı doluysa 429
+    # -------------------------------------------------
+    def reserve(self) -> Ticket:
+        if self.active + self.waiting >= self.concurrency + self.queue:
+            ADMISSION_REJECTED.inc(kind=self.kind, reason="queue")
+            raise AdmissionRejected(self.kind, "queue", self.retry_after())
+
+        self.waiting += 1
+        self._gauges()
+        return Ticket(self)
+
+    async def _acquire(self):
+        try:
+            while self.active >= self.concurrency:
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+                try:
+                    await waiter
+                finally:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+        except BaseException:
+            self._unreserve()
+            raise
+
+        self.waiting -= 1
+        self.active += 1
+        self._gauges()
+
+    def _unreserve(self):
+        self.waiting -= 1
+        self._gauges()
+        self._wake()
+
+    def _release(self, seconds: float):
+        self.active -= 1
+        if self.average_seconds is None:
+            self.average_seconds = seconds
+        else:
+            self.average_seconds = 0.8 * self.average_seconds + 0.2 * seconds
+        self._gauges()
+        self._wake()
+
+    def _wake(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+
+class SingleFlight:
+    """
+    Aynı anahtarlı işler tek sefer koşar; devam ederken
+    gelen istekler aynı sonucu bekler.
+    """
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def running(self, key: str) -> bool:
+        return key in self._inflight
+
+    # -------------------------------------------------
+    # start() yeni iş için çağrılır (token / havuz
+    # kontrolü orada; bağlanan isteklerden alınmaz).
+    # İş shield ile beklenir: bir istemcinin bağlantısı
+    # kopsa da diğerleri için render sürer.
+    # -------------------------------------------------
+    async def run(self, key: str, start: Callable[[], Awaitable]):
+        task = self._inflight.get(key)
+        if task is not None:
+            RENDER_SHARED.inc(kind=self.kind)
+            return await asyncio.shield(task)
+
+        task = asyncio.ensure_future(start())
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+
+class Admission:
+    """
+    Uç noktaların kullandığı kovalar, havuzlar ve
+    render birleştirme.
+    """
+
+    def __init__(self):
+        self.upload_buckets = TokenBuckets("upload", UPLOAD_RATE_PER_MIN, UPLOAD_BURST)
+        self.render_buckets = TokenBuckets("render", RENDER_RATE_PER_MIN, RENDER_BURST)
+
+        self.parses = WorkPool("parse", MAX_CONCURRENT_PARSES, MAX_QUEUED_PARSES)
+        self.renders = WorkPool("render", MAX_CONCURRENT_RENDERS, MAX_QUEUED_RENDERS)
+
+        self.render_flights = SingleFlight("render")
+
+    # -------------------------------------------------
+    # Render: devam eden aynı render varsa ona bağlanır;
+    # yoksa istemcinin kovasından token, havuzdan yer
+    # alınır ve render başlar.
+    # -------------------------------------------------
+    async def render(self, key: str, client: str, fn: Callable[[], Awaitable]):
+        if self.render_flights.running(key):
+            return await self.render_flights.run(key, fn)
+
+        self.render_buckets.take(client)
+        ticket = self.renders.reserve()
+        return await self.render_flights.run(key, lambda: ticket.run(fn))
+
+    def snapshot(self) -> dict:
+        return {
+            pool.kind: {
+                "active": pool.active,
+                "waiting": pool.waiting,
+                "concurrency": pool.concurrency,
+                "queue": pool.queue,
+                "average_seconds": round(pool.average_seconds, 3) if pool.average_seconds else None,
+            }
+            for pool in (self.parses, self.renders)
+        }
+
+
+# Global singleton instance
+admission = Admission()
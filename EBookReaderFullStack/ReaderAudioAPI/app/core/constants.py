@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import re
 import os
 import shutil
@@ -10,17 +10,146 @@ import platform
 # ======================================================
 
 SPEAKERS_DIR = os.path.join("app", "speakers")
+UPLOAD_DIR = os.path.join("oas_assets", "uploads")
+
+# Açılış modu:
+#   lazy : model ilk kitapta yüklenir (API anında açılır)
+#   warm : açılıştan sonra arka planda yüklenir + ısındırılır
+STARTUP_MODE = os.getenv("STARTUP_MODE", "lazy").lower()
+
+# Ses kataloğunun diskte değişiklik kontrolü aralığı (saniye)
+VOICE_POLL_INTERVAL = float(os.getenv("VOICE_POLL_INTERVAL", "5"))
+
+# Duygu profilleri tablosunun değişiklik kontrolü aralığı (saniye).
+# Worker ayrı process’teyse API’deki düzenlemeler en geç bu
+# sürede uygulanır.
+PROFILE_POLL_INTERVAL = float(os.getenv("PROFILE_POLL_INTERVAL", "5"))
+
+# user_settings snapshot’ının en fazla ne kadar eski
+# kalabileceği (saniye); başka process’in yazdıkları için
+SETTINGS_TTL = float(os.getenv("SETTINGS_TTL", "5"))
+
+# Depolama temizliği: yetim dosya taraması aralığı
+# (saniye, 0: kapalı) ve yeni dosyalara dokunulmayan süre
+GC_SWEEP_INTERVAL = float(os.getenv("GC_SWEEP_INTERVAL", "3600"))
+GC_GRACE_SECONDS = float(os.getenv("GC_GRACE_SECONDS", "900"))
+
+# Chunk sesi depolaması:
+#   pack  : hizalamadan sonra kitabın pack dosyasına taşınır
+#   loose : her chunk ayrı WAV olarak kalır
+AUDIO_STORAGE = os.getenv("AUDIO_STORAGE", "pack").lower()
+
+# Bellekte ters indeksi (terim → chunk’lar) tutulan en
+# fazla kitap sayısı; sözlük düzenlemelerinde kullanılır
+TERM_INDEX_BOOKS = int(os.getenv("TERM_INDEX_BOOKS", "8"))
+
+# Diyalogda konuşanı etiketle bulunamayan chunk’lar için
+# worker penceresinde LLM’e sorulsun mu (chunk başına istek)
+DIALOGUE_LLM = os.getenv("DIALOGUE_LLM", "0") == "1"
+
+# Bellekte tutulan speaker conditioning latent sayısı (LRU).
+# Worker pencereyi (ses, duygu) gruplarıyla sentezler;
+# aynı referans WAV’ın latent’ı grup boyunca sıcak kalır.
+LATENT_CACHE_SIZE = int(os.getenv("LATENT_CACHE_SIZE", "16"))
+
+# Ses eklemede referans WAV’lar: örnekleme hızı ve
+# kırpılmış segmentin kabul edilen süre aralığı (saniye).
+# XTTS referansın en fazla max_ref_len (30 sn) kadarını kullanır.
+VOICE_SAMPLE_RATE = int(os.getenv("VOICE_SAMPLE_RATE", "22050"))
+VOICE_MIN_SECONDS = float(os.getenv("VOICE_MIN_SECONDS", "4"))
+VOICE_MAX_SECONDS = float(os.getenv("VOICE_MAX_SECONDS", "30"))
 
 MIN_SPEED = 0.9
 MAX_SPEED = 1.4
 MIN_STEPS = 3
 MAX_STEPS = 14
 
+# Sentez worker’ı nerede koşar:
+#   embedded : API process’i içinde (tek process kurulum)
+#   external : API sadece iş ekler; python -m app.worker
+WORKER_MODE = os.getenv("WORKER_MODE", "embedded").lower()
+
+# jobs tablosu: lease süresi, boş kuyrukta bekleme ve
+# bir işin en fazla kaç kez deneneceği
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "60"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+# Okuyucunun bulunduğu konumdan itibaren öncelikli
+# sentezlenecek chunk sayısı (sliding window)
+PREFETCH_WINDOW = int(os.getenv("PREFETCH_WINDOW", "8"))
+
+# Bu süreden uzun "parsing" kalan kitap (process parse
+# sırasında öldü) aynı dosyanın tekrar yüklenmesini
+# dedup ile yakalamaz
+PARSE_STALE_SECONDS = float(os.getenv("PARSE_STALE_SECONDS", "1800"))
+
+# EPUB upload limiti ve diske yazarken kullanılan blok boyutu
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "100")) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Ağır uç noktalar için kabul kontrolü (istemci başına
+# token bucket: dakikada istek + anlık patlama; iş tipi
+# başına aynı anda koşan ve sırada bekleyen iş sayısı).
+# Sınır aşılınca 429 + Retry-After döner.
+UPLOAD_RATE_PER_MIN = float(os.getenv("UPLOAD_RATE_PER_MIN", "6"))
+UPLOAD_BURST = int(os.getenv("UPLOAD_BURST", "3"))
+RENDER_RATE_PER_MIN = float(os.getenv("RENDER_RATE_PER_MIN", "4"))
+RENDER_BURST = int(os.getenv("RENDER_BURST", "2"))
+MAX_CONCURRENT_PARSES = int(os.getenv("MAX_CONCURRENT_PARSES", "2"))
+MAX_QUEUED_PARSES = int(os.getenv("MAX_QUEUED_PARSES", "8"))
+MAX_CONCURRENT_RENDERS = int(os.getenv("MAX_CONCURRENT_RENDERS", "1"))
+MAX_QUEUED_RENDERS = int(os.getenv("MAX_QUEUED_RENDERS", "4"))
+
+# İstemci adresi X-Forwarded-For’dan alınsın mı (API bir
+# reverse proxy arkasındaysa)
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "0") == "1"
+
+# Sentez sonrası ses işleme (kırpma + loudness + duraksama)
+AUDIO_POSTPROCESS = os.getenv("AUDIO_POSTPROCESS", "1") == "1"
+TARGET_LUFS = float(os.getenv("TARGET_LUFS", "-20"))
+
+# CPU inference hassasiyeti (fp32 | int8 | bf16) ve
+# worker başına torch thread sayısı (0: torch varsayılanı)
+INFERENCE_PRECISION = os.getenv("INFERENCE_PRECISION", "fp32").lower()
+TORCH_THREADS = int(os.getenv("TORCH_THREADS", "0"))
+TORCH_INTEROP_THREADS = int(os.getenv("TORCH_INTEROP_THREADS", "0"))
+
+# XTTS inference_stream parça boyutu (GPT token); küçük
+# değer ilk sesi öne çeker, çok küçükse takılma olur
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "20"))
+
+# Offline indirme paketleri (m4b: bölüm işaretli tek
+# dosya, mp3 / opus: bölüm başına dosya, zip). Bölümler
+# sentezlendikçe worker arka planda encode eder
+# (EXPORT_PREBUILD=0: sadece istenince); aynı anda en
+# fazla EXPORT_CONCURRENCY bölüm encode edilir.
+EXPORT_DIR = os.path.join("oas_assets", "exports")
+EXPORT_FORMATS = tuple(
+    f.strip() for f in os.getenv("EXPORT_FORMATS", "m4b,mp3,opus").lower().split(",") if f.strip()
+)
+EXPORT_PREBUILD = os.getenv("EXPORT_PREBUILD", "1") == "1"
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "2"))
+EXPORT_AAC_BITRATE = os.getenv("EXPORT_AAC_BITRATE", "64k")
+EXPORT_MP3_BITRATE = os.getenv("EXPORT_MP3_BITRATE", "64k")
+EXPORT_OPUS_BITRATE = os.getenv("EXPORT_OPUS_BITRATE", "32k")
+
 
 # ======================================================
 # MODELS
 # ======================================================
 
+class VoiceSample(BaseModel):
+    """
+    Tek bir referans WAV’ın önceden hesaplanmış bilgileri.
+    """
+    emotion: str
+    duration: float
+    sample_rate: int
+    loudness_dbfs: float
+    content_hash: str
+
+
 class VoiceStyle(BaseModel):
     """
     Sistemde mevcut bir sesi temsil eder.
@@ -29,8 +158,25 @@ class VoiceStyle(BaseModel):
     id: str
     name: str
     emotions: List[str]
+    samples: List[VoiceSample] = []
 
 
+def parse_voice_filename(filename: str) -> Optional[Tuple[str, str]]:
+    """
+    "{voice_id}_{emotion}.wav" → (voice_id, emotion)
+
+    Son "_"ten bölünür: voice_id "_" içerebilir
+    ("damien_black_sad.wav"), duygu adı içeremez.
+    """
+    if not filename.lower().endswith(".wav"):
+        return None
+
+    match = re.match(r"(.+)_([^_]+?)\.wav$", filename, re.IGNORECASE)
+    if not match:
+        return None
+
+    voice_id, emotion = match.groups()
+    return voice_id.lower(), emotion.lower()
 
 
 def load_voice_styles() -> List[VoiceStyle]:
@@ -52,17 +198,11 @@ def load_voice_styles() -> List[VoiceStyle]:
     voices: Dict[str, set] = {}
 
     for filename in os.listdir(SPEAKERS_DIR):
-        if not filename.lower().endswith(".wav"):
+        parsed = parse_voice_filename(filename)
+        if not parsed:
             continue
 
-        match = re.match(r"(.+?)_(.+?)\.wav$", filename)
-        if not match:
-            continue
-
-        voice_id, emotion = match.groups()
-
-        voice_id = voice_id.lower()
-        emotion = emotion.lower()
+        voice_id, emotion = parsed
 
         if voice_id not in voices:
             voices[voice_id] = set()
@@ -125,3 +265,24 @@ def resolve_ffmpeg_path() -> str:
         "FFmpeg bulunamadı. "
         "Lütfen FFmpeg kur veya FFMPEG_PATH env değişkenini ayarla."
     )
+
+
+def resolve_ffprobe_path() -> str:
+    """
+    ffprobe binary'si.
+    Öncelik sırası:
+    1) ENV: FFPROBE_PATH
+    2) ffmpeg ile aynı dizin
+    3) PATH içinden
+    """
+
+    env_path = os.getenv("FFPROBE_PATH")
+    if env_path and os.path.exists(env_path):
+        return env_path
+
+    directory, name = os.path.split(resolve_ffmpeg_path())
+    sibling = os.path.join(directory, name.replace("ffmpeg", "ffprobe"))
+    if directory and sibling != os.path.join(directory, name) and os.path.exists(sibling):
+        return sibling
+
+    return shutil.which("ffprobe") or "ffprobe"
@@ -0,0 +1,24 @@
+# ======================================================
+# If-None-Match (RFC 9110 13.1.2)
+#
+# Başlık bir liste olabilir ("a", W/"b") ya da "*".
+# Karşılaştırma zayıftır: proxy / gzip’in eklediği W/
+# öneki atılır, listedeki herhangi bir tag eşleşirse
+# 304 döner.
+# ======================================================
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    if tag[:2] in ("W/", "w/"):
+        tag = tag[2:]
+    return tag
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
@@ -0,0 +1,296 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# ======================================================
+# IN-PROCESS METRICS REGISTRY
+#
+# Prometheus text formatına (0.0.4) render edilen hafif
+# bir registry. Ölçüm tarafı sadece dict güncellemesi
+# yapar; metin üretimi yalnızca /metrics çağrıldığında
+# olur. Böylece kimse scrape etmezken maliyet ~sıfırdır.
+# ======================================================
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float]):
+        """
+        Değer sadece scrape anında fn() çağrılarak okunur
+        (ör. kuyruk uzunluğu). Etiketsiz gauge’lar içindir.
+        """
+        self._function = fn
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+            for key, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket sayaçları..., +Inf, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+
+        lines = []
+        names = self.labelnames + ("le",)
+        for key, state in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), state[:-1]):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, key + (_format_value(bound),))} "
+                    f"{_format_value(cumulative)}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ======================================================
+# PIPELINE METRİKLERİ
+# ======================================================
+
+EPUB_PARSE_SECONDS = REGISTRY.histogram(
+    "reader_epub_parse_seconds",
+    "EPUB parse + chunk insert süresi (kitap başına)",
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+
+CHUNKS_INSERTED = REGISTRY.counter(
+    "reader_chunks_inserted",
+    "Parser tarafından DB’ye yazılan chunk sayısı",
+)
+
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "reader_llm_request_seconds",
+    "Ollama duygu analizi istek süresi",
+)
+
+LLM_ERRORS = REGISTRY.counter(
+    "reader_llm_errors",
+    "Başarısız duygu analizi istekleri (bağlantı hatası / HTTP != 200)",
+)
+
+TTS_SYNTHESIS_SECONDS = REGISTRY.histogram(
+    "reader_tts_synthesis_seconds",
+    "Chunk başına XTTS sentez süresi",
+    ("voice", "emotion"),
+)
+
+TTS_REAL_TIME_FACTOR = REGISTRY.histogram(
+    "reader_tts_real_time_factor",
+    "Sentez süresi / üretilen ses süresi (1’in altı gerçek zamandan hızlı)",
+    ("voice", "emotion"),
+    buckets=(0.1, 0.25, 0.5, 0.75, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0),
+)
+
+TTS_FIRST_AUDIO_SECONDS = REGISTRY.histogram(
+    "reader_tts_first_audio_seconds",
+    "Speak now isteğinden ilk ses parçasına kadar geçen süre",
+)
+
+TTS_CHUNKS = REGISTRY.counter(
+    "reader_tts_chunks",
+    "Sentezlenen chunk sayısı",
+    ("status",),
+)
+
+ALIGNMENT_SECONDS = REGISTRY.histogram(
+    "reader_alignment_seconds",
+    "Chunk başına kelime hizalama süresi",
+)
+
+AUDIO_POST_SECONDS = REGISTRY.histogram(
+    "reader_audio_postprocess_seconds",
+    "Chunk başına kırpma + loudness normalizasyon süresi",
+)
+
+QUEUE_DEPTH = REGISTRY.gauge(
+    "reader_queue_depth",
+    "TTS kuyruğunda bekleyen kitap sayısı",
+)
+
+FFMPEG_RENDER_SECONDS = REGISTRY.histogram(
+    "reader_ffmpeg_render_seconds",
+    "FFmpeg işlem süresi",
+    ("kind",),
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "reader_db_query_seconds",
+    "SQL sorgu süresi (statement tipine göre)",
+    ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+
+ADMISSION_REJECTED = REGISTRY.counter(
+    "reader_admission_rejected",
+    "429 ile reddedilen istekler (rate: istemci kovası, queue: kuyruk dolu)",
+    ("kind", "reason"),
+)
+
+ADMISSION_ACTIVE = REGISTRY.gauge(
+    "reader_admission_active",
+    "Koşan / sırada bekleyen ağır işler",
+    ("kind", "state"),
+)
+
+RENDER_SHARED = REGISTRY.counter(
+    "reader_render_shared",
+    "Devam eden aynı render’a bağlanan istekler",
+    ("kind",),
+)
@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import cProfile
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# CONFIG
+#
+# READER_PROFILE=cprofile → her stage için .prof dosyası
+# READER_PROFILE=sample   → py-spy benzeri stack sampling,
+#                           flamegraph uyumlu .folded dosyası
+# Boşsa hook’lar hiçbir şey yapmaz.
+# ======================================================
+
+PROFILE_MODE = os.getenv("READER_PROFILE", "").lower() or None
+PROFILE_DIR = os.getenv("READER_PROFILE_DIR", os.path.join("oas_assets", "profiles"))
+SAMPLE_INTERVAL = float(os.getenv("READER_PROFILE_INTERVAL", "0.005"))
+
+
+class StackSampler:
+    """
+    Belirli aralıklarla tüm thread’lerin stack’ini okur ve
+    "dosya:fonksiyon;dosya:fonksiyon" biçiminde sayar.
+
+    Sentez asyncio.to_thread ile ayrı thread’de koştuğu için
+    sadece ana thread değil tüm thread’ler örneklenir.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def write_folded(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profile_stage(name: str, mode: str | None = None, out_dir: str | None = None):
+    """
+    Bir pipeline stage’ini profiller.
+
+    Örnek:
+        with profile_stage(f"process_book-{book_id}"):
+            ...
+
+    Üretilen dosyanın yolu yield edilen dict’in "path"
+    alanına yazılır (bench sonuçlarına eklemek için).
+    """
+    mode = (mode or PROFILE_MODE or "").lower()
+    info = {"path": None}
+
+    if mode not in ("cprofile", "sample"):
+        yield info
+        return
+
+    out_dir = out_dir or PROFILE_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield info
+        finally:
+            profiler.disable()
+            info["path"] = os.path.join(out_dir, f"{name}-{stamp}.prof")
+            profiler.dump_stats(info["path"])
+            logger.info(f"Profil yazıldı: {info['path']}")
+    else:
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            yield info
+        finally:
+            sampler.stop()
+            info["path"] = os.path.join(out_dir, f"{name}-{stamp}.folded")
+            sampler.write_folded(info["path"])
+            logger.info(f"Profil yazıldı: {info['path']}")
@@ -0,0 +1,34 @@
+import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+# ======================================================
+# CPU WORKER POOL
+#
+# Sentez sonrası CPU işleri (hizalama vb.) event loop’u
+# ve sentez thread’ini bekletmeden bu process pool’da
+# koşar. İlk kullanımda oluşturulur.
+# ======================================================
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "2"))
+
+_pool = None
+
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=CPU_WORKERS)
+    return _pool
+
+
+async def run_cpu(fn, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_pool(), fn, *args)
+
+
+def shutdown_cpu_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
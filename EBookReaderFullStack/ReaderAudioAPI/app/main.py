@@ -1,20 +1,36 @@
 import os
 import re
 import sys
+import time
+import asyncio
 import logging
 import subprocess
-from datetime import timedelta
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from app.api.v2.router import api_router
-from app.core.database import Base, engine, SessionLocal
+from app.api.v2.endpoints.books import chunk_audio_response
+from app.core.admission import AdmissionRejected, admission, client_key
+from app.core.constants import STARTUP_MODE, WORKER_MODE
+from app.core.database import SessionLocal, ensure_schema
 from app.models.book import Book, Chunk
+from app.services.audio_index import audio_index
+from app.services.audio_store import audio_store
+from app.services.job_queue import job_queue
+from app.services.search import ensure_index as ensure_search_index
+from app.services.book_stats import ensure_stats
+from app.services.storage_gc import storage_gc
 from app.services.tts import tts_service
+from app.services.subtitles import subtitle_engine
+from app.services.emotion_profiles import emotion_profiles
+from app.services.voice_registry import voice_registry
 
 from app.core.ffmpeg import get_ffmpeg_path
+from app.core.metrics import FFMPEG_RENDER_SECONDS, REGISTRY
+from app.core.workers import shutdown_cpu_pool
 
 
 logging.basicConfig(level=logging.INFO)
@@ -33,104 +49,127 @@ app.add_middleware(
 FFMPEG_PATH = get_ffmpeg_path()
 
 
-def generate_srt(chunks):
-    srt_content = ""
-    current_time = timedelta(seconds=0)
-
-    for i, chunk in enumerate(chunks):
-        duration = chunk.duration if (chunk.duration and chunk.duration > 0) else (len(chunk.text.split()) * 0.5)
-        start_time = current_time
-        end_time = current_time + timedelta(seconds=duration)
-
-        def format_td(td):
-            total_sec = int(td.total_seconds())
-            ms = int(td.microseconds / 1000)
-            hours, remainder = divmod(total_sec, 3600)
-            mins, secs = divmod(remainder, 60)
-            return f"{hours:02}:{mins:02}:{secs:02},{ms:03}"
-
-        srt_content += f"{i + 1}\n{format_td(start_time)} --> {format_td(end_time)}\n{chunk.text}\n\n"
-        current_time = end_time
-
-    return srt_content, current_time.total_seconds()
+# -------------------------------------------------
+# Tam kitap videosu (NVENC), thread içinde; ilerleme
+# ffmpeg çıktısından konsola yazılır
+# -------------------------------------------------
+def render_full_video(title: str, output_wav: str, output_mp4: str, srt_file: str, total_duration: float):
+    srt_path_fixed = srt_file.replace("\\", "/").replace(":", "\\:")
+
+    cmd = [
+        FFMPEG_PATH, '-y',
+        '-f', 'lavfi', '-i', 'color=c=0x0f172a:s=1280x720:r=25',  # Slate-900 UI Teması
+        '-i', output_wav,
+        '-vf',
+        f"subtitles='{srt_path_fixed}':force_style='Alignment=2,FontSize=22,MarginV=140,Outline=0,Shadow=0,PrimaryColour=&HFFFFFF'",
+        '-c:v', 'h264_nvenc',  # GPU Encoding
+        '-c:a', 'aac', '-b:a', '192k',
+        '-shortest',
+        output_mp4
+    ]
+
+    render_start = time.perf_counter()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True,
+                               encoding='utf-8')
+
+    print(f"\n[SYSTEM] Video Render Başlatıldı: {title}")
+
+    for line in process.stdout:
+        if "time=" in line:
+            time_match = re.search(r"time=(\d+):(\d+):(\d+.\d+)", line)
+            if time_match:
+                h, m, s = map(float, time_match.groups())
+                current_seconds = h * 3600 + m * 60 + s
+                percentage = (current_seconds / total_duration) * 100
+                sys.stdout.write(
+                    f"\rİlerleme: %{percentage:.2f} | {int(current_seconds)}/{int(total_duration)} saniye")
+                sys.stdout.flush()
+
+    process.wait()
+    FFMPEG_RENDER_SECONDS.observe(time.perf_counter() - render_start, kind="video")
+    print(f"\n[SYSTEM] Video Başarıyla Oluşturuldu: {output_mp4}\n")
 
 
 @app.get("/api/v2/books/{book_id}/download-full")
-async def download_full_book(book_id: str):
+async def download_full_book(request: Request, book_id: str):
     audio_dir = "oas_assets/audio"
     output_wav = os.path.join(audio_dir, f"full_{book_id}.wav")
     output_mp4 = os.path.join(audio_dir, f"video_{book_id}.mp4")
-    srt_file = os.path.join(audio_dir, f"sub_{book_id}.srt")
-    list_file = os.path.join(audio_dir, f"list_{book_id}.txt")
 
+    # Sadece başlık + tamamlanmış chunk sayısı; toplam süre
+    # render sırasında ses indeksinden
     with SessionLocal() as db:
-        book = db.query(Book).filter(Book.id == book_id).first()
-        chunks = db.query(Chunk).filter(Chunk.book_id == book_id, Chunk.status == "completed").order_by(
-            Chunk.index).all()
-
-        if not chunks:
-            return {"error": "Sentezlenmiş parça bulunamadı. Lütfen önce seslendirmeyi tamamlayın."}
-
-        with open(list_file, "w", encoding="utf-8") as f:
-            for c in chunks:
-                f.write(f"file '{book_id}_{c.index}.wav'\n")
-
-        subprocess.run([FFMPEG_PATH, '-y', '-f', 'concat', '-safe', '0', '-i', list_file, '-c', 'copy', output_wav],
-                       check=True)
-
-        srt_data, total_duration = generate_srt(chunks)
-        with open(srt_file, "w", encoding="utf-8") as f:
-            f.write(srt_data)
-
-        try:
-            srt_path_fixed = srt_file.replace("\\", "/").replace(":", "\\:")
-
-            cmd = [
-                FFMPEG_PATH, '-y',
-                '-f', 'lavfi', '-i', 'color=c=0x0f172a:s=1280x720:r=25',  # Slate-900 UI Teması
-                '-i', output_wav,
-                '-vf',
-                f"subtitles='{srt_path_fixed}':force_style='Alignment=2,FontSize=22,MarginV=140,Outline=0,Shadow=0,PrimaryColour=&HFFFFFF'",
-                '-c:v', 'h264_nvenc',  # GPU Encoding
-                '-c:a', 'aac', '-b:a', '192k',
-                '-shortest',
-                output_mp4
-            ]
-
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True,
-                                       encoding='utf-8')
-
-            print(f"\n[SYSTEM] Video Render Başlatıldı: {book.title if book else 'Unknown'}")
-
-            for line in process.stdout:
-                if "time=" in line:
-                    time_match = re.search(r"time=(\d+):(\d+):(\d+.\d+)", line)
-                    if time_match:
-                        h, m, s = map(float, time_match.groups())
-                        current_seconds = h * 3600 + m * 60 + s
-                        percentage = (current_seconds / total_duration) * 100
-                        sys.stdout.write(
-                            f"\rİlerleme: %{percentage:.2f} | {int(current_seconds)}/{int(total_duration)} saniye")
-                        sys.stdout.flush()
-
-            process.wait()
-            print(f"\n[SYSTEM] Video Başarıyla Oluşturuldu: {output_mp4}\n")
-
-        except Exception as e:
-            logger.error(f"Video kodlama hatası: {e}")
-            return {"error": "Render işlemi başarısız oldu."}
+        book_title = db.query(Book.title).filter(Book.id == book_id).scalar()
+        completed = db.query(func.count(Chunk.id)).filter(
+            Chunk.book_id == book_id, Chunk.status == "completed"
+        ).scalar()
+
+    if not completed:
+        return {"error": "Sentezlenmiş parça bulunamadı. Lütfen önce seslendirmeyi tamamlayın."}
+
+    title = book_title or "Unknown"
+
+    async def render():
+        # WAV + pack katmanlarından tek WAV (ffmpeg concat yerine)
+        index = await asyncio.to_thread(audio_index.get, book_id)
+        with FFMPEG_RENDER_SECONDS.time(kind="concat"):
+            await asyncio.to_thread(index.write_wav, output_wav)
+
+        srt_file = await asyncio.to_thread(subtitle_engine.ensure_file, book_id, "srt", "sentence")
+        await asyncio.to_thread(render_full_video, title, output_wav, output_mp4, srt_file, index.duration)
+
+    try:
+        # Aynı kitabın devam eden render’ına bağlanır;
+        # yoksa istemci kovası + render havuzu (dolu ise 429)
+        await admission.render(f"full:{book_id}", client_key(request), render)
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.error(f"Video kodlama hatası: {e}")
+        return {"error": "Render işlemi başarısız oldu."}
 
     return FileResponse(
         path=output_mp4,
         media_type='video/mp4',
-        filename=f"{book.title if book else 'EBook'}_Video.mp4"
+        filename=f"{book_title or 'EBook'}_Video.mp4"
+    )
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        {"detail": "Çok fazla istek" if exc.reason == "rate" else "Sıra dolu", "kind": exc.kind,
+         "reason": exc.reason, "retry_after": exc.retry_after},
+        status_code=429,
+        headers={"Retry-After": str(exc.retry_after)},
     )
 
 
 @app.on_event("startup")
 async def startup_event():
-    Base.metadata.create_all(bind=engine)
-    await tts_service.start_worker()
+    ensure_schema()
+    ensure_search_index()
+    ensure_stats()
+    await voice_registry.start_watcher()
+    await emotion_profiles.start_watcher()
+    await storage_gc.start_sweeper()
+
+    # external modda sentez python -m app.worker process’lerinde;
+    # API sadece jobs tablosuna iş ekler
+    if WORKER_MODE == "embedded":
+        await tts_service.start_worker()
+
+        # Model yüklemesi açılışı bekletmez
+        if STARTUP_MODE == "warm":
+            app.state.warmup_task = asyncio.create_task(tts_service.warm_up())
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    # reload / restart’ta yarıda kalan iş lease süresini beklemeden
+    # kuyruğa döner
+    await tts_service.stop_worker()
+    shutdown_cpu_pool()
 
 
 app.include_router(api_router, prefix="/api/v2")
@@ -138,10 +177,39 @@ app.include_router(api_router, prefix="/api/v2")
 
 @app.get("/api/v2/books/{book_id}/download/{chunk_index}")
 async def download_audio(book_id: str, chunk_index: int):
-    file_path = f"oas_assets/audio/{book_id}_{chunk_index}.wav"
-    if not os.path.exists(file_path):
+    if audio_store.locate(book_id, chunk_index) is None:
         return {"error": "Dosya bulunamadı."}
-    return FileResponse(path=file_path, media_type='audio/wav', filename=f"Part_{chunk_index}.wav")
+    return chunk_audio_response(book_id, chunk_index, filename=f"Part_{chunk_index}.wav")
+
+
+@app.get("/health/ready")
+async def health_ready():
+    # Model worker process’lerinde: API hazır, kuyruk özeti döner
+    if WORKER_MODE == "external":
+        return {
+            "ready": True, "worker_mode": WORKER_MODE, "jobs": job_queue.summary(),
+            "admission": admission.snapshot(),
+        }
+
+    state = tts_service.readiness()
+    # lazy: model ilk kitapta yüklenir; yüklenmeden trafik
+    # almazsa hiç yüklenmez. Sadece yükleme hatası 503.
+    if STARTUP_MODE == "lazy":
+        ready = state["model"] != "failed"
+    else:
+        ready = state["model"] == "ready"
+    return JSONResponse(
+        {
+            "ready": ready, "startup_mode": STARTUP_MODE, "worker_mode": WORKER_MODE, **state,
+            "admission": admission.snapshot(),
+        },
+        status_code=200 if ready else 503,
+    )
+
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/")
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, JSON, Text
+from sqlalchemy import Boolean, Column, Integer, String, Float, ForeignKey, DateTime, JSON, Text, Index
 from sqlalchemy.orm import relationship
+from typing import NamedTuple, Optional
 import datetime
 from app.core.database import Base
 
@@ -15,25 +16,75 @@ class Book(Base):
     steps = Column(Integer, default=10)
     status = Column(String, default="pending")
     last_chunk_index = Column(Integer, default=0)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # EPUB içeriğinin sha256’sı; aynı dosyanın tekrar yüklenmesini yakalar
+    content_hash = Column(String, nullable=True, index=True)
+    # Bölüm başlıkları (EPUB içindekiler; Chunk.chapter sırasıyla)
+    chapter_titles = Column(JSON, nullable=True)
+    # Kütüphane listesi bu sırayla döner
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
 
     chunks = relationship("Chunk", back_populates="book", cascade="all, delete-orphan")
 
 
 class Chunk(Base):
     __tablename__ = "chunks"
+    __table_args__ = (
+        # Worker "kitabın şu konumdan sonraki pending chunk’ları"
+        # sorgusunu her pencerede tekrar çalıştırır.
+        Index("ix_chunks_book_status_index", "book_id", "status", "index"),
+        Index("ix_chunks_book_chapter", "book_id", "chapter"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     book_id = Column(String, ForeignKey("books.id"))
     index = Column(Integer)
+    # EPUB içindeki bölüm sırası (0’dan başlar)
+    chapter = Column(Integer, nullable=True)
     text = Column(Text)
     audio_path = Column(String, nullable=True)
 
 
     emotion = Column(String, default="neutral", nullable=False)
+    # Duygu LLM’e soruldu (sonuç "neutral" olsa da) ya da elle
+    # verildi; NULL: henüz analiz edilmedi
+    emotion_analyzed = Column(Boolean, nullable=True)
+
+    # Diyalog atfı: konuşan (NULL: anlatı) ve oyuncu listesinden
+    # çözülen ses (NULL: kitabın sesi, Book.voice_id)
+    speaker = Column(String, nullable=True)
+    voice_id = Column(String, nullable=True)
 
     word_timestamps = Column(JSON, nullable=True)
     duration = Column(Float, nullable=True)
     status = Column(String, default="pending")
+    # "processing" chunk’ı sentezleyen process’in worker id’si
+    # (make_worker_id); ölen worker’ın chunk’ları bununla geri alınır
+    claimed_by = Column(String, nullable=True)
+    # Metin / duygu / sözlük düzenlemesinde artar; altyazı
+    # cache’i ve sürerken düzenlenen sentezler bununla ayırt edilir
+    revision = Column(Integer, default=0)
+
+    book = relationship("Book", back_populates="chunks")
+
+
+class ChunkWork(NamedTuple):
+    """
+    Worker’ın sentezlediği chunk’ın hafif satırı.
+
+    ORM nesnesi değildir: session’ın identity map’ine
+    girmez, commit’te expire / refresh edilmez. Durum
+    değişiklikleri id ile hedeflenmiş UPDATE’lerle yazılır.
+    """
+    id: int
+    index: int
+    chapter: Optional[int]
+    text: str
+    emotion: str
+    emotion_analyzed: Optional[bool]
+    speaker: Optional[str]
+    voice_id: Optional[str]
+    revision: Optional[int]
 
-    book = relationship("Book", back_populates="chunks")
\ No newline at end of file
+    @classmethod
+    def columns(cls):
+        return [getattr(Chunk, name) for name in cls._fields]
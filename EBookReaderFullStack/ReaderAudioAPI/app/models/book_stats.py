@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, String, Float, BigInteger, DateTime
+import datetime
+from app.core.database import Base
+
+
+class BookStats(Base):
+    """
+    Kitap başına özet: chunk sayıları, süre, disk kullanımı.
+
+    Sayılar ve süre chunks üzerindeki trigger’larla aynı
+    transaction’da güncellenir (services/book_stats.py);
+    listeleme chunks tablosunu saymaz. total_duration sadece
+    tamamlanmış chunk’ların süresidir. bytes_on_disk worker
+    tarafından chunk başına artırılır, periyodik storage
+    sweep’inde gerçek değerle düzeltilir.
+    """
+    __tablename__ = "book_stats"
+
+    book_id = Column(String, primary_key=True)
+    total_chunks = Column(Integer, default=0, nullable=False)
+    completed_chunks = Column(Integer, default=0, nullable=False)
+    failed_chunks = Column(Integer, default=0, nullable=False)
+    total_duration = Column(Float, default=0.0, nullable=False)
+    bytes_on_disk = Column(BigInteger, default=0, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, DateTime
+import datetime
+from app.core.database import Base
+
+
+class CastEntry(Base):
+    """
+    Kitabın oyuncu listesi: diyalogda konuşan → ses.
+
+    speaker, diyalog atfının chunk’a yazdığı isimdir
+    (Chunk.speaker). "*" listede olmayan ve konuşanı
+    bulunamayan diyaloglar için varsayılan sestir.
+    Anlatı her zaman kitabın sesiyle (Book.voice_id) okunur.
+    """
+    __tablename__ = "cast_entries"
+
+    book_id = Column(String, primary_key=True)
+    speaker = Column(String, primary_key=True)
+    voice_id = Column(String, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
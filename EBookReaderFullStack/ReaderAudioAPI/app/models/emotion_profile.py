@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime
+import datetime
+from app.core.database import Base
+
+
+class EmotionProfile(Base):
+    """
+    Duygu (ve isteğe bağlı ses) bazlı XTTS sentez ayarları.
+
+    voice_id "*" tüm sesler için varsayılan profildir;
+    belirli bir ses için satır varsa onu ezer.
+
+    top_k / top_p / length_penalty / enable_text_splitting
+    hızı da etkiler: düşük top_k ve kapalı bölme daha hızlı,
+    ama uzun cümlelerde daha az kararlı sentez demektir.
+    """
+    __tablename__ = "emotion_profiles"
+
+    voice_id = Column(String, primary_key=True, default="*")
+    emotion = Column(String, primary_key=True)
+
+    speed = Column(Float, nullable=False, default=1.0)
+    temperature = Column(Float, nullable=False, default=0.9)
+    top_k = Column(Integer, nullable=False, default=50)
+    top_p = Column(Float, nullable=False, default=0.85)
+    repetition_penalty = Column(Float, nullable=False, default=1.1)
+    length_penalty = Column(Float, nullable=False, default=1.0)
+    enable_text_splitting = Column(Boolean, nullable=False, default=True)
+
+    # Chunk sonuna eklenen duraksama (saniye); NULL ise
+    # duygunun varsayılanı (kolon sonradan eklendi)
+    pause = Column(Float, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+import datetime
+from app.core.database import Base
+
+
+class Job(Base):
+    """
+    Kalıcı sentez kuyruğu kaydı.
+
+    kind:
+      book   : kitabın tüm pending chunk’ları (okuyucu konumundan)
+      window : konumdan itibaren PREFETCH_WINDOW chunk (öncelikli)
+
+    status: queued → leased → (silinir) | failed
+    Lease süresi dolan (worker ölmüş) iş tekrar alınabilir.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Worker’ın "sıradaki iş" sorgusu
+        Index("ix_jobs_claim", "status", "priority", "id"),
+        Index("ix_jobs_book_kind_status", "book_id", "kind", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    book_id = Column(String, nullable=False)
+    position = Column(Integer, nullable=True)
+    priority = Column(Integer, default=0, nullable=False)
+
+    status = Column(String, default="queued", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, String, DateTime
+import datetime
+from app.core.database import Base
+
+
+class LexiconEntry(Base):
+    """
+    Kitaba özel telaffuz sözlüğü.
+
+    Chunk metnindeki term, sentezde replacement olarak
+    okunur (ör. "Peeta" → "Pita"). Chunk metni değişmez;
+    altyazı ve arama orijinal yazımı gösterir.
+    Eşleşme tam kelime ve büyük/küçük harf duyarsızdır.
+    """
+    __tablename__ = "lexicon_entries"
+
+    book_id = Column(String, primary_key=True)
+    term = Column(String, primary_key=True)
+    replacement = Column(String, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
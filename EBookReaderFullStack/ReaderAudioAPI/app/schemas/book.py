@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 
 class VoiceStyleSchema(BaseModel):
@@ -12,12 +12,25 @@ class ChunkSchema(BaseModel):
     index: int
     text: str
     status: str
+    emotion: Optional[str] = None
+    speaker: Optional[str] = None
+    voice_id: Optional[str] = None
     duration: Optional[float] = None
     word_timestamps: Optional[List[dict]] = None
 
     class Config:
         from_attributes = True
 
+class ChunkUpdate(BaseModel):
+    text: Optional[str] = Field(None, min_length=1, max_length=2000)
+    emotion: Optional[str] = None
+    # "" chunk’ı anlatıya çevirir (kitabın sesi)
+    speaker: Optional[str] = Field(None, max_length=80)
+
+class CastUpdate(BaseModel):
+    # konuşan → voice_id; None konuşanı listeden çıkarır
+    entries: Dict[str, Optional[str]] = Field(..., min_length=1, max_length=200)
+
 class BookBase(BaseModel):
     title: str
     author: Optional[str] = None
@@ -32,12 +45,20 @@ class BookUpdate(BaseModel):
     status: Optional[str] = None
     last_chunk_index: Optional[int] = None
 
-class BookSchema(BookBase):
+class BookProgress(BaseModel):
+    # book_stats’tan; progress = completed / total
+    total_chunks: int = 0
+    completed_chunks: int = 0
+    failed_chunks: int = 0
+    total_duration: float = 0.0
+    bytes_on_disk: int = 0
+    progress: float = 0.0
+
+class BookSchema(BookBase, BookProgress):
     id: str
     status: str
     last_chunk_index: int
     created_at: datetime
-    total_chunks: Optional[int] = 0
 
     class Config:
         from_attributes = True
@@ -45,7 +66,7 @@ class BookSchema(BookBase):
 class BookWithChunksSchema(BookSchema):
     chunks: List[ChunkSchema] = []
 
-class BookSummary(BaseModel):
+class BookSummary(BookProgress):
     id: str
     title: str
     author: Optional[str] = None
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+class EmotionProfileUpdate(BaseModel):
+    speed: Optional[float] = Field(None, ge=0.5, le=2.0)
+    temperature: Optional[float] = Field(None, gt=0.0, le=2.0)
+    top_k: Optional[int] = Field(None, ge=1, le=200)
+    top_p: Optional[float] = Field(None, gt=0.0, le=1.0)
+    repetition_penalty: Optional[float] = Field(None, ge=1.0, le=20.0)
+    length_penalty: Optional[float] = Field(None, ge=0.0, le=5.0)
+    enable_text_splitting: Optional[bool] = None
+    pause: Optional[float] = Field(None, ge=0.0, le=3.0)
+
+
+class EmotionProfileSchema(BaseModel):
+    voice_id: str
+    emotion: str
+    speed: float
+    temperature: float
+    top_k: int
+    top_p: float
+    repetition_penalty: float
+    length_penalty: float
+    enable_text_splitting: bool
+    pause: float
@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+from typing import Dict, Optional
+
+
+class LexiconUpdate(BaseModel):
+    # term → okunuş; None terimi siler
+    entries: Dict[str, Optional[str]] = Field(..., min_length=1, max_length=500)
+
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List, Union
+
+
+class VoiceSegment(BaseModel):
+    emotion: str = Field(..., min_length=1, max_length=40)
+    # "00:01:37" ya da saniye
+    start: Union[float, str]
+    duration: Union[float, str]
+
+
+class VoiceSegments(BaseModel):
+    segments: List[VoiceSegment] = Field(..., min_length=1, max_length=20)
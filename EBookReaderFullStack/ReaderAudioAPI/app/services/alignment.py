@@ -0,0 +1,120 @@
+import re
+import wave
+from typing import List
+
+import numpy as np
+
+# ======================================================
+# ENERGY / VAD TABANLI KELİME HİZALAMA
+#
+# Model gerektirmez, CPU’da chunk başına birkaç ms sürer.
+#
+# 1) WAV 10 ms’lik frame’lere bölünür, frame enerjisi (dB)
+# 2) Tepe seviyenin SILENCE_DB altı sessizlik sayılır,
+#    kısa boşluklar kapatılır (kelime içi duraksamalar)
+# 3) Kelimeler harf sayılarıyla orantılı olarak sadece
+#    konuşma olan frame’lere yayılır; sessizlikler
+#    (nefes, noktalama duraksaması) kelimeler arasına düşer
+# ======================================================
+
+FRAME_MS = 10
+SILENCE_DB = 35.0
+MIN_GAP_MS = 60
+
+# Kısa kelimeler 0 süreye düşmesin diye her kelimenin
+# harf sayısına sabit bir taban ağırlık eklenir.
+WORD_BASE_WEIGHT = 1.5
+
+_WORD_RE = re.compile(r"\S+")
+
+
+def read_mono_pcm(path: str):
+    """
+    16-bit PCM WAV → float32 mono numpy dizisi ve sample rate.
+    """
+    with wave.open(path, "rb") as wf:
+        rate = wf.getframerate()
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        raw = wf.readframes(wf.getnframes())
+
+    if width != 2:
+        raise ValueError(f"Sadece 16-bit PCM destekleniyor: {path}")
+
+    samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, rate
+
+
+def voiced_frames(samples: np.ndarray, rate: int) -> np.ndarray:
+    """
+    Frame başına konuşma var/yok maskesi (bool dizi).
+    """
+    frame = max(1, int(rate * FRAME_MS / 1000))
+    count = len(samples) // frame
+    if count == 0:
+        return np.zeros(0, dtype=bool)
+
+    frames = samples[: count * frame].reshape(count, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1)) + 1e-9
+    db = 20 * np.log10(rms)
+    voiced = db > max(db.max() - SILENCE_DB, -60.0)
+
+    # Kısa sessizlikleri (kelime içi) kapat
+    max_gap = MIN_GAP_MS // FRAME_MS
+    if voiced.any() and max_gap > 0:
+        idx = np.flatnonzero(voiced)
+        gaps = np.diff(idx) - 1
+        short = (gaps > 0) & (gaps <= max_gap)
+        for start, gap in zip(idx[:-1][short], gaps[short]):
+            voiced[start + 1:start + 1 + gap] = True
+
+    return voiced
+
+
+def align_samples(samples: np.ndarray, rate: int, text: str) -> List[dict]:
+    """
+    Chunk PCM’i (WAV ya da pack’ten okunmuş) ve metni için
+    kelime bazlı zamanlar üretir.
+
+    Dönüş: [{"word": str, "start": float, "end": float}, ...]
+    (saniye, chunk başına göre)
+    """
+    words = _WORD_RE.findall(text)
+    if not words:
+        return []
+
+    total = len(samples) / float(rate) if rate else 0.0
+    frame_sec = FRAME_MS / 1000.0
+
+    voiced = voiced_frames(samples, rate)
+    if not voiced.any():
+        # Hiç konuşma bulunamadı: tüm süreye eşit yay
+        bounds = np.linspace(0.0, total, len(words) + 1)
+        return [
+            {"word": w, "start": round(float(bounds[i]), 3), "end": round(float(bounds[i + 1]), 3)}
+            for i, w in enumerate(words)
+        ]
+
+    weights = np.array(
+        [sum(ch.isalnum() for ch in w) + WORD_BASE_WEIGHT for w in words],
+        dtype=np.float64,
+    )
+    edges = np.concatenate([[0.0], np.cumsum(weights)]) / weights.sum()
+
+    # voiced frame’lerin kümülatif sayısı → hedef konuşma süresini
+    # gerçek zamana çeviren ters fonksiyon
+    voiced_idx = np.flatnonzero(voiced)
+    positions = edges * len(voiced_idx)
+
+    starts = voiced_idx[np.clip(np.floor(positions[:-1]).astype(int), 0, len(voiced_idx) - 1)]
+    ends = voiced_idx[np.clip(np.ceil(positions[1:]).astype(int) - 1, 0, len(voiced_idx) - 1)] + 1
+
+    starts = starts * frame_sec
+    ends = np.minimum(ends * frame_sec, total)
+
+    return [
+        {"word": w, "start": round(float(s), 3), "end": round(float(max(e, s)), 3)}
+        for w, s, e in zip(words, starts, ends)
+    ]
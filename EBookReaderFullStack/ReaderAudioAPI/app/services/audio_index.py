@@ -0,0 +1,340 @@
+import os
+import mmap
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from app.core.database import SessionLocal
+from app.models.book import Chunk
+from app.services.audio_store import audio_store, chunk_audio_path, pack_paths, wav_header
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# KİTAP BAZLI SES İNDEKSİ
+#
+# oas_assets/index/{book_id}.idx
+#
+#   HEADER  : format + tamamlanmış chunk’ların parmak izi
+#   RECORDS : chunk başına sabit boyutlu kayıt
+#             (chunk index, WAV / pack katmanı, PCM
+#              başlangıç byte’ı, PCM byte sayısı, sample
+#              sayısı, kitap içi başlangıç sample’ı)
+#
+# Dosya np.memmap ile açılır; zaman → chunk çözümü
+# start dizisinde binary search (np.searchsorted).
+# Chunk WAV’ları / kitabın pack dosyası mmap ile açılıp
+# istenen aralık kopyalanmadan dilimlenir.
+# ======================================================
+
+INDEX_DIR = os.path.join("oas_assets", "index")
+
+MAGIC = b"RAIX"
+VERSION = 2
+
+HEADER = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("channels", "<u2"),
+    ("sample_rate", "<u4"),
+    ("sampwidth", "<u4"),
+    ("count", "<u4"),
+    ("fingerprint", "S12"),
+])
+
+RECORD = np.dtype([
+    ("index", "<i4"),
+    ("packed", "<u4"),
+    ("data_offset", "<u8"),
+    ("nbytes", "<u8"),
+    ("samples", "<u8"),
+    ("start", "<u8"),
+])
+
+# Worker ayrı process’teyken parmak izi kontrol aralığı (saniye)
+RECHECK_SECONDS = 5.0
+
+# Aralık yanıtı bu boyutta bloklar halinde gönderilir
+STREAM_BLOCK = 256 * 1024
+
+
+def parse_timestamp(value: str) -> float:
+    """
+    "03:12:45", "12:45.5" ya da "11565.2" → saniye
+    """
+    parts = value.strip().split(":")
+    if len(parts) > 3:
+        raise ValueError(value)
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    if seconds < 0:
+        raise ValueError(value)
+    return seconds
+
+
+class BookAudioIndex:
+    """
+    Tek kitabın memmap’lenmiş indeksi.
+    """
+
+    def __init__(self, book_id: str, header, records: np.ndarray):
+        self.book_id = book_id
+        self.channels = int(header["channels"])
+        self.sample_rate = int(header["sample_rate"])
+        self.sampwidth = int(header["sampwidth"])
+        self.fingerprint = header["fingerprint"].decode()
+        self.records = records
+
+    @property
+    def frame_bytes(self) -> int:
+        return self.channels * self.sampwidth
+
+    @property
+    def total_samples(self) -> int:
+        if not len(self.records):
+            return 0
+        last = self.records[-1]
+        return int(last["start"] + last["samples"])
+
+    @property
+    def duration(self) -> float:
+        return self.total_samples / float(self.sample_rate) if self.sample_rate else 0.0
+
+    # -------------------------------------------------
+    # Zaman → (kayıt sırası, chunk içi sample)
+    # -------------------------------------------------
+    def locate(self, seconds: float) -> Tuple[int, int]:
+        sample = min(int(round(seconds * self.sample_rate)), self.total_samples)
+        pos = int(np.searchsorted(self.records["start"], sample, side="right")) - 1
+        pos = max(pos, 0)
+        return pos, sample - int(self.records["start"][pos])
+
+    def seek(self, seconds: float) -> dict:
+        pos, within = self.locate(seconds)
+        record = self.records[pos]
+        return {
+            "index": int(record["index"]),
+            "offset": round(within / float(self.sample_rate), 3),
+            "chunk_start": round(int(record["start"]) / float(self.sample_rate), 3),
+        }
+
+    # -------------------------------------------------
+    # [start, end) aralığının PCM parçaları
+    #
+    # Dönüş: (toplam byte, memoryview üreten generator)
+    # -------------------------------------------------
+    def pcm_range(self, start: float, end: float) -> Tuple[int, Iterator[memoryview]]:
+        if not len(self.records) or end <= start:
+            return 0, iter(())
+
+        first, first_in = self.locate(start)
+        last, last_in = self.locate(end)
+
+        frame = self.frame_bytes
+        spans = []
+        for pos in range(first, last + 1):
+            record = self.records[pos]
+            lo = first_in if pos == first else 0
+            hi = last_in if pos == last else int(record["samples"])
+            if hi > lo:
+                spans.append((
+                    int(record["index"]), bool(record["packed"]), int(record["data_offset"]),
+                    lo * frame, hi * frame,
+                ))
+
+        total = sum(b - a for *_, a, b in spans)
+        return total, self._iter_spans(spans)
+
+    @staticmethod
+    def _map(path: str) -> mmap.mmap:
+        with open(path, "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _iter_spans(self, spans) -> Iterator[memoryview]:
+        pack = None
+        for index, packed, base, a, b in spans:
+            if packed:
+                if pack is None:
+                    pack = self._map(pack_paths(self.book_id)[0])
+                mm = pack
+            else:
+                try:
+                    mm = self._map(chunk_audio_path(self.book_id, index))
+                except FileNotFoundError:
+                    # İndeks kurulduktan sonra WAV pack’e taşınmış olabilir
+                    source = audio_store.locate(self.book_id, index)
+                    if source is None:
+                        raise
+                    mm, base = self._map(source.path), source.offset
+
+            # mmap açıkça kapatılmaz: gönderilen dilimler hâlâ
+            # transport buffer’ında olabilir, son referansla kapanır
+            view = memoryview(mm)
+            for pos in range(base + a, base + b, STREAM_BLOCK):
+                yield view[pos:min(pos + STREAM_BLOCK, base + b)]
+
+    def wav_header(self, nbytes: int) -> bytes:
+        return wav_header(self.channels, self.sample_rate, self.sampwidth, nbytes)
+
+    def write_wav(self, path: str) -> int:
+        """
+        Kitabın tüm sesini tek WAV olarak yazar (yeniden
+        encode yok). Yazılan PCM byte sayısını döner.
+        """
+        nbytes, blocks = self.pcm_range(0.0, self.duration + 1.0)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.wav_header(nbytes))
+            for block in blocks:
+                f.write(block)
+        os.replace(tmp_path, path)
+        return nbytes
+
+
+class AudioIndexStore:
+    """
+    Kitap indekslerinin dosya + bellek cache’i.
+
+    Tamamlanmış chunk’ların parmak izi (sayı, süre
+    toplamı, max id) değişmedikçe indeks yeniden
+    kurulmaz. Aynı process’teki TTS worker chunk
+    bitirdikçe kitabı "stale" işaretler; worker başka
+    process’teyse parmak izi en fazla RECHECK_SECONDS’ta
+    bir kontrol edilir.
+    """
+
+    def __init__(self, index_dir: str = INDEX_DIR):
+        self.index_dir = index_dir
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        self._loaded: Dict[str, BookAudioIndex] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._stale = set()
+        self._lock = threading.Lock()
+
+    def path_for(self, book_id: str) -> str:
+        return os.path.join(self.index_dir, f"{book_id}.idx")
+
+    def mark_stale(self, book_id: str):
+        self._stale.add(book_id)
+
+    def invalidate(self, book_id: str):
+        self._loaded.pop(book_id, None)
+        self._checked_at.pop(book_id, None)
+        self._stale.discard(book_id)
+        try:
+            os.remove(self.path_for(book_id))
+        except OSError:
+            pass
+
+    def _fingerprint(self, db, book_id: str) -> str:
+        count, total, max_id = (
+            db.query(func.count(Chunk.id), func.sum(Chunk.duration), func.max(Chunk.id))
+            .filter(Chunk.book_id == book_id, Chunk.status == "completed")
+            .one()
+        )
+        # Pack tablosu büyüdüyse (WAV → pack taşıması) kayıtlar değişmiştir
+        raw = f"{count}|{(total or 0):.3f}|{max_id}|{audio_store.table_size(book_id)}"
+        return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+    def _load_file(self, book_id: str) -> Optional[BookAudioIndex]:
+        path = self.path_for(book_id)
+        if not os.path.exists(path):
+            return None
+
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if not len(header) or header[0]["magic"] != MAGIC or header[0]["version"] != VERSION:
+            return None
+        header = header[0]
+
+        count = int(header["count"])
+        if count:
+            records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.itemsize, shape=(count,))
+        else:
+            records = np.zeros(0, dtype=RECORD)
+        return BookAudioIndex(book_id, header, records)
+
+    # -------------------------------------------------
+    # Tamamlanmış chunk’ların WAV başlıklarından / pack
+    # tablosundan indeksi kurar ve atomik olarak diske yazar
+    # -------------------------------------------------
+    def _build(self, db, book_id: str, fingerprint: str) -> BookAudioIndex:
+        rows = (
+            db.query(Chunk.index)
+            .filter(Chunk.book_id == book_id, Chunk.status == "completed")
+            .order_by(Chunk.index)
+            .all()
+        )
+
+        records = np.zeros(len(rows), dtype=RECORD)
+        layout = None
+        cursor = 0
+        kept = 0
+
+        for (index,) in rows:
+            source = audio_store.locate(book_id, index)
+            if source is None:
+                logger.warning(f"İndekse alınamadı, ses yok | book={book_id} chunk={index}")
+                continue
+            channels, rate, width = source.channels, source.sample_rate, source.sampwidth
+
+            if layout is None:
+                layout = (channels, rate, width)
+            elif layout != (channels, rate, width):
+                raise ValueError(
+                    f"Farklı ses formatı | chunk={index} {(channels, rate, width)} != {layout}"
+                )
+
+            samples = source.nbytes // (channels * width)
+            records[kept] = (index, source.packed, source.offset, samples * channels * width, samples, cursor)
+            cursor += samples
+            kept += 1
+
+        records = records[:kept]
+        channels, rate, width = layout or (1, 0, 2)
+
+        header = np.zeros(1, dtype=HEADER)
+        header[0] = (MAGIC, VERSION, channels, rate, width, kept, fingerprint.encode())
+
+        path = self.path_for(book_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(records.tobytes())
+        os.replace(tmp_path, path)
+
+        logger.info(f"Ses indeksi kuruldu | book={book_id} | {kept} chunk")
+        return self._load_file(book_id)
+
+    def get(self, book_id: str) -> BookAudioIndex:
+        """
+        Güncel indeksi döner, gerekirse (yeniden) kurar.
+        Bloklayan bir çağrıdır; endpoint’lerden thread’de çağrılır.
+        """
+        index = self._loaded.get(book_id)
+        fresh = time.monotonic() - self._checked_at.get(book_id, 0.0) < RECHECK_SECONDS
+        if index is not None and book_id not in self._stale and fresh:
+            return index
+
+        with self._lock:
+            self._stale.discard(book_id)
+            with SessionLocal() as db:
+                fingerprint = self._fingerprint(db, book_id)
+
+                index = self._loaded.get(book_id) or self._load_file(book_id)
+                if index is None or index.fingerprint != fingerprint:
+                    index = self._build(db, book_id, fingerprint)
+
+            self._loaded[book_id] = index
+            self._checked_at[book_id] = time.monotonic()
+            return index
+
+
+# Global singleton instance
+audio_index = AudioIndexStore()
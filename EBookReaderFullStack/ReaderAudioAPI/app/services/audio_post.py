@@ -0,0 +1,180 @@
+import os
+import wave
+
+import numpy as np
+
+from app.core.constants import TARGET_LUFS
+from app.services.alignment import FRAME_MS, read_mono_pcm, voiced_frames
+
+# ======================================================
+# SENTEZ SONRASI SES İŞLEME
+#
+# tts_to_file çıktısı olduğu gibi birleştirilince
+# duygular / speaker dosyaları arasında ses seviyesi
+# zıplar, baş ve sondaki sessizlikler binlerce chunk’ta
+# birikir. Her chunk WAV’ı sentezden hemen sonra:
+#
+# 1) Baş / son sessizlik kırpılır (VAD, alignment ile aynı)
+# 2) BS.1770 loudness ölçülür, TARGET_LUFS’a getirilir
+#    (tepe -1 dBFS’i geçmeyecek şekilde sınırlanır)
+# 3) Duygu profilindeki uzunlukta sessizlik eklenir
+#    (emotion_profiles "pause")
+#
+# Hepsi NumPy ile vektörel; CPU process pool’da koşar.
+# ======================================================
+
+# Kırpmada konuşmanın iki yanında bırakılan pay
+TRIM_MARGIN_MS = 40
+
+# Tepe sınırı ve izin verilen en büyük kazanç
+PEAK_LIMIT_DBFS = -1.0
+MAX_GAIN_DB = 20.0
+
+# BS.1770 gating
+BLOCK_SEC = 0.4
+BLOCK_STEP_SEC = 0.1
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+
+
+def trim_silence(samples: np.ndarray, rate: int) -> np.ndarray:
+    """
+    Baştaki ve sondaki sessizliği atar. Hiç konuşma
+    bulunamazsa sinyal olduğu gibi döner.
+    """
+    voiced = voiced_frames(samples, rate)
+    if not voiced.any():
+        return samples
+
+    frame = max(1, int(rate * FRAME_MS / 1000))
+    margin = int(rate * TRIM_MARGIN_MS / 1000)
+
+    idx = np.flatnonzero(voiced)
+    start = max(0, idx[0] * frame - margin)
+    end = min(len(samples), (idx[-1] + 1) * frame + margin)
+    return samples[start:end]
+
+
+def _k_weighting_gain(rate: int, n: int) -> np.ndarray:
+    """
+    K-weighting filtresinin (high-shelf + high-pass biquad)
+    rfft bin’lerindeki güç kazancı |H(f)|².
+    """
+    w = np.linspace(0.0, np.pi, n // 2 + 1)
+    z1 = np.exp(-1j * w)
+    z2 = z1 * z1
+
+    # Stage 1: high shelf (+4 dB, 1500 Hz)
+    a_gain = 10 ** (4.0 / 40)
+    w0 = 2 * np.pi * 1500.0 / rate
+    alpha = np.sin(w0) / (2 * (1 / np.sqrt(2)))
+    cos0 = np.cos(w0)
+    root = 2 * np.sqrt(a_gain) * alpha
+    shelf = (
+        a_gain * ((a_gain + 1) + (a_gain - 1) * cos0 + root)
+        - 2 * a_gain * ((a_gain - 1) + (a_gain + 1) * cos0) * z1
+        + a_gain * ((a_gain + 1) + (a_gain - 1) * cos0 - root) * z2
+    ) / (
+        ((a_gain + 1) - (a_gain - 1) * cos0 + root)
+        + 2 * ((a_gain - 1) - (a_gain + 1) * cos0) * z1
+        + ((a_gain + 1) - (a_gain - 1) * cos0 - root) * z2
+    )
+
+    # Stage 2: high pass (38 Hz)
+    w0 = 2 * np.pi * 38.0 / rate
+    alpha = np.sin(w0) / (2 * 0.5)
+    cos0 = np.cos(w0)
+    highpass = (
+        (1 + cos0) / 2 * (1 - 2 * z1 + z2)
+    ) / (
+        (1 + alpha) - 2 * cos0 * z1 + (1 - alpha) * z2
+    )
+
+    return np.abs(shelf * highpass) ** 2
+
+
+def integrated_loudness(samples: np.ndarray, rate: int) -> float | None:
+    """
+    ITU-R BS.1770 integrated loudness (LUFS), mono.
+
+    K-weighting frekans domeninde uygulanır; 400 ms’lik
+    bloklar kümülatif toplam ile tek seferde hesaplanır.
+    Ölçülebilir konuşma yoksa None döner.
+    """
+    n = len(samples)
+    if n == 0:
+        return None
+
+    spectrum = np.fft.rfft(samples) * np.sqrt(_k_weighting_gain(rate, n))
+    weighted = np.fft.irfft(spectrum, n)
+
+    block = int(BLOCK_SEC * rate)
+    step = int(BLOCK_STEP_SEC * rate)
+    energy = np.concatenate([[0.0], np.cumsum(weighted.astype(np.float64) ** 2)])
+
+    if n < block:
+        powers = np.array([energy[-1] / n])
+    else:
+        starts = np.arange(0, n - block + 1, step)
+        powers = (energy[starts + block] - energy[starts]) / block
+
+    with np.errstate(divide="ignore"):
+        loudness = -0.691 + 10 * np.log10(powers)
+
+    gated = powers[loudness > ABSOLUTE_GATE_LUFS]
+    if gated.size == 0:
+        return None
+
+    threshold = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE_LU
+    with np.errstate(divide="ignore"):
+        gated = gated[-0.691 + 10 * np.log10(gated) > threshold]
+    if gated.size == 0:
+        return None
+
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+
+def normalize_loudness(samples: np.ndarray, rate: int, target: float = TARGET_LUFS) -> np.ndarray:
+    loudness = integrated_loudness(samples, rate)
+    if loudness is None:
+        return samples
+
+    gain_db = float(np.clip(target - loudness, -MAX_GAIN_DB, MAX_GAIN_DB))
+    gain = 10 ** (gain_db / 20)
+
+    # Kazanç tepeyi sınırın üstüne çıkarıyorsa geri çekilir
+    peak = float(np.abs(samples).max()) * gain
+    limit = 10 ** (PEAK_LIMIT_DBFS / 20)
+    if peak > limit:
+        gain *= limit / peak
+
+    return samples * gain
+
+
+def write_mono_pcm(path: str, samples: np.ndarray, rate: int):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with wave.open(tmp_path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm.tobytes())
+    os.replace(tmp_path, path)
+
+
+def postprocess_wav(path: str, pause: float) -> float:
+    """
+    Chunk WAV’ını yerinde işler: kırpma → loudness → duraksama
+    (pause saniye). Yeni süreyi (saniye) döner; Chunk.duration
+    buna göre yazılır.
+    """
+    samples, rate = read_mono_pcm(path)
+
+    samples = trim_silence(samples, rate)
+    samples = normalize_loudness(samples, rate)
+
+    samples = np.concatenate([samples, np.zeros(int(pause * rate), dtype=samples.dtype)])
+
+    write_mono_pcm(path, samples, rate)
+    return len(samples) / float(rate)
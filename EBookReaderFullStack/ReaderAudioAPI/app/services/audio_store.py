@@ -0,0 +1,363 @@
+import os
+import struct
+import zlib
+import logging
+import threading
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.core.database import SessionLocal
+from app.models.book import Chunk
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# CHUNK SES DEPOLAMASI (iki katman)
+#
+# Sıcak katman: oas_assets/audio/{book_id}_{index}.wav
+#   Sentez, post-process ve hizalama bu dosyada çalışır.
+#
+# Soğuk katman: oas_assets/packs/{book_id}.pack + .pidx
+#   Hizalama bitince chunk’ın PCM’i kitabın tek pack
+#   dosyasına eklenir (append-only) ve WAV silinir.
+#   .pidx sabit boyutlu kayıtlardan oluşan offset
+#   tablosudur (chunk, format, crc32, offset, boyut).
+#   Aynı chunk tekrar sentezlenirse yeni kayıt eklenir;
+#   tablodaki son kayıt geçerlidir.
+#
+# Ekleme O_APPEND ile tek write çağrısıdır: aynı kitaba
+# birden fazla worker process’i kilitsiz yazabilir.
+# Sıra: PCM → fsync → tablo kaydı → fsync → WAV silinir;
+# çökme olursa en kötü ihtimalle WAV ya da tabloda
+# karşılığı olmayan PCM kalır.
+#
+# Okuyucular (endpoint’ler, ses indeksi, hizalama) chunk’ı
+# önce sıcak katmanda, yoksa pack’te arar.
+# ======================================================
+
+AUDIO_DIR = os.path.join("oas_assets", "audio")
+PACK_DIR = os.path.join("oas_assets", "packs")
+
+PACK_RECORD = np.dtype([
+    ("index", "<i4"),
+    ("channels", "<u2"),
+    ("sampwidth", "<u2"),
+    ("sample_rate", "<u4"),
+    ("crc32", "<u4"),
+    ("offset", "<u8"),
+    ("nbytes", "<u8"),
+])
+
+
+class ChunkAudio(NamedTuple):
+    path: str
+    offset: int
+    nbytes: int
+    channels: int
+    sample_rate: int
+    sampwidth: int
+    packed: bool
+    crc32: int = 0
+
+
+def chunk_audio_path(book_id: str, index: int) -> str:
+    return os.path.join(AUDIO_DIR, f"{book_id}_{index}.wav")
+
+
+def pack_paths(book_id: str, pack_dir: str = PACK_DIR) -> Tuple[str, str]:
+    base = os.path.join(pack_dir, book_id)
+    return f"{base}.pack", f"{base}.pidx"
+
+
+# -------------------------------------------------
+# WAV başlığını okur (RIFF chunk’ları, sadece header)
+#
+# Dönüş: (channels, sample_rate, sampwidth,
+#         data_offset, data_nbytes)
+# -------------------------------------------------
+def read_wav_layout(path: str) -> Tuple[int, int, int, int, int]:
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"WAV değil: {path}")
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"data chunk bulunamadı: {path}")
+            chunk_id, size = struct.unpack("<4sI", header)
+
+            if chunk_id == b"fmt ":
+                body = f.read(size)
+                _, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                fmt = (channels, rate, bits // 8)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"fmt chunk eksik: {path}")
+                offset = f.tell()
+                # Yarım yazılmış dosyada size gerçek boyutu aşabilir
+                nbytes = min(size, os.fstat(f.fileno()).st_size - offset)
+                return (*fmt, offset, nbytes)
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def wav_header(channels: int, sample_rate: int, sampwidth: int, nbytes: int) -> bytes:
+    frame = channels * sampwidth
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + nbytes, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate,
+        sample_rate * frame, frame, sampwidth * 8,
+        b"data", nbytes,
+    )
+
+
+def _write_all(fd: int, data) -> int:
+    """
+    O_APPEND fd’ye yazar, yazılan bloğun başlangıç offset’ini döner.
+    """
+    view = memoryview(data)
+    written = os.write(fd, view)
+    end = os.lseek(fd, 0, os.SEEK_CUR)
+    start = end - written
+    if written < len(view):
+        # Kısmi yazma (disk dolu vb.): blok bütünlüğü bozulur
+        raise OSError(f"Kısmi yazma: {written}/{len(view)} byte")
+    return start
+
+
+class AudioStore:
+    """
+    Chunk sesinin sıcak (WAV) / soğuk (pack) katmanları.
+    """
+
+    def __init__(self, audio_dir: str = AUDIO_DIR, pack_dir: str = PACK_DIR):
+        self.audio_dir = audio_dir
+        self.pack_dir = pack_dir
+        os.makedirs(self.pack_dir, exist_ok=True)
+
+        # book_id -> (tablo dosyası damgası, {index: ChunkAudio})
+        self._tables: Dict[str, Tuple[tuple, Dict[int, ChunkAudio]]] = {}
+        self._lock = threading.Lock()
+
+    def loose_path(self, book_id: str, index: int) -> str:
+        return os.path.join(self.audio_dir, f"{book_id}_{index}.wav")
+
+    def table_size(self, book_id: str) -> int:
+        try:
+            return os.stat(pack_paths(book_id, self.pack_dir)[1]).st_size
+        except OSError:
+            return 0
+
+    def _table_stamp(self, book_id: str) -> tuple:
+        """
+        (boyut, mtime_ns, inode): başka process’in repack’i
+        tabloyu aynı boyutta yeniden yazsa da (os.replace →
+        yeni inode) değişir.
+        """
+        try:
+            st = os.stat(pack_paths(book_id, self.pack_dir)[1])
+        except OSError:
+            return (0, 0, 0)
+        return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+    def forget(self, book_id: str):
+        self._tables.pop(book_id, None)
+
+    # -------------------------------------------------
+    # Pack offset tablosu (index → son kayıt)
+    #
+    # Dosya damgası değişmedikçe cache’ten.
+    # -------------------------------------------------
+    def _table(self, book_id: str) -> Dict[int, ChunkAudio]:
+        stamp = self._table_stamp(book_id)
+        size = stamp[0]
+        cached = self._tables.get(book_id)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        data_path, table_path = pack_paths(book_id, self.pack_dir)
+        entries: Dict[int, ChunkAudio] = {}
+        if size:
+            # Yarım yazılmış son kayıt yok sayılır
+            count = size // PACK_RECORD.itemsize
+            records = np.fromfile(table_path, dtype=PACK_RECORD, count=count)
+            for row in records:
+                entries[int(row["index"])] = ChunkAudio(
+                    data_path, int(row["offset"]), int(row["nbytes"]),
+                    int(row["channels"]), int(row["sample_rate"]), int(row["sampwidth"]),
+                    True, int(row["crc32"]),
+                )
+
+        self._tables[book_id] = (stamp, entries)
+        return entries
+
+    def packed_chunks(self, book_id: str) -> Dict[int, ChunkAudio]:
+        return self._table(book_id)
+
+    # -------------------------------------------------
+    # Chunk sesi nerede? WAV → pack → None
+    # -------------------------------------------------
+    def locate(self, book_id: str, index: int) -> Optional[ChunkAudio]:
+        path = self.loose_path(book_id, index)
+        try:
+            channels, rate, width, offset, nbytes = read_wav_layout(path)
+            return ChunkAudio(path, offset, nbytes, channels, rate, width, False)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Chunk WAV okunamadı: {path} | {e}")
+
+        return self._table(book_id).get(index)
+
+    def read(self, book_id: str, index: int) -> Tuple[Optional[ChunkAudio], bytes]:
+        """
+        (konum, PCM byte’ları). WAV okunurken pack’e taşınmış
+        olabilir; bir kez yeniden aranır.
+        """
+        for attempt in range(2):
+            source = self.locate(book_id, index)
+            if source is None:
+                return None, b""
+            try:
+                with open(source.path, "rb") as f:
+                    f.seek(source.offset)
+                    pcm = f.read(source.nbytes)
+            except FileNotFoundError:
+                continue
+
+            if source.packed and zlib.crc32(pcm) != source.crc32:
+                # Tablo okunurken repack edilmiş olabilir:
+                # cache bırakılıp bir kez yeniden aranır
+                self.forget(book_id)
+                if attempt == 0:
+                    continue
+                raise ValueError(f"Pack CRC hatası | book={book_id} chunk={index}")
+            return source, pcm
+        return None, b""
+
+    def wav_bytes(self, book_id: str, index: int) -> Optional[bytes]:
+        source, pcm = self.read(book_id, index)
+        if source is None:
+            return None
+        return wav_header(source.channels, source.sample_rate, source.sampwidth, len(pcm)) + pcm
+
+    def read_samples(self, book_id: str, index: int) -> Tuple[np.ndarray, int]:
+        """
+        16-bit PCM → float32 mono numpy dizisi ve sample rate.
+        """
+        source, pcm = self.read(book_id, index)
+        if source is None:
+            raise FileNotFoundError(f"Chunk sesi yok | book={book_id} chunk={index}")
+        if source.sampwidth != 2:
+            raise ValueError(f"Sadece 16-bit PCM destekleniyor | chunk={index}")
+
+        samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        if source.channels > 1:
+            samples = samples.reshape(-1, source.channels).mean(axis=1)
+        return samples, source.sample_rate
+
+    # -------------------------------------------------
+    # WAV → pack (append) → WAV silinir
+    # -------------------------------------------------
+    def pack_chunk(self, book_id: str, index: int) -> bool:
+        path = self.loose_path(book_id, index)
+        try:
+            channels, rate, width, offset, nbytes = read_wav_layout(path)
+            with open(path, "rb") as f:
+                f.seek(offset)
+                pcm = f.read(nbytes)
+        except FileNotFoundError:
+            return False
+
+        data_path, table_path = pack_paths(book_id, self.pack_dir)
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+        fd = os.open(data_path, flags, 0o644)
+        try:
+            start = _write_all(fd, pcm)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        record = np.zeros(1, dtype=PACK_RECORD)
+        record[0] = (index, channels, width, rate, zlib.crc32(pcm), start, len(pcm))
+
+        fd = os.open(table_path, flags, 0o644)
+        try:
+            _write_all(fd, record.tobytes())
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        os.remove(path)
+        return True
+
+    def pack_book(self, book_id: str) -> Dict[str, int]:
+        """
+        Tamamlanmış chunk’ların kalan WAV’larını pack’e taşır
+        (eski kitaplar / yarıda kalan taşımalar için).
+        """
+        with SessionLocal() as db:
+            indexes = [
+                index for (index,) in db.query(Chunk.index)
+                .filter(Chunk.book_id == book_id, Chunk.status == "completed")
+                .order_by(Chunk.index)
+            ]
+
+        packed = 0
+        for index in indexes:
+            try:
+                packed += self.pack_chunk(book_id, index)
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"Pack’e taşınamadı | book={book_id} chunk={index} | {e}")
+
+        if packed:
+            logger.info(f"Pack’e taşındı | book={book_id} | {packed} chunk")
+        return {"packed": packed, "chunks": len(indexes)}
+
+    # -------------------------------------------------
+    # Geçersiz kalmış kayıtları (tekrar sentezlenen
+    # chunk’ların eski sesi) atarak pack’i yeniden yazar.
+    #
+    # Kitaba yazan bir worker yokken çağrılmalıdır.
+    # -------------------------------------------------
+    def repack(self, book_id: str) -> Dict[str, int]:
+        with self._lock:
+            data_path, table_path = pack_paths(book_id, self.pack_dir)
+            entries = self._table(book_id)
+            if not entries:
+                return {"records": 0, "freed": 0}
+
+            old_size = os.path.getsize(data_path)
+            tmp_data, tmp_table = f"{data_path}.{os.getpid()}.tmp", f"{table_path}.{os.getpid()}.tmp"
+            records = np.zeros(len(entries), dtype=PACK_RECORD)
+
+            with open(data_path, "rb") as src, open(tmp_data, "wb") as dst:
+                for i, (index, entry) in enumerate(sorted(entries.items())):
+                    src.seek(entry.offset)
+                    start = dst.tell()
+                    dst.write(src.read(entry.nbytes))
+                    records[i] = (
+                        index, entry.channels, entry.sampwidth, entry.sample_rate,
+                        entry.crc32, start, entry.nbytes,
+                    )
+                dst.flush()
+                os.fsync(dst.fileno())
+
+            records.tofile(tmp_table)
+
+            # Önce veri, sonra tablo: arada okuyan eski tabloyla
+            # yeni veriyi görebilir, CRC kontrolü bunu yakalar
+            os.replace(tmp_data, data_path)
+            os.replace(tmp_table, table_path)
+            self.forget(book_id)
+
+            return {"records": len(entries), "freed": old_size - int(records["nbytes"].sum())}
+
+
+# Global singleton instance
+audio_store = AudioStore()
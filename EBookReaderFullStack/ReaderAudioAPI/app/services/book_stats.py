@@ -0,0 +1,221 @@
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import case, func, literal, text, update
+
+from app.core.database import IS_SQLITE, engine
+from app.models.book import Book, Chunk
+from app.models.book_stats import BookStats
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# KİTAP İSTATİSTİKLERİ (book_stats)
+#
+# Listeleme ve kitap detayı her istekte chunks tablosunu
+# saymaz; kitap başına tek satır okunur.
+#
+# SQLite’ta satır chunks üzerindeki trigger’larla, değişikliği
+# yapan transaction içinde güncellenir (arama indeksi
+# gibi): parser’ın INSERT’leri, aynı EPUB kopyalama
+# (INSERT ... SELECT), worker’ın durum / süre UPDATE’leri,
+# düzenlemelerin toplu "pending"e çekmesi ve silme ayrı
+# kod gerektirmez. Trigger sadece status / duration
+# değişince çalışır; metin, kelime zamanı, duygu
+# güncellemeleri satıra dokunmaz.
+#
+# bytes_on_disk dosya sisteminde olduğu için trigger’la
+# izlenemez: worker her chunk’ta WAV boyutunu ekler,
+# storage sweep taradığı gerçek değeri yazar (tekrar
+# sentezlenen chunk’lar arada fazla sayılabilir).
+#
+# Diğer veritabanlarında (DATABASE_URL) trigger kurulmaz;
+# sorgular aynı kolonları chunks üzerinde GROUP BY ile
+# hesaplar.
+# ======================================================
+
+STATS_TABLE = BookStats.__tablename__
+
+STAT_COLUMNS = (
+    "total_chunks", "completed_chunks", "failed_chunks", "total_duration", "bytes_on_disk",
+)
+
+_COMPLETED = "(CASE WHEN {row}.status = 'completed' THEN 1 ELSE 0 END)"
+_FAILED = "(CASE WHEN {row}.status = 'failed' THEN 1 ELSE 0 END)"
+_DURATION = "(CASE WHEN {row}.status = 'completed' THEN COALESCE({row}.duration, 0) ELSE 0 END)"
+
+
+def _delta(sign: str, row: str) -> str:
+    return (
+        f"completed_chunks = completed_chunks {sign} {_COMPLETED.format(row=row)}, "
+        f"failed_chunks = failed_chunks {sign} {_FAILED.format(row=row)}, "
+        f"total_duration = total_duration {sign} {_DURATION.format(row=row)}"
+    )
+
+
+STATS_DDL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chunks_stats_insert AFTER INSERT ON chunks BEGIN
+        INSERT OR IGNORE INTO {STATS_TABLE}
+            (book_id, total_chunks, completed_chunks, failed_chunks, total_duration, bytes_on_disk)
+            VALUES (new.book_id, 0, 0, 0, 0, 0);
+        UPDATE {STATS_TABLE} SET
+            total_chunks = total_chunks + 1, {_delta("+", "new")},
+            updated_at = CURRENT_TIMESTAMP
+        WHERE book_id = new.book_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chunks_stats_update AFTER UPDATE OF status, duration ON chunks
+    WHEN old.status IS NOT new.status OR old.duration IS NOT new.duration BEGIN
+        UPDATE {STATS_TABLE} SET
+            {_delta("-", "old")},
+            updated_at = CURRENT_TIMESTAMP
+        WHERE book_id = old.book_id;
+        UPDATE {STATS_TABLE} SET {_delta("+", "new")}
+        WHERE book_id = new.book_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chunks_stats_delete AFTER DELETE ON chunks BEGIN
+        UPDATE {STATS_TABLE} SET
+            total_chunks = total_chunks - 1, {_delta("-", "old")},
+            updated_at = CURRENT_TIMESTAMP
+        WHERE book_id = old.book_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS books_stats_delete AFTER DELETE ON books BEGIN
+        DELETE FROM {STATS_TABLE} WHERE book_id = old.id;
+    END
+    """,
+)
+
+# Trigger’lardan önceki chunk’lar için satır (açılışta
+# bir kere; satırı olan kitaplara dokunmaz)
+BACKFILL_SQL = f"""
+    INSERT INTO {STATS_TABLE}
+        (book_id, total_chunks, completed_chunks, failed_chunks, total_duration, bytes_on_disk, updated_at)
+    SELECT c.book_id, COUNT(*), SUM({_COMPLETED.format(row="c")}), SUM({_FAILED.format(row="c")}),
+           SUM({_DURATION.format(row="c")}), 0, CURRENT_TIMESTAMP
+    FROM chunks AS c
+    WHERE c.book_id IS NOT NULL
+      AND NOT EXISTS (SELECT 1 FROM {STATS_TABLE} AS s WHERE s.book_id = c.book_id)
+    GROUP BY c.book_id
+"""
+
+
+def ensure_stats():
+    """
+    Trigger’ları kurar; satırı olmayan kitapları doldurur.
+    """
+    if not IS_SQLITE:
+        return
+
+    with engine.begin() as conn:
+        for statement in STATS_DDL:
+            conn.execute(text(statement))
+        filled = conn.execute(text(BACKFILL_SQL)).rowcount
+    if filled:
+        logger.info(f"Kitap istatistikleri dolduruldu | {filled} kitap")
+
+
+def _aggregate():
+    """
+    Trigger olmayan veritabanında book_stats yerine geçen
+    GROUP BY alt sorgusu (aynı kolon adları).
+    """
+    completed = Chunk.status == "completed"
+    return (
+        Chunk.__table__.select()
+        .with_only_columns(
+            Chunk.book_id.label("book_id"),
+            func.count(Chunk.id).label("total_chunks"),
+            func.sum(case((completed, 1), else_=0)).label("completed_chunks"),
+            func.sum(case((Chunk.status == "failed", 1), else_=0)).label("failed_chunks"),
+            func.sum(case((completed, func.coalesce(Chunk.duration, 0.0)), else_=0.0)).label("total_duration"),
+            literal(0).label("bytes_on_disk"),
+        )
+        .group_by(Chunk.book_id)
+        .subquery()
+    )
+
+
+def progress(stats: Optional[Dict]) -> Dict:
+    """
+    Satır (ya da None: henüz chunk’ı yok) → API alanları.
+    """
+    stats = stats or {}
+    total = stats.get("total_chunks") or 0
+    completed = stats.get("completed_chunks") or 0
+    return {
+        "total_chunks": total,
+        "completed_chunks": completed,
+        "failed_chunks": stats.get("failed_chunks") or 0,
+        "total_duration": round(stats.get("total_duration") or 0.0, 3),
+        "bytes_on_disk": stats.get("bytes_on_disk") or 0,
+        "progress": round(completed / total, 4) if total else 0.0,
+    }
+
+
+class BookStatsService:
+    """
+    book_stats okuma + trigger’ın göremediği disk kullanımı.
+    """
+
+    def __init__(self, triggers: bool = IS_SQLITE):
+        self.triggers = triggers
+
+    def _source(self):
+        return BookStats.__table__ if self.triggers else _aggregate()
+
+    # -------------------------------------------------
+    # Tüm kitaplar + istatistikleri, tek sorgu
+    # (books ⟕ book_stats, birincil anahtar üzerinden)
+    # -------------------------------------------------
+    def listing(self, db):
+        source = self._source()
+        return (
+            db.query(Book, *(source.c[name] for name in STAT_COLUMNS))
+            .outerjoin(source, source.c.book_id == Book.id)
+            .order_by(Book.created_at.desc())
+            .all()
+        )
+
+    def get(self, db, book_id: str) -> Dict:
+        source = self._source()
+        row = (
+            db.query(*(source.c[name] for name in STAT_COLUMNS))
+            .filter(source.c.book_id == book_id)
+            .first()
+        )
+        return progress(row._asdict() if row else None)
+
+    # -------------------------------------------------
+    # Worker: yeni chunk WAV’ı (commit çağıran tarafta)
+    # -------------------------------------------------
+    def add_bytes(self, db, book_id: str, size: int):
+        if self.triggers and size:
+            db.execute(
+                update(BookStats)
+                .where(BookStats.book_id == book_id)
+                .values(bytes_on_disk=BookStats.bytes_on_disk + size)
+            )
+
+    # -------------------------------------------------
+    # Storage sweep: taranan gerçek kullanım
+    # usage: {book_id: bytes}; listede olmayan kitap 0
+    # -------------------------------------------------
+    def set_bytes(self, db, usage: Dict[str, int]):
+        if not self.triggers:
+            return
+        # Aynı transaction: okuyanlar arada 0 görmez (WAL)
+        db.execute(update(BookStats).values(bytes_on_disk=0))
+        rows = [{"book_id": book_id, "bytes_on_disk": size} for book_id, size in usage.items()]
+        if rows:
+            db.execute(update(BookStats), rows)
+        db.commit()
+
+
+# Global singleton instance
+book_stats = BookStatsService()
@@ -0,0 +1,223 @@
+import datetime
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import func, null
+
+from app.models.book import Chunk
+from app.models.cast import CastEntry
+from app.models.lexicon import LexiconEntry
+from app.services.audio_index import audio_index
+from app.services.dialogue import dialogue_service, voice_for
+from app.services.job_queue import job_queue
+from app.services.lexicon import chunk_terms, compile_terms, lexicon, normalize_term
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# CHUNK DÜZENLEME + ARTIMLI YENİDEN SENTEZ
+#
+# Metin, duygu, konuşan, sözlük ya da oyuncu listesi
+# düzenlemesi sadece etkilenen
+# chunk’ları tek toplu UPDATE ile "pending" yapar
+# (revision +1, kelime zamanları silinir) ve kitabı
+# kuyruğa ekler; worker kitabın geri kalanına dokunmaz.
+#
+# Türetilmiş çıktılar:
+# - Ses indeksi: tamamlanmış chunk parmak izi değişir,
+#   indeks WAV başlıkları / pack tablosundan yeniden kurulur
+# - Altyazı cache’i: aralık parmak izinde revision toplamı
+#   var; sadece düzenlenen chunk’ı içeren aralıklar
+#   (bölüm / kitap) yeniden üretilir
+# - Video: ses indeksi + altyazı parmak izine göre
+#   cache’lenir, sadece değiştiyse yeniden render edilir
+# - Pack: yeni ses eklenir, eski kayıt repack’e kadar kalır
+# ======================================================
+
+# IN (...) listesi bu boyutta parçalanır
+UPDATE_BATCH = 500
+
+
+def mark_for_resynthesis(db, book_id: str, indexes: Iterable[int], **values) -> int:
+    """
+    Chunk’ları yeniden sentez için işaretler. values
+    (text, emotion, speaker, voice_id) aynı UPDATE’te yazılır.
+    """
+    indexes = sorted({int(index) for index in indexes})
+    marked = 0
+    for start in range(0, len(indexes), UPDATE_BATCH):
+        marked += db.query(Chunk).filter(
+            Chunk.book_id == book_id,
+            Chunk.index.in_(indexes[start:start + UPDATE_BATCH]),
+        ).update(
+            {
+                "status": "pending",
+                "word_timestamps": null(),
+                "revision": func.coalesce(Chunk.revision, 0) + 1,
+                **values,
+            },
+            synchronize_session=False,
+        )
+    db.commit()
+
+    if marked:
+        chunk_terms.note_revisions(book_id, marked)
+        audio_index.mark_stale(book_id)
+        job_queue.enqueue_book(book_id)
+        logger.info(f"Yeniden sentez | book={book_id} | {marked} chunk")
+    return marked
+
+
+# -------------------------------------------------
+# Tek chunk’ın metni / duygusu / konuşanı
+#
+# speaker "" chunk’ı anlatıya çevirir; ses oyuncu
+# listesinden yeniden çözülür.
+# Dönüş: None (chunk yok) ya da değişen alanlar
+# -------------------------------------------------
+def edit_chunk(
+    db, book_id: str, index: int,
+    text: Optional[str] = None, emotion: Optional[str] = None,
+    speaker: Optional[str] = None,
+) -> Optional[dict]:
+    row = (
+        db.query(Chunk.text, Chunk.emotion, Chunk.speaker, Chunk.voice_id)
+        .filter(Chunk.book_id == book_id, Chunk.index == index)
+        .first()
+    )
+    if row is None:
+        return None
+
+    changes = {}
+    if text is not None:
+        text = " ".join(text.split())
+        if not text:
+            raise ValueError("Chunk metni boş olamaz")
+        if text != row.text:
+            changes["text"] = text
+    if emotion is not None and emotion != row.emotion:
+        changes["emotion"] = emotion
+    if speaker is not None:
+        speaker = " ".join(speaker.split()) or None
+        if speaker != row.speaker:
+            changes["speaker"] = speaker
+            voice_id = voice_for(dialogue_service.cast(db, book_id), speaker)
+            if voice_id != row.voice_id:
+                changes["voice_id"] = voice_id
+
+    if set(changes) == {"speaker"}:
+        # Ses aynı kaldı (oyuncu listesinde karşılığı yok):
+        # sadece atıf düzeltilir, yeniden sentez gerekmez
+        db.query(Chunk).filter(Chunk.book_id == book_id, Chunk.index == index).update(
+            changes, synchronize_session=False
+        )
+        db.commit()
+    elif changes:
+        # Elle verilen duygu LLM’e bırakılmaz; yeni metnin
+        # duygusu (hâlâ neutral ise) tekrar analiz edilir
+        analyzed = {}
+        if "emotion" in changes:
+            analyzed["emotion_analyzed"] = True
+        elif "text" in changes:
+            analyzed["emotion_analyzed"] = None
+        mark_for_resynthesis(db, book_id, [index], **changes, **analyzed)
+        if "text" in changes:
+            chunk_terms.update_chunk(book_id, index, row.text, text)
+    return changes
+
+
+# -------------------------------------------------
+# Terimlerden birini içeren chunk’lar
+#
+# Ters indeksten adaylar, ardından sentezdeki regex’le
+# doğrulama (sadece aday satırların metni okunur).
+# -------------------------------------------------
+def affected_chunks(db, book_id: str, terms: Iterable[str]) -> List[int]:
+    terms = list(terms)
+    pattern = compile_terms(terms)
+    if pattern is None:
+        return []
+
+    candidates = np.unique(np.concatenate(
+        [chunk_terms.candidates(db, book_id, term) for term in terms]
+    )).tolist()
+
+    affected = []
+    for start in range(0, len(candidates), UPDATE_BATCH):
+        rows = db.query(Chunk.index, Chunk.text).filter(
+            Chunk.book_id == book_id,
+            Chunk.index.in_(candidates[start:start + UPDATE_BATCH]),
+        )
+        affected.extend(index for index, text in rows if pattern.search(text or ""))
+    return sorted(affected)
+
+
+# -------------------------------------------------
+# Sözlük düzenlemesi: {term: replacement | None (sil)}
+#
+# Sadece gerçekten değişen terimlerin chunk’ları
+# yeniden sentezlenir.
+# -------------------------------------------------
+def update_lexicon(db, book_id: str, changes: Dict[str, Optional[str]]) -> dict:
+    current = lexicon.entries(db, book_id)
+    now = datetime.datetime.utcnow()
+
+    updated, deleted = [], []
+    for term, replacement in changes.items():
+        term = normalize_term(term)
+        replacement = " ".join(replacement.split()) if replacement else None
+        if not term or current.get(term) == replacement:
+            continue
+
+        if replacement is None:
+            db.query(LexiconEntry).filter(
+                LexiconEntry.book_id == book_id, LexiconEntry.term == term
+            ).delete(synchronize_session=False)
+            deleted.append(term)
+        else:
+            db.merge(LexiconEntry(book_id=book_id, term=term, replacement=replacement, updated_at=now))
+            updated.append(term)
+    db.commit()
+
+    indexes = affected_chunks(db, book_id, updated + deleted)
+    mark_for_resynthesis(db, book_id, indexes)
+    return {"updated": updated, "deleted": deleted, "chunks": len(indexes)}
+
+
+# -------------------------------------------------
+# Oyuncu listesi düzenlemesi: {speaker: voice | None (sil)}
+#
+# Sesi değişen diyalog chunk’ları yeniden sentezlenir;
+# aynı sese düşenler tek toplu UPDATE.
+# -------------------------------------------------
+def update_cast(db, book_id: str, changes: Dict[str, Optional[str]]) -> dict:
+    now = datetime.datetime.utcnow()
+    for speaker, voice_id in changes.items():
+        speaker = " ".join(speaker.split())
+        if not speaker:
+            continue
+        if voice_id is None:
+            db.query(CastEntry).filter(
+                CastEntry.book_id == book_id, CastEntry.speaker == speaker
+            ).delete(synchronize_session=False)
+        else:
+            db.merge(CastEntry(book_id=book_id, speaker=speaker, voice_id=voice_id, updated_at=now))
+    db.commit()
+
+    cast = dialogue_service.cast(db, book_id)
+    moved: Dict[Optional[str], List[int]] = {}
+    rows = (
+        db.query(Chunk.index, Chunk.speaker, Chunk.voice_id)
+        .filter(Chunk.book_id == book_id, Chunk.speaker.isnot(None))
+    )
+    for index, speaker, current in rows:
+        voice_id = voice_for(cast, speaker)
+        if voice_id != current:
+            moved.setdefault(voice_id, []).append(index)
+
+    chunks = sum(
+        mark_for_resynthesis(db, book_id, indexes, voice_id=voice_id)
+        for voice_id, indexes in moved.items()
+    )
+    return {"cast": cast, "chunks": chunks}
@@ -0,0 +1,273 @@
+import re
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, update
+
+from app.core.constants import DIALOGUE_LLM
+from app.models.book import Chunk, ChunkWork
+from app.models.cast import CastEntry
+from app.services.llama_emotion import llama_service
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# DİYALOG ATFI (chunk → konuşan → ses)
+#
+# Parse bittikten sonra kitap bir kere sırayla taranır:
+#
+# - Tırnak (“ ” " « ») ve tire (—) ile açılan konuşma
+#   içindeki metin söz sayılır; harflerinin yarısından
+#   fazlası söz olan chunk diyalogdur
+# - Konuşan, chunk’ın anlatı kısmındaki konuşma
+#   fiillerinden bulunur ("dedi Ali", "Ayşe sordu",
+#   "diye bağırdı Peeta"); yoksa bir sonraki chunk’ın
+#   başındaki anlatıya bakılır
+# - Önceki chunk açık tırnakla bittiyse söz devam
+#   ediyordur; etiket yoksa konuşan aynıdır
+# - Bulunamazsa UNKNOWN_SPEAKER; DIALOGUE_LLM=1 ise
+#   worker penceresinde LLM’e sorulur
+#
+# Ses kitabın oyuncu listesinden (cast_entries) çözülür
+# ve Chunk.voice_id’ye yazılır; NULL kitabın sesidir.
+# ======================================================
+
+# Konuşanı bulunamayan diyalog chunk’ı
+UNKNOWN_SPEAKER = "?"
+
+# Oyuncu listesinde tüm konuşanlar için varsayılan ses
+DEFAULT_SPEAKER = "*"
+
+# Satırlar bu boyutta okunur / güncellenir
+ROW_BATCH = 1000
+
+QUOTE_PAIRS = {"“": "”", '"': '"', "«": "»"}
+
+# Tire ile açılan konuşma: chunk başında "— " ya da "- "
+DASH_OPEN = re.compile(r"^[—–-]\s*")
+DASH_BREAK = re.compile(r"\s[—–-]\s")
+
+SPEECH_VERBS = (
+    "dedi", "diyor", "sordu", "soruyor", "bağırdı", "bağırıyor", "fısıldadı",
+    "yanıtladı", "cevap verdi", "mırıldandı", "seslendi", "haykırdı",
+    "söyledi", "ekledi", "diye düşündü", "diye sordu", "diye bağırdı",
+    "diye ekledi", "itiraz etti", "güldü", "homurdandı",
+)
+_VERBS = "|".join(sorted((re.escape(v) for v in SPEECH_VERBS), key=len, reverse=True))
+_NAME = r"[A-ZÇĞİÖŞÜ][a-zçğıöşü]+(?:\s[A-ZÇĞİÖŞÜ][a-zçğıöşü]+)?"
+
+# "dedi Ali" / "Ali sessizce sordu"
+TAG_AFTER = re.compile(rf"(?<!\w)(?:{_VERBS})\s+(?P<name>{_NAME})")
+TAG_BEFORE = re.compile(rf"(?P<name>{_NAME})(?:\s+[a-zçğıöşü]+){{0,2}}?\s+(?:{_VERBS})(?!\w)")
+
+# Cümle başında büyük harfle gelen, isim olmayan kelimeler
+NOT_NAMES = {
+    "Ama", "Ve", "Sonra", "Şimdi", "Birden", "Hemen", "Yine", "Bu", "Şu", "O",
+    "Ben", "Sen", "Biz", "Siz", "Onlar", "Bunu", "Onu", "Bana", "Ona", "Sana",
+    "Hayır", "Evet", "Tamam", "Neden", "Nasıl", "Kim", "Ne", "Belki", "Sadece",
+    "Sessizce", "Yavaşça", "Gülerek", "Kızgınca", "Tekrar",
+}
+
+
+def split_speech(text: str, inside: Optional[str] = None) -> Tuple[str, str, Optional[str]]:
+    """
+    Chunk metni → (söz, anlatı, açık kalan tırnak).
+
+    inside: önceki chunk’ta açılıp kapanmamış tırnak;
+    metin o tırnağın kapanışına kadar sözdür.
+    """
+    speech, narration = [], []
+    pos = 0
+
+    if inside is None and DASH_OPEN.match(text):
+        # Tireli diyalog: "— Söz, — dedi Ali. — Söz."
+        # parçalar sırayla söz / anlatı
+        parts = DASH_BREAK.split(DASH_OPEN.sub("", text, count=1))
+        for i, part in enumerate(parts):
+            (speech if i % 2 == 0 else narration).append(part)
+        return " ".join(speech), " ".join(narration), None
+
+    if inside is not None:
+        end = text.find(QUOTE_PAIRS[inside])
+        if end < 0:
+            return text, "", inside
+        speech.append(text[:end])
+        pos = end + 1
+
+    while pos < len(text):
+        starts = [(text.find(q, pos), q) for q in QUOTE_PAIRS]
+        starts = [(i, q) for i, q in starts if i >= 0]
+        if not starts:
+            narration.append(text[pos:])
+            break
+
+        start, quote = min(starts)
+        narration.append(text[pos:start])
+        end = text.find(QUOTE_PAIRS[quote], start + 1)
+        if end < 0:
+            speech.append(text[start + 1:])
+            return " ".join(speech), " ".join(narration), quote
+        speech.append(text[start + 1:end])
+        pos = end + 1
+
+    return " ".join(speech), " ".join(narration), None
+
+
+def _letters(text: str) -> int:
+    return sum(ch.isalpha() for ch in text)
+
+
+def find_tag(narration: str) -> Optional[str]:
+    for pattern in (TAG_AFTER, TAG_BEFORE):
+        for match in pattern.finditer(narration):
+            name = match.group("name")
+            first = name.split()[0]
+            if first in NOT_NAMES:
+                continue
+            if first != name and name.split()[1] in NOT_NAMES:
+                name = first
+            return name
+    return None
+
+
+def _leading_narration(text: str) -> str:
+    """
+    Chunk’ın ilk sözden önceki anlatısı ("diye sordu Ali. ...").
+    """
+    cut = min((i for i in (text.find(q) for q in QUOTE_PAIRS) if i >= 0), default=len(text))
+    if DASH_OPEN.match(text):
+        return ""
+    return text[:cut]
+
+
+def attribute_speakers(texts: Iterable[str]) -> Iterator[Optional[str]]:
+    """
+    Chunk metinleri (sırayla) → konuşan ya da None (anlatı).
+    Bir sonraki chunk’a bakıldığı için bir adım geriden üretir.
+
+    Söz harflerin yarısından fazlasıysa chunk diyalogdur;
+    konuşma fiili bulunan chunk’ta üçte biri yeter
+    (“Bekle,” diye fısıldadı Gale. “Biri geliyor.”).
+    """
+    inside = None
+    previous_speaker = None
+    current = None
+
+    def decide(text: str, following: Optional[str]) -> Optional[str]:
+        nonlocal inside, previous_speaker
+        continued = inside is not None
+        speech, narration, inside = split_speech(text, inside)
+
+        spoken, total = _letters(speech), _letters(text)
+        tag = find_tag(narration) if spoken else None
+
+        speaker = None
+        if spoken * 2 > total or (tag and spoken * 3 >= total):
+            speaker = tag
+            if speaker is None and continued and previous_speaker:
+                speaker = previous_speaker
+            if speaker is None and following is not None:
+                speaker = find_tag(_leading_narration(following))
+            speaker = speaker or UNKNOWN_SPEAKER
+
+        previous_speaker = speaker
+        return speaker
+
+    for text in texts:
+        if current is not None:
+            yield decide(current, text or "")
+        current = text or ""
+    if current is not None:
+        yield decide(current, None)
+
+
+def voice_for(cast: Dict[str, str], speaker: Optional[str]) -> Optional[str]:
+    if speaker is None:
+        return None
+    return cast.get(speaker) or cast.get(DEFAULT_SPEAKER)
+
+
+class DialogueService:
+    """
+    Diyalog atfı + kitabın oyuncu listesi.
+    """
+
+    def cast(self, db, book_id: str) -> Dict[str, str]:
+        rows = (
+            db.query(CastEntry.speaker, CastEntry.voice_id)
+            .filter(CastEntry.book_id == book_id)
+            .order_by(CastEntry.speaker)
+        )
+        return {speaker: voice_id for speaker, voice_id in rows}
+
+    def speakers(self, db, book_id: str) -> Dict[str, int]:
+        """
+        Kitapta bulunan konuşanlar → chunk sayısı.
+        """
+        rows = (
+            db.query(Chunk.speaker, func.count(Chunk.id))
+            .filter(Chunk.book_id == book_id, Chunk.speaker.isnot(None))
+            .group_by(Chunk.speaker)
+            .order_by(func.count(Chunk.id).desc())
+        )
+        return {speaker: count for speaker, count in rows}
+
+    # -------------------------------------------------
+    # Parse sonrası atıf (tek kolon taraması + toplu
+    # UPDATE; sadece diyalog chunk’ları yazılır)
+    # -------------------------------------------------
+    def attribute_book(self, db, book_id: str) -> int:
+        cast = self.cast(db, book_id)
+        rows = (
+            db.query(Chunk.id, Chunk.text)
+            .filter(Chunk.book_id == book_id)
+            .order_by(Chunk.index)
+            .all()
+        )
+
+        speakers = attribute_speakers(text for _, text in rows)
+        updates = [
+            {"id": chunk_id, "speaker": speaker, "voice_id": voice_for(cast, speaker)}
+            for (chunk_id, _), speaker in zip(rows, speakers)
+            if speaker is not None
+        ]
+        for start in range(0, len(updates), ROW_BATCH):
+            db.execute(update(Chunk), updates[start:start + ROW_BATCH])
+        db.commit()
+
+        logger.info(f"Diyalog atfı | book={book_id} | {len(updates)}/{len(rows)} chunk diyalog")
+        return len(updates)
+
+    # -------------------------------------------------
+    # Konuşanı bulunamayan chunk’lar için LLM etiketi
+    # (worker penceresinde, duygu analiziyle birlikte).
+    # Pencere ChunkWork satırlarıdır; güncellenmiş
+    # pencere döner, bulunanlar tek toplu UPDATE’le yazılır.
+    # -------------------------------------------------
+    async def tag_window(self, db, book_id: str, window: List[ChunkWork]) -> List[ChunkWork]:
+        unknown = [chunk for chunk in window if chunk.speaker == UNKNOWN_SPEAKER]
+        if not DIALOGUE_LLM or not unknown:
+            return window
+
+        cast = self.cast(db, book_id)
+        candidates = [s for s in self.speakers(db, book_id) if s != UNKNOWN_SPEAKER][:20]
+        found = {}
+        for chunk in unknown:
+            context = (
+                db.query(Chunk.text)
+                .filter(Chunk.book_id == book_id, Chunk.index == chunk.index - 1)
+                .scalar()
+            ) or ""
+            speaker = await llama_service.get_speaker(chunk.text, context, candidates)
+            if speaker:
+                found[chunk.id] = {"speaker": speaker, "voice_id": voice_for(cast, speaker)}
+
+        if not found:
+            return window
+
+        db.execute(update(Chunk), [{"id": chunk_id, **values} for chunk_id, values in found.items()])
+        db.commit()
+        return [chunk._replace(**found[chunk.id]) if chunk.id in found else chunk for chunk in window]
+
+# Global singleton instance
+dialogue_service = DialogueService()
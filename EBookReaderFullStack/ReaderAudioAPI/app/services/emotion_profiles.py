@@ -0,0 +1,237 @@
+import asyncio
+import datetime
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app.core.constants import PROFILE_POLL_INTERVAL
+from app.core.database import SessionLocal
+from app.models.emotion_profile import EmotionProfile
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# DUYGU PROFİLLERİ
+#
+# (voice_id, emotion) → XTTS sentez ayarları.
+# Kaynak emotion_profiles tablosu; okumalar bellekteki
+# dict’ten yapılır (chunk başına DB sorgusu yok).
+#
+# Değişiklik bildirimi:
+# - Aynı process’teki düzenleme (API) cache’i hemen yeniler
+# - Diğer process’ler (python -m app.worker) tablonun
+#   parmak izini (satır sayısı + son updated_at)
+#   PROFILE_POLL_INTERVAL’da bir kontrol eder
+# Değişen profil, worker’ın sentezleyeceği bir sonraki
+# chunk’ta geçerli olur; restart gerekmez.
+# ======================================================
+
+GLOBAL_VOICE = "*"
+
+PROFILE_FIELDS = (
+    "speed",
+    "temperature",
+    "top_k",
+    "top_p",
+    "repetition_penalty",
+    "length_penalty",
+    "enable_text_splitting",
+    "pause",
+)
+
+_BASE = {
+    "top_k": 50,
+    "top_p": 0.85,
+    "repetition_penalty": 1.1,
+    "length_penalty": 1.0,
+    "enable_text_splitting": True,
+}
+
+# Tablo boşken yazılan başlangıç profilleri.
+# Bu değerler sesin doğal hissini ciddi etkiler.
+# pause: chunk sonuna eklenen duraksama (saniye, audio_post)
+DEFAULT_PROFILES = {
+    "happy":   {**_BASE, "speed": 1.05, "temperature": 0.95, "pause": 0.30},
+    "sad":     {**_BASE, "speed": 0.98, "temperature": 0.90, "pause": 0.65},
+    "angry":   {**_BASE, "speed": 1.10, "temperature": 0.82, "pause": 0.25},
+    "excited": {**_BASE, "speed": 1.12, "temperature": 0.95, "pause": 0.25},
+    "neutral": {**_BASE, "speed": 1.00, "temperature": 0.90, "pause": 0.40},
+}
+
+
+def _row_settings(row: EmotionProfile) -> dict:
+    settings = {field: getattr(row, field) for field in PROFILE_FIELDS}
+    if settings["pause"] is None:
+        # pause kolonundan önce yazılmış satır
+        settings["pause"] = DEFAULT_PROFILES.get(row.emotion, DEFAULT_PROFILES["neutral"])["pause"]
+    return settings
+
+
+class EmotionProfileStore:
+    """
+    emotion_profiles tablosunun bellek içi kopyası.
+    """
+
+    def __init__(self):
+        # (voice_id, emotion) -> settings
+        self._profiles: Dict[Tuple[str, str], dict] = {}
+        self._emotions: List[str] = []
+        self._fingerprint = None
+
+        self._listeners: List[Callable[[], None]] = []
+        self._watch_task = None
+
+    # -------------------------------------------------
+    # Tablonun parmak izi değiştiyse cache’i yeniden
+    # kurar. Değişiklik olduysa True döner.
+    # -------------------------------------------------
+    def refresh(self) -> bool:
+        with SessionLocal() as db:
+            count, updated = db.query(
+                func.count(), func.max(EmotionProfile.updated_at)
+            ).select_from(EmotionProfile).one()
+
+            if count == 0:
+                self._seed(db)
+                return self.refresh()
+
+            fingerprint = (count, updated)
+            if fingerprint == self._fingerprint:
+                return False
+
+            rows = db.query(EmotionProfile).all()
+
+        profiles = {(row.voice_id, row.emotion): _row_settings(row) for row in rows}
+        emotions = sorted({emotion for _, emotion in profiles} | {"neutral"})
+
+        # Tek seferde değiştir: okuyucular yarım cache görmez
+        self._profiles = profiles
+        self._emotions = emotions
+        self._fingerprint = fingerprint
+        logger.info(f"Duygu profilleri güncellendi | {len(profiles)} profil | {emotions}")
+
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"Profil dinleyicisi hatası: {e}")
+        return True
+
+    def _seed(self, db):
+        now = datetime.datetime.utcnow()
+        db.add_all(
+            EmotionProfile(voice_id=GLOBAL_VOICE, emotion=emotion, updated_at=now, **settings)
+            for emotion, settings in DEFAULT_PROFILES.items()
+        )
+        try:
+            db.commit()
+            logger.info("Varsayılan duygu profilleri yazıldı")
+        except IntegrityError:
+            # Başka bir process (API / worker) aynı anda yazdı
+            db.rollback()
+
+    def _ensure_loaded(self):
+        if self._fingerprint is None:
+            self.refresh()
+
+    def on_change(self, listener: Callable[[], None]):
+        """
+        Profiller her yeniden yüklendiğinde çağrılır.
+        """
+        self._listeners.append(listener)
+
+    # -------------------------------------------------
+    # Bilinen duyguların listesi (LLM etiket kümesi)
+    # -------------------------------------------------
+    def emotions(self) -> List[str]:
+        self._ensure_loaded()
+        return self._emotions
+
+    # -------------------------------------------------
+    # (voice, emotion) → (emotion, settings)
+    #
+    # voice profili → "*" profili → neutral
+    # -------------------------------------------------
+    def resolve(self, voice_id: Optional[str], emotion: Optional[str]) -> Tuple[str, dict]:
+        self._ensure_loaded()
+        profiles = self._profiles
+
+        voice_id = (voice_id or GLOBAL_VOICE).lower().replace(" ", "_")
+        emotion = (emotion or "neutral").lower()
+        if emotion not in self._emotions:
+            emotion = "neutral"
+
+        for key in ((voice_id, emotion), (GLOBAL_VOICE, emotion), (GLOBAL_VOICE, "neutral")):
+            settings = profiles.get(key)
+            if settings is not None:
+                return key[1], settings
+
+        return "neutral", DEFAULT_PROFILES["neutral"]
+
+    def list(self) -> List[dict]:
+        self._ensure_loaded()
+        return [
+            {"voice_id": voice_id, "emotion": emotion, **settings}
+            for (voice_id, emotion), settings in sorted(self._profiles.items())
+        ]
+
+    # -------------------------------------------------
+    # Düzenleme (API). Eksik alanlar mevcut profilden,
+    # yoksa "*" / neutral profilinden tamamlanır.
+    # -------------------------------------------------
+    def upsert(self, db, emotion: str, values: dict, voice_id: str = GLOBAL_VOICE) -> dict:
+        emotion = emotion.lower()
+        voice_id = voice_id.lower().replace(" ", "_")
+
+        row = db.get(EmotionProfile, (voice_id, emotion))
+        if row is None:
+            _, base = self.resolve(voice_id, emotion)
+            row = EmotionProfile(voice_id=voice_id, emotion=emotion, **base)
+            db.add(row)
+
+        for field, value in values.items():
+            if field in PROFILE_FIELDS and value is not None:
+                setattr(row, field, value)
+        row.updated_at = datetime.datetime.utcnow()
+        db.commit()
+
+        self.refresh()
+        return {"voice_id": voice_id, "emotion": emotion, **_row_settings(row)}
+
+    def delete(self, db, emotion: str, voice_id: str = GLOBAL_VOICE) -> bool:
+        emotion = emotion.lower()
+        voice_id = voice_id.lower().replace(" ", "_")
+        if (voice_id, emotion) == (GLOBAL_VOICE, "neutral"):
+            raise ValueError("Varsayılan neutral profili silinemez")
+
+        deleted = (
+            db.query(EmotionProfile)
+            .filter(EmotionProfile.voice_id == voice_id, EmotionProfile.emotion == emotion)
+            .delete(synchronize_session=False)
+        )
+        db.commit()
+
+        self.refresh()
+        return bool(deleted)
+
+    # -------------------------------------------------
+    # Arka planda periyodik değişiklik kontrolü
+    # -------------------------------------------------
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Duygu profilleri yenilenemedi: {e}")
+
+    async def start_watcher(self, interval: float = PROFILE_POLL_INTERVAL):
+        await asyncio.to_thread(self.refresh)
+        if self._watch_task is None and interval > 0:
+            self._watch_task = asyncio.create_task(self._watch(interval))
+
+
+# Global singleton instance
+emotion_profiles = EmotionProfileStore()
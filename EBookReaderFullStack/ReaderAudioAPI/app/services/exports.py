@@ -0,0 +1,484 @@
+import os
+import re
+import glob
+import asyncio
+import hashlib
+import logging
+import subprocess
+import zipfile
+from typing import Dict, List, NamedTuple, Optional
+
+from app.core.constants import (
+    EXPORT_AAC_BITRATE,
+    EXPORT_CONCURRENCY,
+    EXPORT_DIR,
+    EXPORT_FORMATS,
+    EXPORT_MP3_BITRATE,
+    EXPORT_OPUS_BITRATE,
+    EXPORT_PREBUILD,
+    resolve_ffmpeg_path,
+    resolve_ffprobe_path,
+)
+from app.core.database import SessionLocal
+from app.core.metrics import FFMPEG_RENDER_SECONDS
+from app.models.book import Book, Chunk
+from app.services.audio_store import audio_store
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# OFFLINE İNDİRME PAKETLERİ
+#
+# oas_assets/exports/
+#
+#   {id}.{bölüm:04d}.{hash}.m4a|mp3|opus   bölüm encode’ları
+#   {id}.{key}.m4b                         bölüm işaretli kitap
+#   {id}.{key}.mp3.zip|opus.zip            bölüm başına dosyalar
+#
+# Bölüm hash’i tamamlanmış chunk’ların (index, revision,
+# süre, ses, duygu) değerlerinden ve encoder ayarlarından
+# hesaplanır; paket anahtarı bölüm hash’leri + başlıklardan.
+# Aynı içerik tekrar encode edilmez; düzenlenen chunk
+# sadece kendi bölümünü (ve paketleri) yeniden üretir.
+#
+# Bölümün son chunk’ı sentezlenince worker kitabı
+# planlar: hazır olmayan bölümler paralel encode edilir
+# (bölüm başına tek ffmpeg, PCM stdin’den; AAC, MP3 ve
+# Opus tek geçişte). Bütün bölümler hazır olunca paketler
+# yeniden encode olmadan birleştirilir (m4b: concat
+# -c copy + bölüm metadata’sı, zip: sıkıştırmasız).
+# ======================================================
+
+# Paket formatı → bölüm encode’unun uzantısı
+CHAPTER_EXT = {"m4b": "m4a", "mp3": "mp3", "opus": "opus"}
+
+PACKAGE_EXT = {"m4b": "m4b", "mp3": "mp3.zip", "opus": "opus.zip"}
+
+MEDIA_TYPES = {"m4b": "audio/mp4", "mp3": "application/zip", "opus": "application/zip"}
+
+ENCODERS = {
+    "m4a": ["-c:a", "aac", "-b:a", EXPORT_AAC_BITRATE, "-f", "mp4"],
+    "mp3": ["-c:a", "libmp3lame", "-b:a", EXPORT_MP3_BITRATE, "-f", "mp3"],
+    "opus": ["-c:a", "libopus", "-b:a", EXPORT_OPUS_BITRATE, "-f", "ogg"],
+}
+
+PCM_FORMATS = {1: "u8", 2: "s16le", 4: "s32le"}
+
+# Encoder ayarı değişince bütün cache geçersiz olur
+ENCODER_KEY = "|".join(f"{ext}={' '.join(args)}" for ext, args in sorted(ENCODERS.items()))
+
+
+class ChapterPlan(NamedTuple):
+    chapter: int
+    title: str
+    indexes: List[int]
+    complete: bool
+    hash: str
+
+
+class ExportPlan(NamedTuple):
+    book_id: str
+    title: str
+    author: str
+    chapters: List[ChapterPlan]
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.chapters) and all(c.complete for c in self.chapters)
+
+    @property
+    def key(self) -> str:
+        raw = "|".join([self.title, self.author, *(f"{c.hash}:{c.title}" for c in self.chapters)])
+        return hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+
+def safe_name(text: str) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', " ", text).strip()[:80] or "audiobook"
+
+
+def ffmetadata_escape(text: str) -> str:
+    return re.sub(r"([=;#\\\n])", r"\\\1", text)
+
+
+class ExportService:
+    """
+    Bölüm encode’ları + paketler. Kitap başına aynı anda
+    tek senkronizasyon koşar; sürerken gelen planlama
+    isteği bittiğinde bir tur daha çalıştırır.
+    """
+
+    def __init__(self, export_dir: str = EXPORT_DIR, formats=EXPORT_FORMATS):
+        self.export_dir = export_dir
+        os.makedirs(self.export_dir, exist_ok=True)
+
+        self.formats = tuple(f for f in formats if f in CHAPTER_EXT)
+        self.chapter_exts = tuple(CHAPTER_EXT[f] for f in self.formats)
+
+        self._semaphore = asyncio.Semaphore(max(1, EXPORT_CONCURRENCY))
+        self._running: Dict[str, asyncio.Task] = {}
+        self._dirty = set()
+
+    def chapter_path(self, book_id: str, chapter: ChapterPlan, ext: str) -> str:
+        return os.path.join(self.export_dir, f"{book_id}.{chapter.chapter:04d}.{chapter.hash}.{ext}")
+
+    def package_path(self, plan: ExportPlan, fmt: str) -> str:
+        return os.path.join(self.export_dir, f"{plan.book_id}.{plan.key}.{PACKAGE_EXT[fmt]}")
+
+    def download_name(self, plan: ExportPlan, fmt: str) -> str:
+        return f"{safe_name(plan.title)}.{PACKAGE_EXT[fmt]}"
+
+    # -------------------------------------------------
+    # DB → bölüm listesi + hash’ler (tek tarama,
+    # sadece küçük kolonlar)
+    # -------------------------------------------------
+    def plan(self, db, book_id: str) -> Optional[ExportPlan]:
+        book = db.query(Book.title, Book.author, Book.chapter_titles).filter(Book.id == book_id).first()
+        if not book:
+            return None
+
+        rows = (
+            db.query(
+                Chunk.chapter, Chunk.index, Chunk.status, Chunk.revision,
+                Chunk.duration, Chunk.voice_id, Chunk.emotion,
+            )
+            .filter(Chunk.book_id == book_id)
+            .order_by(Chunk.chapter, Chunk.index)
+            .all()
+        )
+
+        titles = book.chapter_titles or []
+        groups: Dict[int, list] = {}
+        for row in rows:
+            groups.setdefault(row.chapter or 0, []).append(row)
+
+        chapters = []
+        for chapter, group in sorted(groups.items()):
+            complete = all(row.status == "completed" for row in group)
+            digest = hashlib.sha1(ENCODER_KEY.encode())
+            if complete:
+                for row in group:
+                    digest.update(
+                        f"{row.index}|{row.revision}|{row.duration or 0:.3f}|{row.voice_id}|{row.emotion};".encode()
+                    )
+            chapters.append(ChapterPlan(
+                chapter=chapter,
+                title=titles[chapter] if chapter < len(titles) and titles[chapter] else f"Bölüm {chapter + 1}",
+                indexes=[row.index for row in group],
+                complete=complete,
+                hash=digest.hexdigest()[:12] if complete else "",
+            ))
+
+        return ExportPlan(book_id, book.title or "", book.author or "", chapters)
+
+    def _chapter_ready(self, plan: ExportPlan, chapter: ChapterPlan) -> bool:
+        return chapter.complete and all(
+            os.path.exists(self.chapter_path(plan.book_id, chapter, ext)) for ext in self.chapter_exts
+        )
+
+    # -------------------------------------------------
+    # API: bölüm / paket durumu (dosya varlığından;
+    # worker ayrı process’te olsa da doğru)
+    # -------------------------------------------------
+    def status(self, db, book_id: str) -> Optional[dict]:
+        plan = self.plan(db, book_id)
+        if plan is None:
+            return None
+
+        packages = {}
+        for fmt in self.formats:
+            path = self.package_path(plan, fmt) if plan.complete else None
+            ready = bool(path) and os.path.exists(path)
+            packages[fmt] = {"ready": ready, "size": os.path.getsize(path) if ready else None}
+
+        return {
+            "book_id": book_id,
+            "chapters": len(plan.chapters),
+            "chapters_synthesized": sum(c.complete for c in plan.chapters),
+            "chapters_encoded": sum(self._chapter_ready(plan, c) for c in plan.chapters),
+            "complete": plan.complete,
+            "key": plan.key if plan.complete else None,
+            "packages": packages,
+            "building": book_id in self._running,
+        }
+
+    # -------------------------------------------------
+    # Bölüm encode’u (thread içinde)
+    #
+    # Chunk PCM’leri (WAV / pack) ffmpeg stdin’ine sırayla
+    # yazılır; ara WAV yok. Her format ayrı çıktı, tek
+    # decode / resample.
+    # -------------------------------------------------
+    def _encode_chapter(self, plan: ExportPlan, chapter: ChapterPlan, exts):
+        book_id = plan.book_id
+        layout = None
+        for index in chapter.indexes:
+            source = audio_store.locate(book_id, index)
+            if source is not None:
+                layout = (source.channels, source.sample_rate, source.sampwidth)
+                break
+        if layout is None:
+            raise ValueError(f"Bölümde ses yok | book={book_id} chapter={chapter.chapter}")
+        channels, rate, width = layout
+
+        targets = {ext: self.chapter_path(book_id, chapter, ext) for ext in exts}
+        tmp_paths = {ext: f"{path}.{os.getpid()}.tmp" for ext, path in targets.items()}
+
+        command = [
+            resolve_ffmpeg_path(), "-y", "-hide_banner", "-loglevel", "error",
+            "-f", PCM_FORMATS[width], "-ar", str(rate), "-ac", str(channels), "-i", "pipe:0",
+        ]
+        for ext, tmp_path in tmp_paths.items():
+            command += [
+                "-map", "0:a", *ENCODERS[ext],
+                "-metadata", f"title={chapter.title}",
+                "-metadata", f"album={plan.title}",
+                "-metadata", f"artist={plan.author}",
+                "-metadata", f"track={chapter.chapter + 1}",
+                tmp_path,
+            ]
+
+        try:
+            with FFMPEG_RENDER_SECONDS.time(kind="export_chapter"):
+                with subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+                    try:
+                        for index in chapter.indexes:
+                            source, pcm = audio_store.read(book_id, index)
+                            if source is None:
+                                raise ValueError(f"Chunk sesi yok | book={book_id} chunk={index}")
+                            if (source.channels, source.sample_rate, source.sampwidth) != layout:
+                                raise ValueError(
+                                    f"Farklı ses formatı | chunk={index} "
+                                    f"{(source.channels, source.sample_rate, source.sampwidth)} != {layout}"
+                                )
+                            process.stdin.write(pcm)
+                    except BaseException:
+                        process.kill()
+                        raise
+                    _, error = process.communicate()
+
+                if process.returncode:
+                    raise RuntimeError(f"ffmpeg hatası ({process.returncode}): {error.decode(errors='replace')[-500:]}")
+
+            for ext, tmp_path in tmp_paths.items():
+                os.replace(tmp_path, targets[ext])
+        finally:
+            for tmp_path in tmp_paths.values():
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        logger.info(f"Bölüm encode edildi | book={book_id} | chapter={chapter.chapter} | {', '.join(exts)}")
+
+    # -------------------------------------------------
+    # Paketler (thread içinde, yeniden encode yok)
+    # -------------------------------------------------
+    # Encode edilmiş dosyanın süresi (ffprobe); concat
+    # demuxer sonraki dosyayı bu süreye göre kaydırır.
+    # AAC priming + 1024 örneklik frame dolgusu dahil.
+    def _encoded_seconds(self, path: str) -> Optional[float]:
+        try:
+            result = subprocess.run(
+                [
+                    resolve_ffprobe_path(), "-v", "error",
+                    "-show_entries", "format=duration",
+                    "-of", "default=noprint_wrappers=1:nokey=1",
+                    path,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            return float(result.stdout.strip())
+        except (OSError, RuntimeError, subprocess.CalledProcessError, ValueError):
+            return None
+
+    def _chapter_seconds(self, book_id: str, chapter: ChapterPlan) -> float:
+        seconds = 0.0
+        for index in chapter.indexes:
+            source = audio_store.locate(book_id, index)
+            if source is not None:
+                seconds += source.nbytes / (source.channels * source.sampwidth * source.sample_rate)
+        return seconds
+
+    def _build_m4b(self, plan: ExportPlan, path: str):
+        tmp_base = f"{path}.{os.getpid()}"
+        list_path = f"{tmp_base}.list.tmp"
+        meta_path = f"{tmp_base}.meta.tmp"
+        tmp_path = f"{tmp_base}.tmp"
+
+        try:
+            with open(list_path, "w", encoding="utf-8") as f:
+                for chapter in plan.chapters:
+                    source = os.path.abspath(self.chapter_path(plan.book_id, chapter, "m4a"))
+                    f.write("file '{}'\n".format(source.replace("'", "'\\''")))
+
+            # Bölüm sınırları encode edilmiş m4a sürelerinden
+            # (ms); ffprobe yoksa PCM uzunluklarından
+            seconds = []
+            for chapter in plan.chapters:
+                encoded = self._encoded_seconds(self.chapter_path(plan.book_id, chapter, "m4a"))
+                if encoded is None:
+                    logger.warning(
+                        f"ffprobe süresi alınamadı, PCM uzunluğu kullanılıyor | "
+                        f"book={plan.book_id} | chapter={chapter.chapter}"
+                    )
+                    encoded = self._chapter_seconds(plan.book_id, chapter)
+                seconds.append(encoded)
+
+            with open(meta_path, "w", encoding="utf-8") as f:
+                f.write(";FFMETADATA1\n")
+                f.write(f"title={ffmetadata_escape(plan.title)}\n")
+                f.write(f"album={ffmetadata_escape(plan.title)}\n")
+                f.write(f"artist={ffmetadata_escape(plan.author)}\n")
+                f.write("genre=Audiobook\n")
+                start = 0
+                cursor = 0.0
+                for chapter, chapter_seconds in zip(plan.chapters, seconds):
+                    cursor += chapter_seconds
+                    end = max(start + 1, int(round(cursor * 1000)))
+                    f.write(
+                        f"\n[CHAPTER]\nTIMEBASE=1/1000\nSTART={start}\nEND={end}\n"
+                        f"title={ffmetadata_escape(chapter.title)}\n"
+                    )
+                    start = end
+
+            with FFMPEG_RENDER_SECONDS.time(kind="export_m4b"):
+                subprocess.run(
+                    [
+                        resolve_ffmpeg_path(), "-y", "-hide_banner", "-loglevel", "error",
+                        "-f", "concat", "-safe", "0", "-i", list_path,
+                        "-f", "ffmetadata", "-i", meta_path,
+                        "-map", "0:a", "-map_metadata", "1", "-map_chapters", "1",
+                        "-c", "copy", "-movflags", "+faststart", "-f", "mp4",
+                        tmp_path,
+                    ],
+                    check=True,
+                    capture_output=True,
+                )
+            os.replace(tmp_path, path)
+        finally:
+            for leftover in (list_path, meta_path, tmp_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+    def _build_zip(self, plan: ExportPlan, ext: str, path: str):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            # Sıkıştırılmış ses; ZIP_STORED hem hızlı hem
+            # aynı boyutta
+            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED) as archive:
+                for chapter in plan.chapters:
+                    archive.write(
+                        self.chapter_path(plan.book_id, chapter, ext),
+                        f"{chapter.chapter + 1:03d} - {safe_name(chapter.title)}.{ext}",
+                    )
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _build_packages(self, plan: ExportPlan):
+        for fmt in self.formats:
+            path = self.package_path(plan, fmt)
+            if os.path.exists(path):
+                continue
+            if fmt == "m4b":
+                self._build_m4b(plan, path)
+            else:
+                self._build_zip(plan, CHAPTER_EXT[fmt], path)
+            logger.info(f"Export paketi hazır | book={plan.book_id} | {os.path.basename(path)}")
+
+    # -------------------------------------------------
+    # Eski hash’li bölüm / paket dosyaları; süren
+    # encode’ların .tmp dosyalarına dokunulmaz
+    # -------------------------------------------------
+    def _remove_stale(self, plan: ExportPlan):
+        keep = {
+            self.chapter_path(plan.book_id, chapter, ext)
+            for chapter in plan.chapters if chapter.complete
+            for ext in self.chapter_exts
+        }
+        if plan.complete:
+            keep.update(self.package_path(plan, fmt) for fmt in self.formats)
+
+        for path in glob.glob(os.path.join(glob.escape(self.export_dir), f"{glob.escape(plan.book_id)}.*")):
+            if path not in keep and not path.endswith(".tmp"):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    # -------------------------------------------------
+    # Tek senkronizasyon turu: eksik bölümler (paralel,
+    # en fazla EXPORT_CONCURRENCY) → kitap bittiyse paketler
+    # -------------------------------------------------
+    async def sync(self, book_id: str):
+        if not self.formats:
+            return
+
+        def load():
+            with SessionLocal() as db:
+                return self.plan(db, book_id)
+
+        plan = await asyncio.to_thread(load)
+        if plan is None:
+            return
+
+        async def encode(chapter: ChapterPlan):
+            exts = [
+                ext for ext in self.chapter_exts
+                if not os.path.exists(self.chapter_path(book_id, chapter, ext))
+            ]
+            if not exts:
+                return
+            async with self._semaphore:
+                await asyncio.to_thread(self._encode_chapter, plan, chapter, exts)
+
+        await asyncio.gather(*(encode(c) for c in plan.chapters if c.complete))
+
+        if plan.complete:
+            await asyncio.to_thread(self._build_packages, plan)
+        await asyncio.to_thread(self._remove_stale, plan)
+
+    async def _run(self, book_id: str):
+        try:
+            while True:
+                self._dirty.discard(book_id)
+                try:
+                    await self.sync(book_id)
+                except Exception as e:
+                    logger.error(f"Export hatası | book={book_id}: {e}", exc_info=True)
+                    raise
+                if book_id not in self._dirty:
+                    return
+        finally:
+            self._running.pop(book_id, None)
+            self._dirty.discard(book_id)
+
+    # -------------------------------------------------
+    # Senkronizasyonu başlatır ya da sürene bağlanır;
+    # sürerken çağrılırsa bittiğinde bir tur daha
+    # -------------------------------------------------
+    def ensure(self, book_id: str) -> asyncio.Task:
+        task = self._running.get(book_id)
+        if task is None:
+            task = asyncio.create_task(self._run(book_id))
+            self._running[book_id] = task
+        else:
+            self._dirty.add(book_id)
+        return task
+
+    # Worker: bölüm ya da kitap bitti (EXPORT_PREBUILD)
+    def schedule(self, book_id: str):
+        if EXPORT_PREBUILD and self.formats:
+            task = self.ensure(book_id)
+            # Arka plan turunun hatası loglandı; "exception
+            # was never retrieved" uyarısı çıkmasın
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    # API: paket istendi, hazır değil
+    async def build(self, book_id: str):
+        await asyncio.shield(self.ensure(book_id))
+
+
+# Global singleton instance
+exporter = ExportService()
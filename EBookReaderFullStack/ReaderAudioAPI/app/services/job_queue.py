@@ -0,0 +1,286 @@
+import os
+import uuid
+import socket
+import logging
+import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import and_, or_
+
+from app.core.constants import JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS
+from app.core.database import SessionLocal
+from app.models.book import Chunk
+from app.models.job import Job
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_BOOK = 0
+PRIORITY_WINDOW = 10
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def local_owner_dead(worker_id: str) -> bool:
+    """
+    Bu host’taki bir process’in worker id’si ve o process
+    artık yoksa True. Başka host’un worker’ı bilinemez
+    (False); onun chunk’ları lease devralınca geri döner.
+    """
+    host, _, rest = worker_id.partition(":")
+    pid = rest.partition(":")[0]
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    # Aynı pid bu process’in kendisiyse önceki bir
+    # çalıştırmadan kalmıştır (id’deki uuid farklı)
+    if int(pid) == os.getpid():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.utcnow()
+
+
+class JobQueue:
+    """
+    jobs tablosu üzerinde kalıcı iş kuyruğu.
+
+    - API sadece iş ekler (enqueue_book / request_window)
+    - Worker’lar (aynı process’te ya da python -m app.worker)
+      claim ile lease alır, heartbeat ile uzatır
+    - Lease’i dolan iş başka bir worker’a geçer; API ya da
+      worker yeniden başlasa da iş kaybolmaz
+
+    Claim, koşullu UPDATE ile yapılır (aday seç → status /
+    lease hâlâ aynıysa güncelle); SQLite ve Postgres’te
+    aynı şekilde çalışır.
+    """
+
+    def __init__(self, lease_seconds: int = JOB_LEASE_SECONDS, max_attempts: int = JOB_MAX_ATTEMPTS):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def _lease_until(self) -> datetime.datetime:
+        return _now() + datetime.timedelta(seconds=self.lease_seconds)
+
+    def _claimable(self, now: datetime.datetime):
+        return or_(
+            Job.status == "queued",
+            and_(Job.status == "leased", Job.lease_expires_at < now),
+        )
+
+    # -------------------------------------------------
+    # Kitap işi (kitap başına tek aktif iş)
+    # -------------------------------------------------
+    def enqueue_book(self, book_id: str) -> bool:
+        with SessionLocal() as db:
+            exists = db.query(Job.id).filter(
+                Job.book_id == book_id,
+                Job.kind == "book",
+                Job.status.in_(["queued", "leased"]),
+            ).first()
+            if exists:
+                return False
+
+            db.add(Job(kind="book", book_id=book_id, priority=PRIORITY_BOOK))
+            db.commit()
+            return True
+
+    # -------------------------------------------------
+    # Okuyucunun önündeki pencere (öncelikli iş)
+    #
+    # Kitap zaten bir worker’da işleniyorsa o worker
+    # konumu Book.last_chunk_index’ten okur; force=False
+    # iken ayrıca pencere işi açılmaz. Kitap başına tek
+    # bekleyen pencere işi tutulur, konumu güncellenir.
+    # -------------------------------------------------
+    def request_window(self, book_id: str, position: int, force: bool = False) -> bool:
+        now = _now()
+        with SessionLocal() as db:
+            if not force:
+                running = db.query(Job.id).filter(
+                    Job.book_id == book_id,
+                    Job.kind == "book",
+                    Job.status == "leased",
+                    Job.lease_expires_at >= now,
+                ).first()
+                if running:
+                    return False
+
+            updated = db.query(Job).filter(
+                Job.book_id == book_id,
+                Job.kind == "window",
+                Job.status == "queued",
+            ).update({"position": position, "updated_at": now}, synchronize_session=False)
+
+            if not updated:
+                db.add(Job(kind="window", book_id=book_id, position=position, priority=PRIORITY_WINDOW))
+            db.commit()
+            return True
+
+    # -------------------------------------------------
+    # Sıradaki işi lease’ler; yoksa None
+    #
+    # Dönen Job session’dan ayrılmıştır (sadece okunur).
+    # -------------------------------------------------
+    def claim(self, worker_id: str, kinds: Sequence[str] = ("book", "window")) -> Optional[Job]:
+        with SessionLocal() as db:
+            for _ in range(5):
+                now = _now()
+                candidate = (
+                    db.query(Job.id, Job.status, Job.book_id, Job.attempts, Job.lease_owner)
+                    .filter(Job.kind.in_(kinds), self._claimable(now))
+                    .order_by(Job.priority.desc(), Job.id)
+                    .first()
+                )
+                if candidate is None:
+                    return None
+
+                # Lease’i dolmuş ve hakkı bitmiş iş → failed
+                if candidate.attempts >= self.max_attempts:
+                    db.query(Job).filter(Job.id == candidate.id, self._claimable(now)).update(
+                        {"status": "failed", "lease_owner": None, "error": "max attempts", "updated_at": now},
+                        synchronize_session=False,
+                    )
+                    db.commit()
+                    continue
+
+                claimed = db.query(Job).filter(Job.id == candidate.id, self._claimable(now)).update(
+                    {
+                        "status": "leased",
+                        "lease_owner": worker_id,
+                        "lease_expires_at": self._lease_until(),
+                        "heartbeat_at": now,
+                        "attempts": Job.attempts + 1,
+                        "updated_at": now,
+                    },
+                    synchronize_session=False,
+                )
+                db.commit()
+                if not claimed:
+                    # Başka worker önce davrandı
+                    continue
+
+                if candidate.status == "leased" and candidate.lease_owner:
+                    # Önceki worker ölmüş: sadece onun yarıda kalan
+                    # chunk’ları geri döner (aynı kitapta koşan başka
+                    # worker’ın / speak now stream’inin chunk’larına
+                    # dokunulmaz)
+                    logger.warning(f"Lease devralındı | job={candidate.id} | book={candidate.book_id}")
+                    db.query(Chunk).filter(
+                        Chunk.book_id == candidate.book_id,
+                        Chunk.status == "processing",
+                        Chunk.claimed_by == candidate.lease_owner,
+                    ).update({"status": "pending", "claimed_by": None}, synchronize_session=False)
+                    db.commit()
+
+                job = db.get(Job, candidate.id)
+                db.expunge(job)
+                return job
+        return None
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        now = _now()
+        with SessionLocal() as db:
+            extended = db.query(Job).filter(
+                Job.id == job_id,
+                Job.lease_owner == worker_id,
+                Job.status == "leased",
+            ).update(
+                {"lease_expires_at": self._lease_until(), "heartbeat_at": now},
+                synchronize_session=False,
+            )
+            db.commit()
+            return bool(extended)
+
+    def complete(self, job_id: int, worker_id: str):
+        # Biten iş tutulmaz; tablo sadece bekleyen / koşan / hatalı işler
+        with SessionLocal() as db:
+            db.query(Job).filter(Job.id == job_id, Job.lease_owner == worker_id).delete(
+                synchronize_session=False
+            )
+            db.commit()
+
+    def fail(self, job_id: int, worker_id: str, error: str):
+        with SessionLocal() as db:
+            job = db.query(Job).filter(Job.id == job_id, Job.lease_owner == worker_id).first()
+            if not job:
+                return
+            job.status = "queued" if job.attempts < self.max_attempts else "failed"
+            job.lease_owner = None
+            job.lease_expires_at = None
+            job.error = error[:2000]
+            job.updated_at = _now()
+            db.commit()
+
+    def release_owned(self, worker_id: str) -> int:
+        """
+        Kapanan worker’ın lease’lerini hemen kuyruğa döndürür
+        (lease süresinin dolması beklenmez).
+        """
+        with SessionLocal() as db:
+            released = db.query(Job).filter(
+                Job.lease_owner == worker_id,
+                Job.status == "leased",
+            ).update(
+                {
+                    "status": "queued",
+                    "lease_owner": None,
+                    "lease_expires_at": None,
+                    "attempts": Job.attempts - 1,
+                    "updated_at": _now(),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+            return released
+
+    def cancel_book(self, book_id: str) -> int:
+        with SessionLocal() as db:
+            removed = db.query(Job).filter(Job.book_id == book_id).delete(synchronize_session=False)
+            db.commit()
+            return removed
+
+    def has_waiting(self, kind: str = "window") -> bool:
+        with SessionLocal() as db:
+            return db.query(Job.id).filter(
+                Job.kind == kind,
+                self._claimable(_now()),
+            ).first() is not None
+
+    def book_active(self, book_id: str) -> bool:
+        """
+        Kitabın bekleyen ya da bir worker’da çalışan işi var mı?
+        """
+        with SessionLocal() as db:
+            return db.query(Job.id).filter(
+                Job.book_id == book_id,
+                Job.status.in_(("queued", "leased")),
+            ).first() is not None
+
+    def depth(self) -> int:
+        with SessionLocal() as db:
+            return db.query(Job).filter(Job.status == "queued").count()
+
+    def summary(self) -> dict:
+        now = _now()
+        with SessionLocal() as db:
+            queued = db.query(Job).filter(Job.status == "queued").count()
+            leased = db.query(Job).filter(Job.status == "leased", Job.lease_expires_at >= now).count()
+            failed = db.query(Job).filter(Job.status == "failed").count()
+            workers = db.query(Job.lease_owner).filter(
+                Job.status == "leased", Job.lease_expires_at >= now
+            ).distinct().count()
+        return {"queued": queued, "leased": leased, "failed": failed, "busy_workers": workers}
+
+
+# Global singleton instance
+job_queue = JobQueue()
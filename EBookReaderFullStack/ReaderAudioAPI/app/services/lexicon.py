@@ -0,0 +1,270 @@
+import re
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func
+
+from app.core.constants import TERM_INDEX_BOOKS
+from app.core.database import SessionLocal
+from app.models.book import Chunk
+from app.models.lexicon import LexiconEntry
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# TELAFFUZ SÖZLÜĞÜ + CHUNK TERİM İNDEKSİ
+#
+# Sözlük kitaba özeldir: (book_id, term) → replacement.
+# Sentezden hemen önce chunk metnine uygulanır; DB’deki
+# metin (altyazı, arama) değişmez.
+#
+# Sözlük düzenlenince sadece terimi içeren chunk’lar
+# yeniden sentezlenir. Bunları bulmak için kitap başına
+# bellek içi ters indeks tutulur:
+#
+#   terim → chunk index dizisi (sıralı int32)
+#
+# İlk kullanımda tek kolon taramasıyla kurulur (LRU,
+# TERM_INDEX_BOOKS kitap), chunk metni düzenlenince
+# yerinde güncellenir. Çok kelimeli terimlerde kelime
+# dizilerinin kesişimi alınır, aday chunk’lar regex ile
+# doğrulanır.
+# ======================================================
+
+TOKEN = re.compile(r"\w+")
+
+# Terim indeksi kurulurken satırlar bu boyutta okunur
+ROW_BATCH = 1000
+
+_EMPTY = np.zeros(0, dtype=np.int32)
+
+
+def normalize_term(term: str) -> str:
+    return " ".join(term.split())
+
+
+def _token_key(token: str) -> str:
+    """
+    İndeks anahtarı. Türkçe I / ı / İ / i tek harfe
+    indirgenir: re.IGNORECASE hepsini eşleştirdiği için
+    indeks regex’ten dar olmamalı (aday fazlası doğrulanır).
+    """
+    return token.replace("İ", "i").replace("I", "i").lower().replace("ı", "i")
+
+
+def tokens(text: str) -> Set[str]:
+    return {_token_key(token) for token in TOKEN.findall(text or "")}
+
+
+def _term_regex(term: str) -> str:
+    return r"\s+".join(re.escape(word) for word in term.split())
+
+
+def compile_terms(terms: Iterable[str]) -> Optional[re.Pattern]:
+    """
+    Terimlerin herhangi birini tam kelime olarak arayan
+    tek regex (uzun terim önce: "Mr Darcy" > "Darcy").
+    """
+    alternatives = sorted({normalize_term(t) for t in terms if t.strip()}, key=len, reverse=True)
+    if not alternatives:
+        return None
+    body = "|".join(_term_regex(term) for term in alternatives)
+    return re.compile(rf"(?<!\w)(?:{body})(?!\w)", re.IGNORECASE)
+
+
+class LexiconRules:
+    """
+    Kitabın derlenmiş sözlüğü.
+    """
+
+    def __init__(self, entries: Dict[str, str]):
+        self.pattern = compile_terms(entries)
+        self._entries = [
+            (re.compile(_term_regex(term), re.IGNORECASE), replacement)
+            for term, replacement in sorted(entries.items(), key=lambda e: len(e[0]), reverse=True)
+        ]
+
+    def _replace(self, match: re.Match) -> str:
+        found = match.group()
+        for pattern, replacement in self._entries:
+            if pattern.fullmatch(found):
+                return replacement
+        return found
+
+    def apply(self, text: str) -> str:
+        if self.pattern is None or not text:
+            return text
+        return self.pattern.sub(self._replace, text)
+
+
+class ChunkTermIndex:
+    """
+    Kitap bazlı ters indeks (terim → chunk index’leri).
+    """
+
+    def __init__(self, max_books: int = TERM_INDEX_BOOKS):
+        self.max_books = max_books
+        # book_id -> (parmak izi, {terim: index dizisi})
+        self._books: "OrderedDict[str, Tuple[tuple, Dict[str, np.ndarray]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # Yeniden parse / kopyalama chunk kümesini, düzenlemeler
+    # revision toplamını değiştirir: başka process’in (API /
+    # worker) düzenlemesi burada görülür. Bu process’in
+    # düzenlemeleri update_chunk + note_revisions ile işlenir
+    def _fingerprint(self, db, book_id: str) -> tuple:
+        count, max_id, revisions = (
+            db.query(func.count(Chunk.id), func.max(Chunk.id), func.sum(Chunk.revision))
+            .filter(Chunk.book_id == book_id)
+            .one()
+        )
+        return (count, max_id, revisions or 0)
+
+    def _build(self, db, book_id: str) -> Dict[str, np.ndarray]:
+        postings: Dict[str, List[int]] = {}
+        rows = (
+            db.query(Chunk.index, Chunk.text)
+            .filter(Chunk.book_id == book_id)
+            .order_by(Chunk.index)
+            .yield_per(ROW_BATCH)
+        )
+        count = 0
+        for index, text in rows:
+            for token in tokens(text):
+                postings.setdefault(token, []).append(index)
+            count += 1
+
+        logger.info(f"Terim indeksi kuruldu | book={book_id} | {count} chunk | {len(postings)} terim")
+        return {token: np.array(indexes, dtype=np.int32) for token, indexes in postings.items()}
+
+    def _postings(self, db, book_id: str) -> Dict[str, np.ndarray]:
+        fingerprint = self._fingerprint(db, book_id)
+        with self._lock:
+            cached = self._books.get(book_id)
+            if cached is not None and cached[0] == fingerprint:
+                self._books.move_to_end(book_id)
+                return cached[1]
+
+        postings = self._build(db, book_id)
+        with self._lock:
+            self._books[book_id] = (fingerprint, postings)
+            self._books.move_to_end(book_id)
+            while len(self._books) > self.max_books:
+                self._books.popitem(last=False)
+        return postings
+
+    # -------------------------------------------------
+    # Terimin tüm kelimelerini içeren chunk’lar (aday)
+    # -------------------------------------------------
+    def candidates(self, db, book_id: str, term: str) -> np.ndarray:
+        postings = self._postings(db, book_id)
+        result = None
+        for token in tokens(term):
+            found = postings.get(token)
+            if found is None:
+                return _EMPTY
+            result = found if result is None else np.intersect1d(result, found, assume_unique=True)
+        return _EMPTY if result is None else result
+
+    # -------------------------------------------------
+    # Chunk metni düzenlendi: sadece farklı kelimelerin
+    # dizileri güncellenir (indeks kurulu değilse no-op)
+    # -------------------------------------------------
+    def update_chunk(self, book_id: str, index: int, old_text: str, new_text: str):
+        with self._lock:
+            cached = self._books.get(book_id)
+            if cached is None:
+                return
+            postings = cached[1]
+
+            old, new = tokens(old_text), tokens(new_text)
+            for token in old - new:
+                found = postings.get(token)
+                if found is None:
+                    continue
+                found = found[found != index]
+                if len(found):
+                    postings[token] = found
+                else:
+                    del postings[token]
+            for token in new - old:
+                found = postings.get(token, _EMPTY)
+                postings[token] = np.union1d(found, [index]).astype(np.int32)
+
+    # -------------------------------------------------
+    # Bu process `count` chunk’ın revision’ını 1 artırdı
+    #
+    # Cache düzenlemeden önce güncelse yeni toplamla
+    # eşleşir; arada başka process düzenlediyse eşleşmez,
+    # indeks yeniden kurulur.
+    # -------------------------------------------------
+    def note_revisions(self, book_id: str, count: int):
+        with self._lock:
+            cached = self._books.get(book_id)
+            if cached is None or not count:
+                return
+            fingerprint, postings = cached
+            self._books[book_id] = (fingerprint[:2] + (fingerprint[2] + count,), postings)
+
+    def invalidate(self, book_id: str):
+        with self._lock:
+            self._books.pop(book_id, None)
+
+
+class Lexicon:
+    """
+    lexicon_entries tablosunun kitap bazlı cache’i.
+
+    Worker başka process’te olabileceği için her
+    uygulamada tablonun parmak izi (satır sayısı + son
+    updated_at) kontrol edilir; tek index’li sorgu,
+    chunk sentezinin yanında önemsiz.
+    """
+
+    def __init__(self):
+        # book_id -> (parmak izi, kurallar)
+        self._rules: Dict[str, Tuple[tuple, LexiconRules]] = {}
+
+    def _fingerprint(self, db, book_id: str) -> tuple:
+        return tuple(
+            db.query(func.count(), func.max(LexiconEntry.updated_at))
+            .select_from(LexiconEntry)
+            .filter(LexiconEntry.book_id == book_id)
+            .one()
+        )
+
+    def entries(self, db, book_id: str) -> Dict[str, str]:
+        rows = (
+            db.query(LexiconEntry.term, LexiconEntry.replacement)
+            .filter(LexiconEntry.book_id == book_id)
+            .order_by(LexiconEntry.term)
+        )
+        return {term: replacement for term, replacement in rows}
+
+    def rules(self, book_id: str) -> LexiconRules:
+        with SessionLocal() as db:
+            fingerprint = self._fingerprint(db, book_id)
+            cached = self._rules.get(book_id)
+            if cached is not None and cached[0] == fingerprint:
+                return cached[1]
+            rules = LexiconRules(self.entries(db, book_id) if fingerprint[0] else {})
+
+        self._rules[book_id] = (fingerprint, rules)
+        return rules
+
+    def apply(self, book_id: str, text: str) -> str:
+        """
+        Sentezlenecek metin (DB’deki chunk metni değişmez).
+        """
+        return self.rules(book_id).apply(text)
+
+    def forget(self, book_id: str):
+        self._rules.pop(book_id, None)
+
+
+# Global singleton instances
+chunk_terms = ChunkTermIndex()
+lexicon = Lexicon()
@@ -1,49 +1,166 @@
+import time
 import httpx
 import logging
+from typing import List, Optional
+from sqlalchemy import bindparam, func, or_, update
 from sqlalchemy.orm import Session
-from app.models.book import Book, Chunk
+from app.models.book import Book, Chunk, ChunkWork
 from app.core.database import SessionLocal
+from app.core.metrics import LLM_ERRORS, LLM_REQUEST_SECONDS
+from app.services.emotion_profiles import emotion_profiles
 
 logger = logging.getLogger(__name__)
 
+# Kitap analizi bu boyutta parçalarla okunur
+ANALYSIS_BATCH = 32
+
+
+def needs_analysis(chunk: ChunkWork) -> bool:
+    return not chunk.emotion_analyzed and chunk.emotion == "neutral"
+
 
 class LlamaEmotionService:
     def __init__(self, base_url: str = "http://localhost:11434"):
         self.base_url = base_url
-        self.system_prompt = (
-            "Sen bir duygu analiz uzmanısın. Sana verilen metni analiz et ve "
-            "SADECE şu dört kelimeden birini dön: happy, sad, neutral , excited. "
-            "Asla açıklama yapma, sadece tek bir kelime yaz."
-        )
+        self.system_prompt = None
+
+        # Etiket kümesi duygu profillerinden gelir; profil
+        # eklenince / silinince prompt yeniden kurulur
+        emotion_profiles.on_change(self._reset_prompt)
+
+    def _reset_prompt(self):
+        self.system_prompt = None
+
+    def _prompt(self) -> str:
+        if self.system_prompt is None:
+            self.system_prompt = (
+                "Sen bir duygu analiz uzmanısın. Sana verilen metni analiz et ve "
+                f"SADECE şu kelimelerden birini dön: {', '.join(emotion_profiles.emotions())}. "
+                "Asla açıklama yapma, sadece tek bir kelime yaz."
+            )
+        return self.system_prompt
 
     async def analyze_book_emotions(self, book_id: str):
-        with SessionLocal() as db:
-            chunks = db.query(Chunk).filter(
-                Chunk.book_id == book_id,
-                Chunk.emotion == "neutral"
-            ).order_by(Chunk.index).all()
+        # Kitap ANALYSIS_BATCH’lik parçalar halinde, index
+        # sırasıyla (keyset) okunur; her parça kendi kısa
+        # session’ında yazılır, bellek kitap boyundan bağımsız
+        analyzed = 0
+        last_index = -1
+        while True:
+            with SessionLocal() as db:
+                batch = [
+                    ChunkWork(*row)
+                    for row in db.query(*ChunkWork.columns())
+                    .filter(
+                        Chunk.book_id == book_id,
+                        Chunk.emotion == "neutral",
+                        or_(Chunk.emotion_analyzed.is_(None), Chunk.emotion_analyzed.is_(False)),
+                        Chunk.index > last_index,
+                    )
+                    .order_by(Chunk.index)
+                    .limit(ANALYSIS_BATCH)
+                ]
+                if not batch:
+                    break
+
+                if analyzed == 0:
+                    logger.info(f"Llama 3 analizi başlıyor | book={book_id}")
+
+                await self.analyze_chunks(db, batch)
+
+            analyzed += len(batch)
+            last_index = batch[-1].index
 
-            if not chunks:
-                logger.info(f"Kitap {book_id} için analiz edilecek parça kalmadı.")
-                return
+        if not analyzed:
+            logger.info(f"Kitap {book_id} için analiz edilecek parça kalmadı.")
+            return
 
-            logger.info(f"Llama 3 analizi başlıyor: {len(chunks)} parça işlenecek.")
+        logger.info(f"Kitap {book_id} duygu analizi tamamlandı: {analyzed} parça.")
 
-            for chunk in chunks:
-                emotion = await self._get_emotion(chunk.text)
-                chunk.emotion = emotion
-                db.commit()
+    async def analyze_chunks(self, db: Session, chunks: List[ChunkWork]) -> List[ChunkWork]:
+        """
+        Sadece verilen chunk’ları analiz eder.
+        Worker, sentezlemek üzere seçtiği pencere için
+        çağırır; böylece tüm kitabın analizi beklenmez.
 
-            logger.info(f"Kitap {book_id} duygu analizi tamamlandı.")
+        Sonuçlar (neutral dahil) tek toplu UPDATE ile yazılır
+        ve chunk analiz edildi işaretlenir; bir daha LLM’e
+        gitmez. Arada düzenlenen (revision değişen) ya da
+        duygusu elle verilen chunk’lar ezilmez. LLM cevap
+        vermezse chunk işaretlenmez, sonra tekrar denenir.
+        Güncellenmiş liste döner.
+        """
+        found = {}
+        for chunk in chunks:
+            if not needs_analysis(chunk):
+                continue
+            emotion = await self._get_emotion(chunk.text)
+            if emotion is not None:
+                found[chunk.id] = (emotion, chunk.revision or 0)
 
-    async def _get_emotion(self, text: str) -> str:
+        if not found:
+            return chunks
+
+        table = Chunk.__table__
+        db.execute(
+            update(table)
+            .where(
+                table.c.id == bindparam("b_id"),
+                func.coalesce(table.c.revision, 0) == bindparam("b_revision"),
+                table.c.emotion == "neutral",
+            )
+            .values(emotion=bindparam("b_emotion"), emotion_analyzed=True),
+            [
+                {"b_id": chunk_id, "b_revision": revision, "b_emotion": emotion}
+                for chunk_id, (emotion, revision) in found.items()
+            ],
+        )
+        db.commit()
+        return [
+            chunk._replace(emotion=found[chunk.id][0], emotion_analyzed=True) if chunk.id in found else chunk
+            for chunk in chunks
+        ]
+
+    # Etiket; LLM cevap vermediyse None (analiz edilmedi)
+    async def _get_emotion(self, text: str) -> Optional[str]:
+        result = await self._generate(f"{self._prompt()}\n\nMetin: {text}")
+        if result is None:
+            return None
+
+        result = "".join(filter(str.isalpha, result.lower()))
+        return result if result in emotion_profiles.emotions() else "neutral"
+
+    async def get_speaker(self, text: str, context: str, candidates: List[str]) -> Optional[str]:
+        """
+        Diyalog chunk’ında konuşanın adı; bilinmiyorsa None.
+        context: önceki chunk (konuşmanın gidişatı),
+        candidates: kitapta daha önce bulunan konuşanlar.
+        """
+        known = f"Bilinen karakterler: {', '.join(candidates)}. " if candidates else ""
+        prompt = (
+            "Sen bir roman editörüsün. Aşağıdaki bölümde tırnak içindeki sözü "
+            f"kimin söylediğini bul. {known}"
+            "SADECE konuşanın adını yaz; bilinmiyorsa 'bilinmiyor' yaz.\n\n"
+            f"Önceki metin: {context}\n\nMetin: {text}"
+        )
+        result = await self._generate(prompt)
+        if not result:
+            return None
+
+        name = result.strip().strip(".\"'“”").split("\n")[0].strip()
+        if not name or name.lower() in ("bilinmiyor", "anlatıcı") or len(name) > 40:
+            return None
+        return name
+
+    async def _generate(self, prompt: str) -> Optional[str]:
+        start = time.perf_counter()
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
                 response = await client.post(
                     f"{self.base_url}/api/generate",
                     json={
                         "model": "llama3.1:8b-instruct-q5_K_M",
-                        "prompt": f"{self.system_prompt}\n\nMetin: {text}",
+                        "prompt": prompt,
                         "stream": False,
                         "options": {
                             "temperature": 0.1,
@@ -51,16 +168,15 @@ class LlamaEmotionService:
                         }
                     }
                 )
+                LLM_REQUEST_SECONDS.observe(time.perf_counter() - start)
                 if response.status_code == 200:
-                    result = response.json().get("response", "neutral").strip().lower()
-                    result = "".join(filter(str.isalpha, result))
-
-                    if result in ["happy", "sad", "angry", "neutral"]:
-                        return result
-                return "neutral"
+                    return response.json().get("response", "").strip()
+                LLM_ERRORS.inc()
+                return None
         except Exception as e:
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - start)
+            LLM_ERRORS.inc()
             logger.error(f"Llama API bağlantı hatası: {e}")
-            return "neutral"
-
+            return None
 
 llama_service = LlamaEmotionService()
\ No newline at end of file
@@ -0,0 +1,142 @@
+import contextlib
+import logging
+
+from app.core.constants import INFERENCE_PRECISION, TORCH_INTEROP_THREADS, TORCH_THREADS
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# CPU INFERENCE HASSASİYETİ
+#
+# INFERENCE_PRECISION:
+#   fp32 : varsayılan, model olduğu gibi
+#   int8 : Linear katmanlarına dinamik int8 quantization
+#          (ağırlıklar int8, aktivasyonlar çalışırken
+#          quantize edilir). XTTS’in GPT kısmı HF GPT2
+#          Conv1D kullandığı için bunlar önce eşdeğer
+#          nn.Linear’a çevrilir; aksi halde quantize
+#          edilecek katmanların çoğu atlanır.
+#   bf16 : torch.autocast(bfloat16). Sadece CPU bf16
+#          destekliyorsa (AVX512-BF16 / AMX); yoksa emüle
+#          edilen bf16 fp32’den yavaş olduğu için fp32’ye
+#          düşülür.
+#
+# TORCH_THREADS: worker başına intra-op thread sayısı.
+# Aynı makinede N worker varsa çekirdek / N önerilir.
+# ======================================================
+
+PRECISIONS = ("fp32", "int8", "bf16")
+
+
+def apply_thread_settings(torch) -> dict:
+    if TORCH_THREADS > 0:
+        torch.set_num_threads(TORCH_THREADS)
+    if TORCH_INTEROP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(TORCH_INTEROP_THREADS)
+        except RuntimeError:
+            # Paralel iş başladıktan sonra değiştirilemez
+            logger.warning("TORCH_INTEROP_THREADS uygulanamadı (torch zaten başlatılmış)")
+    return {"threads": torch.get_num_threads(), "interop_threads": torch.get_num_interop_threads()}
+
+
+def convert_conv1d_to_linear(torch, module) -> int:
+    """
+    HF GPT2 Conv1D (x @ W + b, W: [in, out]) katmanlarını
+    aynı sonucu veren nn.Linear (W.T) ile değiştirir.
+    """
+    converted = 0
+    for name, child in list(module.named_children()):
+        if type(child).__name__ == "Conv1D" and hasattr(child, "nf"):
+            in_features, out_features = child.weight.shape
+            linear = torch.nn.Linear(in_features, out_features, bias=child.bias is not None)
+            with torch.no_grad():
+                linear.weight.copy_(child.weight.t())
+                if child.bias is not None:
+                    linear.bias.copy_(child.bias)
+            setattr(module, name, linear)
+            converted += 1
+        else:
+            converted += convert_conv1d_to_linear(torch, child)
+    return converted
+
+
+def quantize_int8(torch, model) -> dict:
+    """
+    XTTS modelinin Linear katmanlarını yerinde int8’e çevirir.
+    """
+    converted = convert_conv1d_to_linear(torch, model)
+
+    quantized = 0
+    for name, child in list(model.named_children()):
+        new_child = torch.ao.quantization.quantize_dynamic(
+            child, {torch.nn.Linear}, dtype=torch.qint8
+        )
+        if new_child is not child:
+            setattr(model, name, new_child)
+        quantized += sum(
+            1 for m in new_child.modules()
+            if type(m).__module__.startswith("torch.ao.nn.quantized")
+        )
+    return {"conv1d_converted": converted, "linear_quantized": quantized}
+
+
+def bf16_supported(torch) -> bool:
+    check = getattr(getattr(torch, "cpu", None), "_is_avx512_bf16_supported", None)
+    amx = getattr(getattr(torch, "cpu", None), "_is_amx_tile_supported", None)
+    try:
+        return bool((check and check()) or (amx and amx()))
+    except Exception:
+        return False
+
+
+def configure_model(tts, device: str, precision: str = INFERENCE_PRECISION) -> dict:
+    """
+    Yüklenmiş modele thread ve hassasiyet ayarlarını uygular.
+    Dönüş: gerçekten uygulanan ayarlar (readiness / bench için).
+    """
+    import torch
+
+    info = apply_thread_settings(torch)
+
+    if precision not in PRECISIONS:
+        logger.warning(f"Bilinmeyen INFERENCE_PRECISION={precision}, fp32 kullanılıyor")
+        precision = "fp32"
+
+    if precision != "fp32" and device != "cpu":
+        logger.info(f"{precision} sadece CPU’da uygulanır; {device} üzerinde fp32")
+        precision = "fp32"
+
+    if precision == "bf16" and not bf16_supported(torch):
+        logger.warning("CPU bf16 desteklemiyor, fp32 kullanılıyor")
+        precision = "fp32"
+
+    if precision == "int8":
+        model = getattr(getattr(tts, "synthesizer", None), "tts_model", None)
+        if model is None:
+            logger.warning("int8: XTTS modeli bulunamadı, fp32 kullanılıyor")
+            precision = "fp32"
+        else:
+            model.eval()
+            info.update(quantize_int8(torch, model))
+
+    info["precision"] = precision
+    logger.info(f"Inference ayarları | {info}")
+    return info
+
+
+def inference_context(precision: str):
+    """
+    Sentez çağrılarını saran context: inference_mode
+    (+ bf16 ise autocast). torch yoksa (stub backend) boş.
+    """
+    try:
+        import torch
+    except ImportError:
+        return contextlib.nullcontext()
+
+    stack = contextlib.ExitStack()
+    stack.enter_context(torch.inference_mode())
+    if precision == "bf16":
+        stack.enter_context(torch.autocast("cpu", dtype=torch.bfloat16))
+    return stack
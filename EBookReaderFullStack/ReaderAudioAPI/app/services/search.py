@@ -0,0 +1,276 @@
+import re
+import logging
+import unicodedata
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import inspect, text
+
+from app.core.database import IS_SQLITE, engine
+from app.models.book import Chunk
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# CHUNK METNİNDE TAM METİN ARAMA
+#
+# SQLite’ta FTS5 external-content tablosu:
+#
+#   chunk_fts(text)  rowid = chunks.id
+#
+# Metin chunks tablosunda kalır (kopyalanmaz); indeks
+# chunks üzerindeki trigger’larla güncellenir. Böylece
+# parse (tek tek INSERT), aynı EPUB kopyalama (INSERT ...
+# SELECT), metin düzenleme ve toplu silme ayrı kod
+# gerektirmez. Sadece text kolonu değişince indekslenir;
+# status / duration güncellemeleri indekse dokunmaz.
+#
+# Tokenizer unicode61 + remove_diacritics: "cocuk"
+# araması "çocuk"u da bulur.
+#
+# Kitap içi aramada sorgu kitabın rowid aralığıyla
+# sınırlanır; FTS5 posting listelerinde bu aralığa atlar,
+# kütüphanenin geri kalanını taramaz.
+#
+# Diğer veritabanlarında (DATABASE_URL) ILIKE’a düşer.
+# ======================================================
+
+FTS_TABLE = "chunk_fts"
+
+FTS_DDL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text,
+        content='chunks',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS chunks_fts_update AFTER UPDATE OF text ON chunks BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+)
+
+QUERY_TOKEN = re.compile(r"\w+")
+
+# Sorgudaki en fazla kelime sayısı
+MAX_TERMS = 8
+
+# Kesitteki kelime sayısı
+SNIPPET_TOKENS = 12
+
+def query_words(query: str) -> List[str]:
+    return QUERY_TOKEN.findall(query)[:MAX_TERMS]
+
+
+def match_expression(words: List[str]) -> str:
+    """
+    Sorgu kelimeleri → FTS5 MATCH ifadesi.
+
+    Kelimeler tırnaklanır (FTS5 sözdizimi / operatör
+    enjeksiyonu yok), hepsi aranır (AND); son kelime
+    önek olarak eşleşir ("yürü" → "yürüdü").
+    """
+    parts = [f'"{word}"' for word in words]
+    parts[-1] += "*"
+    return " ".join(parts)
+
+
+def _fold(word: str) -> str:
+    """
+    Tokenizer’daki karşılaştırma: küçük harf, aksansız
+    ("Çocuğu" → "cocugu"). Türkçe ı / İ de i’ye iner.
+    """
+    word = word.replace("İ", "i").replace("I", "i").lower().replace("ı", "i")
+    return "".join(ch for ch in unicodedata.normalize("NFD", word) if not unicodedata.combining(ch))
+
+
+def highlight(body: str, words: List[str], width: int = SNIPPET_TOKENS) -> str:
+    """
+    Eşleşen kelimeleri <mark> ile işaretler, ilk eşleşmenin
+    çevresindeki ~width kelimelik kesiti döner (FTS5
+    snippet() ile aynı biçim).
+    """
+    body = body or ""
+    folded = [_fold(word) for word in words]
+    exact, prefix = set(folded[:-1]), folded[-1]
+
+    tokens = list(QUERY_TOKEN.finditer(body))
+    if not tokens:
+        return body
+
+    keys = [_fold(token.group()) for token in tokens]
+    hits = [i for i, key in enumerate(keys) if key in exact or key.startswith(prefix)]
+
+    first = hits[0] if hits else 0
+    lo = max(0, min(first - width // 4, len(tokens) - width))
+    hi = min(len(tokens), lo + width)
+    marked = set(hits)
+
+    parts = ["…" if lo else ""]
+    cursor = tokens[lo].start()
+    for i in range(lo, hi):
+        token = tokens[i]
+        parts.append(body[cursor:token.start()])
+        parts.append(f"<mark>{token.group()}</mark>" if i in marked else token.group())
+        cursor = token.end()
+    parts.append(body[cursor:] if hi == len(tokens) else "…")
+    return "".join(parts)
+
+
+def ensure_index():
+    """
+    FTS tablosunu ve trigger’ları kurar. Tablo yeni
+    oluşturulduysa mevcut chunk’lar bir kere indekslenir.
+    """
+    if not IS_SQLITE:
+        return
+
+    created = not inspect(engine).has_table(FTS_TABLE)
+    with engine.begin() as conn:
+        for statement in FTS_DDL:
+            conn.execute(text(statement))
+        if created:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+            logger.info("Arama indeksi kuruldu (mevcut chunk’lar indekslendi)")
+
+
+class ChunkSearch:
+    """
+    Kitap / kütüphane araması + sesteki başlangıç anı.
+    """
+
+    def __init__(self, fts: bool = IS_SQLITE):
+        self.fts = fts
+
+    # -------------------------------------------------
+    # Eşleşen chunk’lar: (book_id, index, chapter, text)
+    #
+    # Kitap içinde: chunk sırası, kitabın rowid aralığında.
+    # Kütüphanede: bütün eşleşmeler üzerinde bm25
+    # sıralaması (ORDER BY rank LIMIT). Puanlama sadece
+    # FTS indeksinden okur; metin ve chunk satırı yalnız
+    # dönen sayfa için açılır.
+    #
+    # FTS5 snippet() her satırda eşleşmeyi yeniden açar
+    # (önekli sorguda satır başına ms’ler); kesit dönen
+    # satırların metninden highlight() ile üretilir.
+    # -------------------------------------------------
+    def _fts_rows(self, db, words: List[str], book_id: Optional[str], limit: int, offset: int):
+        params = {"q": match_expression(words), "limit": limit, "offset": offset}
+
+        if book_id is not None:
+            lo, hi = db.execute(
+                text("SELECT min(id), max(id) FROM chunks WHERE book_id = :book_id"),
+                {"book_id": book_id},
+            ).one()
+            if lo is None:
+                return []
+            params.update(lo=lo, hi=hi, book_id=book_id)
+            sql = f"""
+                SELECT c.book_id, c."index", c.chapter, c.text
+                FROM {FTS_TABLE}
+                JOIN chunks AS c ON c.id = {FTS_TABLE}.rowid
+                WHERE {FTS_TABLE} MATCH :q
+                  AND {FTS_TABLE}.rowid BETWEEN :lo AND :hi
+                  AND c.book_id = :book_id
+                ORDER BY c."index"
+                LIMIT :limit OFFSET :offset
+            """
+        else:
+            sql = f"""
+                WITH top AS (
+                    SELECT rowid AS id, rank AS score
+                    FROM {FTS_TABLE}
+                    WHERE {FTS_TABLE} MATCH :q
+                    ORDER BY rank
+                    LIMIT :limit OFFSET :offset
+                )
+                SELECT c.book_id, c."index", c.chapter, c.text
+                FROM top
+                JOIN chunks AS c ON c.id = top.id
+                ORDER BY top.score
+            """
+        return db.execute(text(sql), params).all()
+
+    def _like_rows(self, db, words: List[str], book_id: Optional[str], limit: int, offset: int):
+        rows = db.query(Chunk.book_id, Chunk.index, Chunk.chapter, Chunk.text).filter(
+            *[Chunk.text.ilike(f"%{word}%") for word in words]
+        )
+        if book_id is not None:
+            rows = rows.filter(Chunk.book_id == book_id)
+        return rows.order_by(Chunk.book_id, Chunk.index).offset(offset).limit(limit).all()
+
+    # -------------------------------------------------
+    # Chunk index → kitap sesindeki başlangıç (saniye)
+    #
+    # Tamamlanmış chunk sürelerinin kümülatif toplamı
+    # (altyazı ofsetleriyle aynı hesap). Sentezlenmemiş
+    # chunk’ta None.
+    # -------------------------------------------------
+    def _starts(self, db, book_id: str, indexes: List[int]) -> Dict[int, Optional[float]]:
+        rows = (
+            db.query(Chunk.index, Chunk.duration)
+            .filter(Chunk.book_id == book_id, Chunk.status == "completed")
+            .order_by(Chunk.index)
+            .all()
+        )
+        if not rows:
+            return {index: None for index in indexes}
+
+        completed = np.fromiter((index for index, _ in rows), dtype=np.int64, count=len(rows))
+        durations = np.fromiter((d or 0.0 for _, d in rows), dtype=np.float64, count=len(rows))
+        starts = np.concatenate(([0.0], np.cumsum(durations)))
+
+        positions = np.searchsorted(completed, indexes)
+        result = {}
+        for index, pos in zip(indexes, positions):
+            done = pos < len(completed) and completed[pos] == index
+            result[index] = round(float(starts[pos]), 3) if done else None
+        return result
+
+    def search(
+        self, db, query: str, book_id: Optional[str] = None,
+        limit: int = 20, offset: int = 0,
+    ) -> List[dict]:
+        words = query_words(query)
+        if not words:
+            return []
+
+        if self.fts:
+            rows = self._fts_rows(db, words, book_id, limit, offset)
+        else:
+            rows = self._like_rows(db, words, book_id, limit, offset)
+
+        by_book: Dict[str, List[int]] = {}
+        for hit_book, index, _, _ in rows:
+            by_book.setdefault(hit_book, []).append(index)
+        starts = {b: self._starts(db, b, indexes) for b, indexes in by_book.items()}
+
+        return [
+            {
+                "book_id": hit_book,
+                "index": index,
+                "chapter": chapter,
+                "snippet": highlight(body, words),
+                "start": starts[hit_book][index],
+            }
+            for hit_book, index, chapter, body in rows
+        ]
+
+
+# Global singleton instance
+chunk_search = ChunkSearch()
@@ -0,0 +1,151 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.constants import SETTINGS_TTL
+from app.core.database import IS_SQLITE, SessionLocal
+from app.models.user_setting import UserSetting
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# KULLANICI AYARLARI
+#
+# user_settings tablosu (key → JSON) okunma sıklığına
+# göre çok seyrek yazılır. Tablo tek seferde çözülüp
+# bellekte tutulur:
+#
+# - snapshot : key → çözülmüş değer (dict)
+# - json     : GET /settings cevabı, hazır byte’lar (+ ETag)
+#
+# Yazma tek bir INSERT ... ON CONFLICT DO UPDATE ile
+# yapılır ve snapshot hemen güncellenir. Başka process’in
+# (worker) yazdıkları en geç SETTINGS_TTL saniyede görülür.
+# ======================================================
+
+
+def _upsert_statement(rows):
+    insert = sqlite.insert if IS_SQLITE else postgresql.insert
+    stmt = insert(UserSetting).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserSetting.key],
+        set_={"value": stmt.excluded.value},
+    )
+
+
+class SettingsStore:
+    """
+    user_settings tablosunun bellek içi snapshot’ı.
+    """
+
+    def __init__(self, ttl: float = SETTINGS_TTL):
+        self.ttl = ttl
+
+        self._snapshot: Dict[str, Any] = {}
+        self.settings_json = b"{}"
+        self.etag = '"empty"'
+
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _publish(self, snapshot: Dict[str, Any]):
+        settings_json = json.dumps(snapshot, ensure_ascii=False).encode("utf-8")
+
+        # Tek seferde değiştir: okuyucular yarım snapshot görmez
+        self._snapshot = snapshot
+        self.settings_json = settings_json
+        self.etag = '"' + hashlib.sha1(settings_json).hexdigest() + '"'
+        self._loaded_at = time.monotonic()
+
+    def reload(self):
+        with SessionLocal() as db:
+            rows = db.query(UserSetting.key, UserSetting.value).all()
+
+        snapshot = {}
+        for key, value in rows:
+            try:
+                snapshot[key] = json.loads(value)
+            except (TypeError, ValueError):
+                logger.warning(f"Ayar çözülemedi, atlandı: {key}")
+        self._publish(snapshot)
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def _ensure_fresh(self):
+        loaded_at = self._loaded_at
+        if loaded_at is not None and time.monotonic() - loaded_at < self.ttl:
+            return
+        with self._lock:
+            if self._loaded_at is loaded_at:
+                self.reload()
+
+    # -------------------------------------------------
+    # Okuma (DB’ye gitmez, TTL dolduysa bir kez yeniler)
+    # -------------------------------------------------
+    def snapshot(self) -> Dict[str, Any]:
+        self._ensure_fresh()
+        return self._snapshot
+
+    def response(self):
+        """
+        (JSON byte’ları, ETag) — GET /settings için.
+        """
+        self._ensure_fresh()
+        return self.settings_json, self.etag
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.snapshot().get(key, default)
+
+    # -------------------------------------------------
+    # Tipli erişim: hatalı tipte kayıt default’a düşer
+    # -------------------------------------------------
+    def get_str(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        value = self.get(key)
+        return value if isinstance(value, str) and value else default
+
+    def get_float(self, key: str, default: Optional[float] = None) -> Optional[float]:
+        value = self.get(key)
+        if isinstance(value, bool) or value is None:
+            return default
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return default
+
+    def get_int(self, key: str, default: Optional[int] = None) -> Optional[int]:
+        value = self.get_float(key)
+        return int(value) if value is not None else default
+
+    def get_bool(self, key: str, default: Optional[bool] = None) -> Optional[bool]:
+        value = self.get(key)
+        return value if isinstance(value, bool) else default
+
+    # -------------------------------------------------
+    # Toplu yazma: tek statement, tek commit
+    # -------------------------------------------------
+    def update(self, values: Dict[str, Any]):
+        if not values:
+            return
+
+        rows = [{"key": key, "value": json.dumps(value)} for key, value in values.items()]
+        with SessionLocal() as db:
+            db.execute(_upsert_statement(rows))
+            db.commit()
+
+        with self._lock:
+            # Yazılan değerler bilindiği için DB tekrar okunmaz;
+            # TTL dolmuşsa diğer process’lerin yazdıkları da alınır
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self.reload()
+            else:
+                self._publish({**self._snapshot, **values})
+
+
+# Global singleton instance
+settings_store = SettingsStore()
@@ -0,0 +1,205 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from typing import Dict, Iterator, Optional, Tuple
+
+from app.core.constants import EXPORT_DIR, GC_GRACE_SECONDS, GC_SWEEP_INTERVAL, UPLOAD_DIR
+from app.core.database import SessionLocal
+from app.models.book import Book
+from app.services.audio_index import INDEX_DIR, audio_index
+from app.services.audio_store import AUDIO_DIR, PACK_DIR, audio_store
+from app.services.book_stats import book_stats
+from app.services.subtitles import SUBTITLE_DIR, subtitle_engine
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# DEPOLAMA TEMİZLİĞİ (GC)
+#
+# Kitaba ait tüm türetilmiş dosyalar dosya adındaki
+# book_id’den tanınır:
+#
+#   audio/     {id}_{index}.wav, {id}_{index}.wav.{pid}.tmp,
+#              full_{id}.wav, video_{id}.mp4, list_{id}.txt,
+#              {id}.mp4, {id}.{mode}.{key}.mp4, {id}_list.txt
+#   packs/     {id}.pack, {id}.pidx
+#   index/     {id}.idx
+#   subtitles/ {id}.*
+#   uploads/   {id}.epub
+#   exports/   {id}.{bölüm}.{hash}.m4a|mp3|opus, {id}.{key}.m4b|mp3.zip|opus.zip
+#
+# Kitap silinince DB satırları toplu silinir, dosyalar
+# arka planda tek klasör taramasıyla kaldırılır.
+# Periyodik sweep DB’de karşılığı olmayan (yarıda kalmış
+# silme, silme sırasında biten sentez) dosyaları temizler.
+# ======================================================
+
+ASSET_DIRS = (AUDIO_DIR, PACK_DIR, INDEX_DIR, SUBTITLE_DIR, UPLOAD_DIR, EXPORT_DIR)
+
+# book_id uuid4; önekli / sonekli tüm varyantlar
+BOOK_FILE = re.compile(
+    r"^(?:full_|video_|list_)?"
+    r"(?P<book_id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})"
+    r"(?:[._].*)?$"
+)
+
+
+def book_id_of(name: str) -> Optional[str]:
+    match = BOOK_FILE.match(name)
+    return match.group("book_id") if match else None
+
+
+def _scan(directories=ASSET_DIRS) -> Iterator[Tuple[str, os.DirEntry]]:
+    """
+    (book_id, entry) çiftleri; kitaba ait olmayan dosyalar atlanır.
+    """
+    for directory in directories:
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                book_id = book_id_of(entry.name)
+                if book_id and entry.is_file(follow_symlinks=False):
+                    yield book_id, entry
+
+
+def _remove(entry: os.DirEntry) -> int:
+    try:
+        size = entry.stat(follow_symlinks=False).st_size
+        os.remove(entry.path)
+        return size
+    except OSError:
+        return -1
+
+
+class StorageGC:
+    """
+    Kitap dosyalarının silinmesi, yetim dosya taraması
+    ve kitap bazlı disk kullanımı.
+    """
+
+    def __init__(self):
+        self.last_sweep: Dict = {}
+        self._sweep_task = None
+
+    # -------------------------------------------------
+    # Kitabın tüm dosyalarını siler (thread içinde)
+    # -------------------------------------------------
+    def purge_book(self, book_id: str) -> Dict[str, int]:
+        start = time.perf_counter()
+
+        audio_index.invalidate(book_id)
+        audio_store.forget(book_id)
+        subtitle_engine.invalidate(book_id)
+
+        files = freed = 0
+        for owner, entry in _scan():
+            if owner != book_id:
+                continue
+            size = _remove(entry)
+            if size >= 0:
+                files += 1
+                freed += size
+
+        logger.info(
+            f"Kitap dosyaları silindi | book={book_id} | {files} dosya | "
+            f"{freed / 1e6:.1f} MB | {time.perf_counter() - start:.2f}s"
+        )
+        return {"files": files, "bytes": freed}
+
+    async def purge_book_async(self, book_id: str):
+        try:
+            await asyncio.to_thread(self.purge_book, book_id)
+        except Exception as e:
+            # Kalan dosyaları periyodik sweep toplar
+            logger.error(f"Kitap dosyaları silinemedi: {book_id} | {e}")
+
+    # -------------------------------------------------
+    # Kitap bazlı disk kullanımı
+    #
+    # Dönüş: {book_id: {"files": n, "bytes": b}}
+    # -------------------------------------------------
+    def usage(self, book_id: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        usage: Dict[str, Dict[str, int]] = {}
+        for owner, entry in _scan():
+            if book_id and owner != book_id:
+                continue
+            try:
+                size = entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                continue
+            row = usage.setdefault(owner, {"files": 0, "bytes": 0})
+            row["files"] += 1
+            row["bytes"] += size
+        return usage
+
+    # -------------------------------------------------
+    # DB’de kitabı olmayan dosyaları siler.
+    #
+    # GC_GRACE_SECONDS’tan yeni dosyalara dokunulmaz:
+    # upload EPUB’u Book satırı commit edilmeden önce
+    # diske yazılır.
+    #
+    # Aynı taramada bilinen kitapların disk kullanımı
+    # toplanır ve book_stats’a yazılır.
+    # -------------------------------------------------
+    def sweep(self, grace: float = GC_GRACE_SECONDS) -> Dict:
+        start = time.perf_counter()
+        with SessionLocal() as db:
+            known = {book_id for (book_id,) in db.query(Book.id)}
+
+        cutoff = time.time() - grace
+        orphans = set()
+        usage: Dict[str, int] = {}
+        files = freed = 0
+        for owner, entry in _scan():
+            try:
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if owner in known:
+                usage[owner] = usage.get(owner, 0) + stat.st_size
+                continue
+            if stat.st_mtime > cutoff:
+                continue
+            size = _remove(entry)
+            if size >= 0:
+                orphans.add(owner)
+                files += 1
+                freed += size
+
+        for owner in orphans:
+            audio_index.invalidate(owner)
+            audio_store.forget(owner)
+
+        with SessionLocal() as db:
+            book_stats.set_bytes(db, usage)
+
+        self.last_sweep = {
+            "at": time.time(),
+            "books": len(orphans),
+            "files": files,
+            "bytes": freed,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        if files:
+            logger.info(f"Yetim dosyalar silindi | {self.last_sweep}")
+        return self.last_sweep
+
+    async def _sweep_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception as e:
+                logger.error(f"Depolama taraması hatası: {e}")
+
+    async def start_sweeper(self, interval: float = GC_SWEEP_INTERVAL):
+        if self._sweep_task is None and interval > 0:
+            self._sweep_task = asyncio.create_task(self._sweep_loop(interval))
+
+
+# Global singleton instance
+storage_gc = StorageGC()
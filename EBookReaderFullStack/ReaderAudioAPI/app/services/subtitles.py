@@ -0,0 +1,207 @@
+import os
+import glob
+import uuid
+import hashlib
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy import and_, case, func
+
+from app.core.database import SessionLocal
+from app.models.book import Chunk
+from app.utils.srt import iter_sentence_cues, iter_srt, iter_vtt, iter_word_cues
+
+SUBTITLE_DIR = os.path.join("oas_assets", "subtitles")
+
+FORMATS = {
+    "srt": ("application/x-subrip; charset=utf-8", iter_srt),
+    "vtt": ("text/vtt; charset=utf-8", iter_vtt),
+}
+
+MODES = {
+    "sentence": iter_sentence_cues,
+    "word": iter_word_cues,
+}
+
+# Satırlar DB’den bu boyutta partiler halinde okunur
+ROW_BATCH = 500
+
+
+class SubtitleEngine:
+    """
+    Tek altyazı motoru (SRT / WebVTT, cümle / kelime).
+
+    - Sadece gereken kolonlar okunur (ORM nesnesi yok),
+      satırlar yield_per ile partiler halinde gelir
+    - Çıktı üretildikçe yield edilir ve aynı anda cache
+      dosyasına yazılır; 10k chunk’lık kitap da sabit bellek
+    - Cache anahtarı aralığın parmak izini içerir; chunk’lar
+      değişince (yeni sentez, düzenleme) otomatik geçersizleşir
+    """
+
+    def __init__(self, cache_dir: str = SUBTITLE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # -------------------------------------------------
+    # Bölüm → chunk index aralığı
+    # -------------------------------------------------
+    def _resolve_range(self, db, book_id, chapter, start, end) -> Tuple[Optional[int], Optional[int]]:
+        if chapter is None:
+            return start, end
+
+        lo, hi = (
+            db.query(func.min(Chunk.index), func.max(Chunk.index))
+            .filter(Chunk.book_id == book_id, Chunk.chapter == chapter)
+            .one()
+        )
+        if lo is None:
+            return 0, -1
+        return lo, hi
+
+    def _in_range(self, start, end):
+        conditions = [Chunk.status == "completed"]
+        if start is not None:
+            conditions.append(Chunk.index >= start)
+        if end is not None:
+            conditions.append(Chunk.index <= end)
+        return conditions
+
+    # -------------------------------------------------
+    # Aralığın zaman ofseti + parmak izi (tek sorgu)
+    #
+    # Ofset: aralıktan önceki tamamlanmış chunk’ların
+    # toplam süresi (tam kitap sesindeki başlangıç anı).
+    # Kelime zamanları sentezden sonra geldiği için
+    # hizalanmış chunk sayısı da parmak izine girer;
+    # düzenlenen chunk’lar revision toplamını değiştirir.
+    # -------------------------------------------------
+    def _fingerprint(self, db, book_id, start, end) -> Tuple[float, str]:
+        in_range = and_(*self._in_range(start, end))
+        columns = [
+            func.count(case((in_range, 1))),
+            func.count(case((and_(in_range, Chunk.word_timestamps.isnot(None)), 1))),
+            func.sum(case((in_range, Chunk.duration))),
+            func.max(case((in_range, Chunk.id))),
+            func.sum(case((in_range, func.coalesce(Chunk.revision, 0)))),
+        ]
+        if start is not None:
+            before = and_(Chunk.status == "completed", Chunk.index < start)
+            columns.append(func.sum(case((before, func.coalesce(Chunk.duration, 0.0)))))
+
+        row = db.query(*columns).filter(Chunk.book_id == book_id).one()
+        count, aligned, total, max_id, revisions = row[:5]
+        offset = float(row[5] or 0.0) if start is not None else 0.0
+
+        raw = f"{offset:.3f}|{count}|{aligned}|{(total or 0):.3f}|{max_id}|{revisions or 0}"
+        return offset, hashlib.sha1(raw.encode()).hexdigest()[:12]
+
+    # -------------------------------------------------
+    # İstek → (aralık, ofset, cache yolu)
+    # -------------------------------------------------
+    def _plan(self, db, book_id, fmt, mode, chapter, start, end):
+        start, end = self._resolve_range(db, book_id, chapter, start, end)
+        offset, fingerprint = self._fingerprint(db, book_id, start, end)
+
+        range_key = "all" if start is None and end is None else f"{start}-{end}"
+        prefix = os.path.join(self.cache_dir, f"{book_id}.{range_key}.{mode}")
+        return start, end, offset, prefix, f"{prefix}.{fingerprint}.{fmt}"
+
+    # -------------------------------------------------
+    # Satır akışı (sadece gereken kolonlar)
+    # -------------------------------------------------
+    def _rows(self, db, book_id, mode, start, end):
+        columns = [Chunk.index, Chunk.text, Chunk.duration]
+        if mode == "word":
+            columns.append(Chunk.word_timestamps)
+
+        return (
+            db.query(*columns)
+            .filter(Chunk.book_id == book_id, *self._in_range(start, end))
+            .order_by(Chunk.index)
+            .yield_per(ROW_BATCH)
+        )
+
+    def _generate(self, db, book_id, fmt, mode, start, end, offset, prefix, cache_path):
+        _, render = FORMATS[fmt]
+        cues_for = MODES[mode]
+
+        # Aynı altyazıyı aynı anda üreten istekler (iki stream,
+        # stream + download-full) ayrı geçici dosyaya yazar
+        tmp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                rows = self._rows(db, book_id, mode, start, end)
+                for piece in render(cues_for(rows, offset)):
+                    f.write(piece)
+                    yield piece
+
+            os.replace(tmp_path, cache_path)
+
+            # Aynı aralığın eski sürümleri silinir
+            for stale in glob.glob(f"{glob.escape(prefix)}.*.{fmt}"):
+                if stale != cache_path:
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stream(
+        self,
+        book_id: str,
+        fmt: str = "srt",
+        mode: str = "sentence",
+        chapter: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> Iterator[str]:
+        """
+        Altyazıyı parça parça üretir. Geçerli cache varsa
+        dosyadan okunur, yoksa üretirken cache’e yazılır.
+        """
+        with SessionLocal() as db:
+            start, end, offset, prefix, cache_path = self._plan(db, book_id, fmt, mode, chapter, start, end)
+
+            if os.path.exists(cache_path):
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    while block := f.read(64 * 1024):
+                        yield block
+                return
+
+            yield from self._generate(db, book_id, fmt, mode, start, end, offset, prefix, cache_path)
+
+    def ensure_file(
+        self,
+        book_id: str,
+        fmt: str = "srt",
+        mode: str = "sentence",
+        chapter: Optional[int] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> str:
+        """
+        Altyazı cache dosyasının yolunu döner, yoksa üretir
+        (ffmpeg subtitles filtresi gibi dosya isteyen yerler için).
+        """
+        with SessionLocal() as db:
+            start, end, offset, prefix, cache_path = self._plan(db, book_id, fmt, mode, chapter, start, end)
+            if not os.path.exists(cache_path):
+                for _ in self._generate(db, book_id, fmt, mode, start, end, offset, prefix, cache_path):
+                    pass
+        return cache_path
+
+    def invalidate(self, book_id: str):
+        """
+        Kitabın tüm altyazı cache’ini siler.
+        """
+        for path in glob.glob(os.path.join(self.cache_dir, f"{glob.escape(book_id)}.*")):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+# Global singleton instance
+subtitle_engine = SubtitleEngine()
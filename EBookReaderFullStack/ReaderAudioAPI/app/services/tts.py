@@ -1,27 +1,60 @@
 import os
-import torch
 import asyncio
 import logging
 import time
 import wave
+import struct
+import threading
+from collections import OrderedDict
 
-from TTS.api import TTS
+import numpy as np
+
+from app.core.constants import (
+    AUDIO_POSTPROCESS,
+    AUDIO_STORAGE,
+    EXPORT_PREBUILD,
+    JOB_POLL_INTERVAL,
+    LATENT_CACHE_SIZE,
+    PREFETCH_WINDOW,
+    STREAM_CHUNK_SIZE,
+)
 from app.core.database import SessionLocal
-from app.models.book import Book, Chunk
+from app.core.profiling import profile_stage
+from app.core.metrics import (
+    ALIGNMENT_SECONDS,
+    TTS_FIRST_AUDIO_SECONDS,
+    AUDIO_POST_SECONDS,
+    QUEUE_DEPTH,
+    TTS_CHUNKS,
+    TTS_REAL_TIME_FACTOR,
+    TTS_SYNTHESIS_SECONDS,
+)
+from app.core.workers import run_cpu
+from app.services.alignment import align_samples
+from app.services.audio_index import audio_index
+from app.services.audio_store import audio_store, read_wav_layout
+from app.services.audio_post import postprocess_wav
+from app.services.book_stats import book_stats
+from app.services.dialogue import dialogue_service
+from app.services.emotion_profiles import emotion_profiles
+from app.services.exports import exporter
+from app.models.book import Book, Chunk, ChunkWork
+from app.services.job_queue import job_queue, local_owner_dead, make_worker_id
+from app.services.lexicon import lexicon
 from app.services.llama_emotion import llama_service
+from app.services.precision import configure_model, inference_context
+from app.services.voice_registry import voice_registry
 
 logger = logging.getLogger(__name__)
 
 
 # -------------------------------------------------
-# Bu fonksiyon ileride duyguya göre
-# noktalama / duraksama eklemek için bırakıldı.
-# Şu an XTTS zaten noktalama hassas olduğu için
-# metni olduğu gibi döndürüyoruz.
+# Metin tarafında duyguya göre noktalama / duraksama
+# eklemek için bırakıldı. XTTS zaten noktalama hassas
+# olduğu için metin olduğu gibi döner.
 #
-# Örnek ileride:
-# sad  -> "..." uzatmaları
-# angry -> daha sert kesmeler
+# Chunk’lar arası duyguya bağlı duraksamalar ses
+# tarafında eklenir (duygu profilindeki "pause").
 # -------------------------------------------------
 def apply_emotion_pauses(text: str, emotion: str) -> str:
     return text
@@ -31,26 +64,62 @@ def apply_emotion_pauses(text: str, emotion: str) -> str:
 # WAV dosyasının süresini saniye cinsinden okur.
 # Chunk sürelerini DB’ye yazmak için kullanılır.
 # Video / SRT senkronu için kritik.
+#
+# Sadece RIFF başlığı okunur (ses verisi açılmaz).
 # -------------------------------------------------
 def get_wav_duration_seconds(path: str):
     try:
-        with wave.open(path, "rb") as wf:
-            frames = wf.getnframes()
-            rate = wf.getframerate()
-            return frames / float(rate) if rate else None
+        channels, rate, width, _, nbytes = read_wav_layout(path)
+        return nbytes / float(rate * channels * width) if rate else None
     except Exception as e:
         logger.warning(f"WAV duration okunamadı: {path} | {e}")
         return None
 
 
+# Isındırma sentezinde kullanılan kısa cümle
+WARMUP_TEXT = "Merhaba, hazırım."
+
+# Streaming backend’i olmayan modelde dosyadan okuma bloğu
+STREAM_BLOCK_FRAMES = 4096
+
+
+# -------------------------------------------------
+# Boyutu bilinmeyen stream için WAV header
+# (RIFF / data boyutları maksimum yazılır)
+# -------------------------------------------------
+def streaming_wav_header(rate: int, channels: int = 1, sampwidth: int = 2) -> bytes:
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 0xFFFFFFFF, b"WAVE",
+        b"fmt ", 16, 1, channels, rate,
+        rate * channels * sampwidth, channels * sampwidth, sampwidth * 8,
+        b"data", 0xFFFFFFFF - 36,
+    )
+
+
+def pcm16(samples) -> bytes:
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+
+def write_pcm16(file_path: str, rate: int, pcm: bytes):
+    with wave.open(file_path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm)
+
+
 class TTSService:
     """
     XTTS v2 tabanlı merkezi TTS servisi.
 
     - Singleton çalışır (tek model instance)
-    - Async queue üzerinden kitap bazlı iş alır
+    - Kalıcı jobs tablosundan (job_queue) kitap /
+      pencere işi lease’ler; API process’inde ya da
+      ayrı worker process’lerinde koşabilir
     - Chunk → WAV üretir
     - Emotion + speaker wav destekler
+    - Diyalogda chunk bazlı ses (Chunk.voice_id)
     """
 
     _instance = None
@@ -69,27 +138,60 @@ class TTSService:
         if self.initialized:
             return
 
-        # CUDA varsa GPU kullanılır
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        # CUDA varsa GPU kullanılır. torch import’u pahalı
+        # olduğu için cihaz model yüklenirken belirlenir.
+        self.device = None
+
+        # Model durumu (/health/ready):
+        # cold → loading → loaded → warming → ready | failed
+        self.model_state = "cold"
+        self.model_error = None
+        self.model_timings = {}
+
+        # Uygulanan inference ayarları (precision, threads)
+        self.precision = "fp32"
+        self.inference = {}
 
         # Üretilen WAV’lerin yazıldığı klasör
         self.output_dir = "oas_assets/audio"
 
-        # Referans seslerin olduğu klasör
-        # Format: voice_emotion.wav
-        self.speakers_dir = os.path.join("app", "speakers")
-
         os.makedirs(self.output_dir, exist_ok=True)
 
-        # Async iş kuyruğu (kitap ID alır)
-        self.queue = asyncio.Queue()
+        # İşler kalıcı jobs tablosunda (job_queue);
+        # kuyruk derinliği /metrics’te oradan okunur
+        QUEUE_DEPTH.set_function(job_queue.depth)
+
+        # Bu process’in worker kimliği (lease sahibi)
+        self.worker_id = make_worker_id()
 
-        # Worker task (tek worker yeterli)
+        # Embedded worker task (WORKER_MODE=embedded)
         self.worker_task = None
 
+        # Bu process’te sentezlenmekte olan chunk id’leri
+        # (kapanışta "pending"e geri döner)
+        self.claimed_chunks = set()
+
+        # Arka planda koşan kelime hizalama işleri
+        self.alignment_tasks = set()
+
         # XTTS model instance (lazy load)
         self.tts = None
 
+        # Model aynı anda tek thread’den kullanılır
+        # (worker sentezi / speak now stream’i)
+        self.model_lock = threading.RLock()
+
+        # (speaker wav, mtime, size) -> conditioning latents
+        # (LRU, LATENT_CACHE_SIZE referans WAV)
+        self.latent_cache = OrderedDict()
+
+        # Worker’ın latent hesapladığı katalog durumu
+        self.latents_etag = None
+        self.latent_versions = {}
+
+        # Devam eden speak now işleri
+        self.speak_tasks = set()
+
         self.initialized = True
 
 
@@ -100,52 +202,118 @@ class TTSService:
     #   voice_emotion.wav
     #   voice_neutral.wav
     #
-    # Örn:
-    #   canan_happy.wav
-    #   canan_neutral.wav
+    # Katalog bellekte tutulur (voice_registry),
+    # burada disk erişimi olmaz.
     # -------------------------------------------------
     def resolve_speaker_wav(self, voice_id: str, emotion: str) -> str | None:
-
-        voice_id = voice_id.lower().replace(" ", "_")
-        emotion = emotion.lower()
-
-        primary = os.path.join(self.speakers_dir, f"{voice_id}_{emotion}.wav")
-        fallback = os.path.join(self.speakers_dir, f"{voice_id}_neutral.wav")
-
-        if os.path.exists(primary):
-            return primary
-
-        if os.path.exists(fallback):
-            return fallback
-
-        return None
+        return voice_registry.resolve(voice_id, emotion)
 
 
     # -------------------------------------------------
-    # Worker’ı başlatır
+    # Embedded worker’ı başlatır (WORKER_MODE=embedded)
     # App startup’ta bir kere çağrılması yeterli
     # -------------------------------------------------
     async def start_worker(self):
         if self.worker_task is None:
-            self.worker_task = asyncio.create_task(self._worker())
-            logger.info(
-                f"TTS Worker başlatıldı | Device={self.device}"
+            self._recover_orphaned_chunks()
+            self.worker_task = asyncio.create_task(self.run_worker())
+
+    # -------------------------------------------------
+    # Ölmüş process’lerin yarıda kalan chunk’ları
+    #
+    # Sadece sahibi bu host’ta artık olmayan (ya da sahibi
+    # kaydedilmemiş, eski sürüm) chunk’lar "pending"e döner.
+    # Yan yana koşan API / worker process’lerinin chunk’larına
+    # dokunulmaz; başka host’takiler lease devralınca döner.
+    # -------------------------------------------------
+    def _recover_orphaned_chunks(self):
+        with SessionLocal() as db:
+            owners = [
+                owner for (owner,) in db.query(Chunk.claimed_by)
+                .filter(Chunk.status == "processing")
+                .distinct()
+            ]
+            dead = [owner for owner in owners if owner is not None and local_owner_dead(owner)]
+            orphaned = Chunk.claimed_by.in_(dead) if dead else None
+            if None in owners:
+                unowned = Chunk.claimed_by.is_(None)
+                orphaned = unowned if orphaned is None else (orphaned | unowned)
+            if orphaned is None:
+                return
+
+            recovered = db.query(Chunk).filter(Chunk.status == "processing", orphaned).update(
+                {"status": "pending", "claimed_by": None}, synchronize_session=False
             )
+            db.commit()
+        if recovered:
+            logger.info(f"Yarıda kalan {recovered} chunk tekrar sıraya girdi")
+
+    async def stop_worker(self):
+        if self.worker_task is not None:
+            self.worker_task.cancel()
+            self.worker_task = None
+        if self.claimed_chunks:
+            with SessionLocal() as db:
+                db.query(Chunk).filter(
+                    Chunk.id.in_(list(self.claimed_chunks)),
+                    Chunk.status == "processing",
+                ).update({"status": "pending", "claimed_by": None}, synchronize_session=False)
+                db.commit()
+            self.claimed_chunks.clear()
+
+        released = job_queue.release_owned(self.worker_id)
+        if released:
+            logger.info(f"{released} iş kuyruğa geri bırakıldı")
 
 
     # -------------------------------------------------
     # Sonsuz dönen worker
-    # Queue’dan kitap ID alır
+    #
+    # jobs tablosundan iş lease’ler; kuyruk boşsa
+    # JOB_POLL_INTERVAL bekler. Embedded task olarak ya da
+    # python -m app.worker ile ayrı process’te koşar.
     # -------------------------------------------------
-    async def _worker(self):
+    async def run_worker(self):
+        logger.info(f"TTS Worker başlatıldı | id={self.worker_id}")
         while True:
-            book_id = await self.queue.get()
             try:
-                await self.process_book(book_id)
+                job = job_queue.claim(self.worker_id)
             except Exception as e:
-                logger.error(f"Worker hatası: {e}", exc_info=True)
-            finally:
-                self.queue.task_done()
+                logger.error(f"İş alınamadı: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await self._refresh_latents()
+                except Exception as e:
+                    logger.error(f"Speaker latent’ları hesaplanamadı: {e}")
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+                continue
+
+            await self._run_job(job)
+
+    async def _heartbeat(self, job_id: int):
+        while True:
+            await asyncio.sleep(max(1.0, job_queue.lease_seconds / 3))
+            if not job_queue.heartbeat(job_id, self.worker_id):
+                logger.warning(f"Lease kaybedildi | job={job_id}")
+                return
+
+    async def _run_job(self, job):
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            if job.kind == "window":
+                await self._process_window(job.book_id, job.position or 0)
+            else:
+                await self.process_book(job.book_id)
+            job_queue.complete(job.id, self.worker_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Worker hatası | job={job.id}: {e}", exc_info=True)
+            job_queue.fail(job.id, self.worker_id, str(e))
+        finally:
+            heartbeat.cancel()
 
 
     # -------------------------------------------------
@@ -153,131 +321,794 @@ class TTSService:
     # EPUB parse bittikten sonra çağrılır
     # -------------------------------------------------
     async def add_to_queue(self, book_id: str):
-        await self.queue.put(book_id)
+        job_queue.enqueue_book(book_id)
+
+
+    # -------------------------------------------------
+    # Okuyucunun konumunu bildirir
+    #
+    # Konumun kendisi Book.last_chunk_index’te; kitabı
+    # işleyen worker her chunk’tan sonra oradan okur.
+    # Kitap şu an işlenmiyorsa konumdan itibaren bir
+    # pencerelik öncelikli iş açılır (sırasını beklemez).
+    # -------------------------------------------------
+    async def report_position(self, book_id: str, index: int, resume: bool = True):
+        job_queue.request_window(book_id, index)
+
+        # Kitap hiç kuyruğa girmediyse (ör. eski kayıt)
+        # kitabı kuyruğa da ekleriz
+        if resume:
+            job_queue.enqueue_book(book_id)
+
+
+    # -------------------------------------------------
+    # XTTS model lazy-load
+    #
+    # Worker ve "speak now" stream’i farklı thread’lerden
+    # çağırabildiği için model_lock altında yüklenir.
+    # torch ve Coqui TTS ilk kez burada import edilir;
+    # API process’i bunları yüklemeden ayağa kalkar.
+    # -------------------------------------------------
+    def _ensure_model(self):
+        with self.model_lock:
+            if self.tts is not None:
+                if self.model_state == "cold":
+                    # bench/ stub synthesizer’ı self.tts’e doğrudan atar
+                    self.model_state = "loaded"
+                return
+
+            self.model_state = "loading"
+            start = time.perf_counter()
+            try:
+                import torch
+                from TTS.api import TTS
+
+                self.device = "cuda" if torch.cuda.is_available() else "cpu"
+
+                logger.info(f"XTTS v2 yükleniyor... | Device={self.device}")
+                self.tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
+                if self.device == "cuda":
+                    self.tts.to(self.device)
+                    logger.info("CUDA aktif")
+
+                # int8 / bf16 + torch thread ayarları
+                self.inference = configure_model(self.tts, self.device)
+                self.precision = self.inference["precision"]
+            except Exception as e:
+                self.model_state = "failed"
+                self.model_error = str(e)
+                raise
+
+            self.model_timings["load_seconds"] = round(time.perf_counter() - start, 3)
+            self.model_state = "loaded"
+
+    def _inference_mode(self):
+        # inference_mode (+ bf16 autocast); stub backend’lerde
+        # torch hiç yüklenmeyebilir
+        return inference_context(self.precision)
+
+
+    # -------------------------------------------------
+    # Arka planda model ısındırma (STARTUP_MODE=warm)
+    #
+    # 1) Model yüklenir
+    # 2) Kısa bir cümle sentezlenir (ilk inference’ın
+    #    kernel / JIT maliyeti burada ödenir)
+    # 3) Katalogdaki tüm speaker WAV’ları için
+    #    conditioning latent’ları hesaplanır
+    # -------------------------------------------------
+    def _warm_up(self):
+        self._ensure_model()
+        self.model_state = "warming"
+
+        speakers = voice_registry.speaker_paths()
+        if speakers:
+            start = time.perf_counter()
+            file_path = os.path.join(self.output_dir, f"_warmup_{os.getpid()}.wav")
+            try:
+                _, settings = emotion_profiles.resolve(None, "neutral")
+                self._synthesize(WARMUP_TEXT, speakers[0], file_path, settings)
+            finally:
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+            self.model_timings["first_inference_seconds"] = round(time.perf_counter() - start, 3)
+
+        model = self._xtts_model()
+        if model is not None:
+            start = time.perf_counter()
+            with self.model_lock, self._inference_mode():
+                for speaker_wav in speakers:
+                    self.conditioning_latents(model, speaker_wav)
+            self.model_timings["latents_seconds"] = round(time.perf_counter() - start, 3)
+            self.model_timings["latents"] = len(speakers)
+
+        self.model_state = "ready"
+
+    async def warm_up(self):
+        try:
+            start = time.perf_counter()
+            await asyncio.to_thread(self._warm_up)
+            logger.info(
+                f"Model hazır ({time.perf_counter() - start:.2f}s) | {self.model_timings}"
+            )
+        except Exception as e:
+            self.model_state = "failed"
+            self.model_error = str(e)
+            logger.error(f"Model ısındırma hatası: {e}", exc_info=True)
+
+    def readiness(self) -> dict:
+        return {
+            "model": self.model_state,
+            "device": self.device,
+            "error": self.model_error,
+            "timings": self.model_timings,
+            "inference": self.inference,
+        }
+
+
+    # -------------------------------------------------
+    # Sıradaki sentez penceresini seçer
+    #
+    # Önce okuyucunun konumundan itibaren ileriye doğru
+    # pending chunk’lar, bunlar bitince (wrap=True ise)
+    # konumun gerisinde kalanlar.
+    #
+    # ORM nesnesi değil ChunkWork satırları döner: kitap
+    # ne kadar büyük olursa olsun worker’ın session’ında
+    # sadece o anki pencere kadar veri vardır.
+    # -------------------------------------------------
+    def _next_window(self, db, book_id: str, position: int, wrap: bool = True):
+        pending = db.query(*ChunkWork.columns()).filter(
+            Chunk.book_id == book_id,
+            Chunk.status == "pending"
+        )
+
+        window = (
+            pending.filter(Chunk.index >= position)
+            .order_by(Chunk.index)
+            .limit(PREFETCH_WINDOW)
+            .all()
+        )
+
+        if not window and wrap and position > 0:
+            window = (
+                pending.filter(Chunk.index < position)
+                .order_by(Chunk.index)
+                .limit(PREFETCH_WINDOW)
+                .all()
+            )
+
+        return [ChunkWork(*row) for row in window]
+
+    def _load_work(self, db, chunk_id: int) -> ChunkWork | None:
+        row = db.query(*ChunkWork.columns()).filter(Chunk.id == chunk_id).first()
+        return ChunkWork(*row) if row else None
+
+    def _mark_failed(self, db, chunk_id: int):
+        db.rollback()
+        db.query(Chunk).filter(Chunk.id == chunk_id).update(
+            {"status": "failed"}, synchronize_session=False
+        )
+        db.commit()
+        TTS_CHUNKS.inc(status="failed")
+
+
+    # -------------------------------------------------
+    # Chunk için duygu, sentez ayarları ve speaker wav
+    #
+    # Ayarlar emotion_profiles cache’inden okunur; profil
+    # düzenlemeleri bir sonraki chunk’ta geçerli olur.
+    # -------------------------------------------------
+    def _voice_settings(self, chunk: ChunkWork, voice_id: str):
+        emotion, settings = emotion_profiles.resolve(voice_id, chunk.emotion)
+
+        speaker_wav = self.resolve_speaker_wav(voice_id, emotion)
+        if not speaker_wav:
+            raise FileNotFoundError(
+                f"Speaker WAV yok | voice={voice_id} emotion={emotion}"
+            )
+
+        return emotion, settings, speaker_wav
+
+    # -------------------------------------------------
+    # Chunk’ı okuyan ses: diyalog atfıyla oyuncu
+    # listesinden gelen ses (Chunk.voice_id), yoksa
+    # kitabın sesi. Katalogdan silinmiş ses kitabın
+    # sesine düşer.
+    # -------------------------------------------------
+    def _chunk_voice(self, chunk: ChunkWork, book_voice: str) -> str:
+        voice_id = chunk.voice_id
+        if not voice_id or voice_id == book_voice:
+            return book_voice
+        if self.resolve_speaker_wav(voice_id, "neutral") is None:
+            logger.warning(f"Ses katalogda yok, kitabın sesi kullanılıyor | voice={voice_id}")
+            return book_voice
+        return voice_id
+
+    # -------------------------------------------------
+    # Pencerenin sentez sırası
+    #
+    # Chunk’lar (ses, duygu) gruplarıyla sentezlenir:
+    # grup boyunca aynı referans WAV’ın latent’ı ve aynı
+    # ayarlar kullanılır. Gruplar ilk chunk’larının
+    # sırasıyla gelir; okuyucu konumundaki chunk (pencerenin
+    # ilki) ilk grubun başında, her zaman ilk sentezlenir.
+    # Her chunk kendi index’li dosyasına yazıldığı için
+    # çıktı sırası değişmez.
+    # -------------------------------------------------
+    def _synthesis_order(self, window, book_voice: str):
+        groups = OrderedDict()
+        for chunk in window:
+            key = (chunk.voice_id or book_voice, chunk.emotion)
+            groups.setdefault(key, []).append(chunk)
+        return [chunk for group in groups.values() for chunk in group]
+
+    def _chunk_path(self, book_id: str, index: int) -> str:
+        return os.path.join(self.output_dir, f"{book_id}_{index}.wav")
+
+
+    # -------------------------------------------------
+    # Tek chunk sentezi (thread içinde çalışır)
+    #
+    # XTTS’te speaker latent’ları cache’ten gelir
+    # (tts_to_file her çağrıda referans WAV’ı yeniden
+    # işler); diğer backend’lerde tts_to_file.
+    # -------------------------------------------------
+    def _synthesize(self, text: str, speaker_wav: str, file_path: str, settings: dict):
+        model = self._xtts_model()
+
+        # Torch inference mode (gradients kapalı)
+        with self.model_lock, self._inference_mode():
+            if model is not None:
+                gpt_cond_latent, speaker_embedding = self.conditioning_latents(model, speaker_wav)
+                out = model.inference(
+                    text,
+                    "tr",
+                    gpt_cond_latent,
+                    speaker_embedding,
+                    speed=settings["speed"],
+                    temperature=settings["temperature"],
+                    top_k=settings["top_k"],
+                    top_p=settings["top_p"],
+                    repetition_penalty=settings["repetition_penalty"],
+                    length_penalty=settings["length_penalty"],
+                    enable_text_splitting=settings["enable_text_splitting"],
+                )
+                wav = np.asarray(out["wav"], dtype=np.float32).reshape(-1)
+                write_pcm16(file_path, model.config.audio.output_sample_rate, pcm16(wav))
+                return
+
+            self.tts.tts_to_file(
+                text=text,
+                speaker_wav=speaker_wav,
+                language="tr",
+                file_path=file_path,
+                split_sentences=settings["enable_text_splitting"],
+                speed=settings["speed"],
+                temperature=settings["temperature"],
+                top_k=settings["top_k"],
+                top_p=settings["top_p"],
+                repetition_penalty=settings["repetition_penalty"],
+                length_penalty=settings["length_penalty"],
+            )
+
+
+    # -------------------------------------------------
+    # Sentezlenmiş WAV → işleme → duration → DB
+    #
+    # Worker ve "speak now" stream’i ortak kullanır.
+    # revision: sentez başladığında chunk’ın revision’ı;
+    # değiştiyse sonuç yazılmaz (False döner).
+    # -------------------------------------------------
+    async def _finalize_chunk(
+        self, db, book_id: str, chunk: ChunkWork, file_path: str,
+        voice_id: str, emotion: str, pause: float, synth_elapsed: float, revision: int | None
+    ):
+        TTS_SYNTHESIS_SECONDS.observe(synth_elapsed, voice=voice_id, emotion=emotion)
+
+        # Kırpma + loudness + duraksama, ardından
+        # WAV süresi (SRT / video için)
+        duration = await self._postprocess(file_path, pause)
+
+        values = {"audio_path": file_path, "status": "completed"}
+        if duration:
+            values["duration"] = float(duration)
+
+        # Tek UPDATE, revision koşullu: sentez sürerken chunk
+        # düzenlendiyse ses eskidir; satır tutmaz, chunk
+        # "pending" kalır, yeni metinle tekrar sentezlenir
+        updated = db.query(Chunk).filter(
+            Chunk.id == chunk.id,
+            Chunk.revision == revision,
+        ).update(values, synchronize_session=False)
+        if updated:
+            book_stats.add_bytes(
+                db, book_id, os.path.getsize(file_path) if os.path.exists(file_path) else 0
+            )
+        db.commit()
+
+        if not updated:
+            logger.info(f"Chunk sentez sırasında düzenlendi, tekrar sıraya girdi | Chunk={chunk.index}")
+            return False
+
+        if duration:
+            TTS_REAL_TIME_FACTOR.observe(
+                synth_elapsed / duration, voice=voice_id, emotion=emotion
+            )
+        TTS_CHUNKS.inc(status="completed")
+        audio_index.mark_stale(book_id)
+
+        # Bölümün son chunk’ı: bölüm arka planda encode
+        # edilir (offline paketler)
+        if EXPORT_PREBUILD and self._chapter_finished(db, book_id, chunk.chapter):
+            exporter.schedule(book_id)
+
+        self._schedule_alignment(chunk.id, book_id, chunk.index, chunk.text)
+        return True
+
+    def _chapter_finished(self, db, book_id: str, chapter: int | None) -> bool:
+        same_chapter = Chunk.chapter.is_(None) if chapter is None else Chunk.chapter == chapter
+        return db.query(Chunk.id).filter(
+            Chunk.book_id == book_id,
+            same_chapter,
+            Chunk.status != "completed",
+        ).first() is None
+
+
+    # -------------------------------------------------
+    # Chunk → WAV → duration → DB
+    #
+    # Sentez event loop’u bloklamasın diye thread’de
+    # çalışır; bu sırada konum bildirimleri alınabilir.
+    # -------------------------------------------------
+    async def _synthesize_chunk(self, db, book_id: str, chunk: ChunkWork, voice_id: str):
+        # Pencere seçildikten sonra chunk başka bir worker’da
+        # ya da "speak now" ile sentezlenmiş olabilir; chunk
+        # atomik olarak "processing" yapılamazsa atlanır
+        if not self.claim_chunk(db, chunk, statuses=("pending",)):
+            return
+
+        self.claimed_chunks.add(chunk.id)
+        try:
+            start_time = time.time()
+
+            # Satır claim’den sonra tekrar okunur: pencere
+            # seçildikten sonraki düzenlemeler (metin, duygu)
+            # burada görülür
+            chunk = self._load_work(db, chunk.id) or chunk
+            revision = chunk.revision
+            voice_id = self._chunk_voice(chunk, voice_id)
+            emotion, settings, speaker_wav = self._voice_settings(chunk, voice_id)
+
+            processed_text = apply_emotion_pauses(lexicon.apply(book_id, chunk.text), emotion)
+            file_path = self._chunk_path(book_id, chunk.index)
+
+            logger.info(
+                f"Sentez | Chunk={chunk.index} | "
+                f"Voice={voice_id} | Emotion={emotion} | "
+                f"Speaker={os.path.basename(speaker_wav)}"
+            )
+
+            synth_start = time.perf_counter()
+            await asyncio.to_thread(
+                self._synthesize, processed_text, speaker_wav, file_path, settings
+            )
+
+            finalized = await self._finalize_chunk(
+                db, book_id, chunk, file_path, voice_id, emotion, settings["pause"],
+                time.perf_counter() - synth_start, revision
+            )
+
+            if finalized:
+                logger.info(
+                    f"Chunk {chunk.index} tamamlandı "
+                    f"({time.time() - start_time:.2f}s)"
+                )
+
+        except Exception as e:
+            logger.error(
+                f"Sentez hatası | Chunk {chunk.index}: {e}",
+                exc_info=True
+            )
+            self._mark_failed(db, chunk.id)
+        finally:
+            self.claimed_chunks.discard(chunk.id)
+
+
+    # -------------------------------------------------
+    # "Speak now": tek chunk’ın streaming sentezi
+    #
+    # XTTS inference_stream ile üretilen ses parçaları
+    # üretildikçe istemciye gönderilir (ilk ses < 1 sn,
+    # model sıcakken). Speaker conditioning latent’ları
+    # cache’lenir. Sonuç normal chunk WAV’ı olarak da
+    # kaydedilir; istemci koparsa sentez yine tamamlanır.
+    # -------------------------------------------------
+    def pick_speak_chunk(self, db, book_id: str, index: int | None = None) -> Chunk | None:
+        if index is not None:
+            return db.query(Chunk).filter(
+                Chunk.book_id == book_id,
+                Chunk.index == index
+            ).first()
+
+        book = db.query(Book).filter(Book.id == book_id).first()
+        position = (book.last_chunk_index if book else 0) or 0
+        window = self._next_window(db, book_id, position)
+        return db.get(Chunk, window[0].id) if window else None
+
+    def claim_chunk(self, db, chunk, statuses=("pending", "failed")) -> bool:
+        """
+        Chunk’ı atomik olarak "processing" yapar. Başka bir
+        worker / stream sentezliyorsa ya da bitmişse False.
+        """
+        claimed = db.query(Chunk).filter(
+            Chunk.id == chunk.id,
+            Chunk.status.in_(statuses)
+        ).update({"status": "processing", "claimed_by": self.worker_id}, synchronize_session=False)
+        db.commit()
+        return bool(claimed)
+
+    def _xtts_model(self):
+        synthesizer = getattr(self.tts, "synthesizer", None)
+        model = getattr(synthesizer, "tts_model", None)
+        return model if hasattr(model, "inference_stream") else None
+
+    # -------------------------------------------------
+    # Verilen speaker WAV’larının latent’larını önceden
+    # hesaplar. Model bu process’te yüklü değilse 0 döner
+    # (sadece ses eklemek için model yüklenmez).
+    # -------------------------------------------------
+    def precompute_latents(self, paths) -> int:
+        model = self._xtts_model()
+        if model is None:
+            return 0
+
+        paths = list(paths)[-LATENT_CACHE_SIZE:]
+        with self.model_lock, self._inference_mode():
+            for speaker_wav in paths:
+                self.conditioning_latents(model, speaker_wav)
+        return len(paths)
+
+    # -------------------------------------------------
+    # Katalogda yeni / değişen speaker WAV’ı varsa
+    # latent’ları iş aralarında hesaplanır (ses başka
+    # process’te eklendiyse ilk chunk beklemesin)
+    # -------------------------------------------------
+    async def _refresh_latents(self):
+        if voice_registry.etag == self.latents_etag:
+            return
+        first = self.latents_etag is None
+        self.latents_etag = voice_registry.etag
+
+        versions = voice_registry.versions()
+        changed = [path for path, version in versions.items() if self.latent_versions.get(path) != version]
+        self.latent_versions = versions
+        if first or not changed:
+            # Açılıştaki katalog warm_up’ta / ilk kullanımda
+            return
+
+        count = await asyncio.to_thread(self.precompute_latents, changed)
+        if count:
+            logger.info(f"Yeni speaker latent’ları hesaplandı | {count} dosya")
+
+    def conditioning_latents(self, model, speaker_wav: str):
+        st = os.stat(speaker_wav)
+        key = (speaker_wav, st.st_mtime_ns, st.st_size)
+
+        latents = self.latent_cache.get(key)
+        if latents is not None:
+            self.latent_cache.move_to_end(key)
+            return latents
+
+        # tts_to_file ile aynı referans ayarları (model config)
+        config = model.config
+        latents = model.get_conditioning_latents(
+            audio_path=[speaker_wav],
+            gpt_cond_len=getattr(config, "gpt_cond_len", 30),
+            gpt_cond_chunk_len=getattr(config, "gpt_cond_chunk_len", 6),
+            max_ref_length=getattr(config, "max_ref_len", 30),
+            sound_norm_refs=getattr(config, "sound_norm_refs", False),
+        )
+        self.latent_cache[key] = latents
+        while len(self.latent_cache) > LATENT_CACHE_SIZE:
+            self.latent_cache.popitem(last=False)
+        return latents
+
+    def _stream_synthesize(self, text: str, speaker_wav: str, file_path: str, settings: dict, emit):
+        """
+        Thread içinde çalışır. emit(bytes) ile PCM16 parçaları
+        event loop’a aktarılır, sonunda WAV dosyası yazılır.
+        """
+        self._ensure_model()
+        model = self._xtts_model()
+
+        # Streaming desteklemeyen backend: dosyaya sentez,
+        # ardından dosya parça parça gönderilir
+        if model is None:
+            self._synthesize(text, speaker_wav, file_path, settings)
+            with wave.open(file_path, "rb") as wf:
+                rate = wf.getframerate()
+                emit(rate, None)
+                while block := wf.readframes(STREAM_BLOCK_FRAMES):
+                    emit(rate, block)
+            return
+
+        rate = model.config.audio.output_sample_rate
+        emit(rate, None)
+
+        pieces = []
+        with self.model_lock, self._inference_mode():
+            gpt_cond_latent, speaker_embedding = self.conditioning_latents(model, speaker_wav)
+            for frame in model.inference_stream(
+                text,
+                "tr",
+                gpt_cond_latent,
+                speaker_embedding,
+                stream_chunk_size=STREAM_CHUNK_SIZE,
+                speed=settings["speed"],
+                temperature=settings["temperature"],
+                top_k=settings["top_k"],
+                top_p=settings["top_p"],
+                repetition_penalty=settings["repetition_penalty"],
+                length_penalty=settings["length_penalty"],
+                enable_text_splitting=settings["enable_text_splitting"],
+            ):
+                pcm = pcm16(frame.squeeze().float().cpu().numpy())
+                pieces.append(pcm)
+                emit(rate, pcm)
+
+        write_pcm16(file_path, rate, b"".join(pieces))
+
+    async def _speak(self, book_id: str, chunk_id: int, voice_id: str, frames: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        request_start = time.perf_counter()
+        first = []
+
+        def emit(rate, pcm):
+            if pcm is not None and not first:
+                first.append(True)
+                TTS_FIRST_AUDIO_SECONDS.observe(time.perf_counter() - request_start)
+            loop.call_soon_threadsafe(frames.put_nowait, (rate, pcm))
+
+        with SessionLocal() as db:
+            chunk = self._load_work(db, chunk_id)
+            self.claimed_chunks.add(chunk_id)
+            try:
+                revision = chunk.revision
+                voice_id = self._chunk_voice(chunk, voice_id)
+                emotion, settings, speaker_wav = self._voice_settings(chunk, voice_id)
+                file_path = self._chunk_path(book_id, chunk.index)
+
+                logger.info(f"Speak now | book={book_id} | Chunk={chunk.index} | Emotion={emotion}")
+
+                synth_start = time.perf_counter()
+                await asyncio.to_thread(
+                    self._stream_synthesize,
+                    apply_emotion_pauses(lexicon.apply(book_id, chunk.text), emotion),
+                    speaker_wav, file_path, settings, emit
+                )
+
+                await self._finalize_chunk(
+                    db, book_id, chunk, file_path, voice_id, emotion, settings["pause"],
+                    time.perf_counter() - synth_start, revision
+                )
+            except Exception as e:
+                logger.error(f"Speak now hatası | Chunk {chunk.index}: {e}", exc_info=True)
+                self._mark_failed(db, chunk_id)
+            finally:
+                self.claimed_chunks.discard(chunk_id)
+                frames.put_nowait(None)
+
+    async def stream_chunk(self, book_id: str, chunk_id: int, voice_id: str):
+        """
+        claim_chunk ile alınmış chunk’ı stream eder.
+        WAV header (boyut bilinmediği için maksimum) + PCM.
+        """
+        frames = asyncio.Queue()
+        task = asyncio.create_task(self._speak(book_id, chunk_id, voice_id, frames))
+        self.speak_tasks.add(task)
+        task.add_done_callback(self.speak_tasks.discard)
+
+        while (item := await frames.get()) is not None:
+            rate, pcm = item
+            yield streaming_wav_header(rate) if pcm is None else pcm
+
+
+    # -------------------------------------------------
+    # Sentez sonrası ses işleme (CPU pool’da)
+    #
+    # İşlenmiş WAV’ın süresini döner. Kapalıysa ya da
+    # hata olursa ham dosyanın süresi kullanılır.
+    # -------------------------------------------------
+    async def _postprocess(self, file_path: str, pause: float):
+        if AUDIO_POSTPROCESS:
+            try:
+                start = time.perf_counter()
+                duration = await run_cpu(postprocess_wav, file_path, pause)
+                AUDIO_POST_SECONDS.observe(time.perf_counter() - start)
+                return duration
+            except Exception as e:
+                logger.warning(f"Ses işleme hatası: {file_path} | {e}")
+
+        return get_wav_duration_seconds(file_path)
+
+
+    # -------------------------------------------------
+    # Kelime zamanları (Chunk.word_timestamps)
+    #
+    # Sentez bittikten sonra CPU pool’da hesaplanır;
+    # worker bir sonraki chunk’a geçmek için beklemez.
+    # Hizalamadan sonra chunk WAV’ı kitabın pack
+    # dosyasına taşınır (AUDIO_STORAGE=pack).
+    # -------------------------------------------------
+    def _schedule_alignment(self, chunk_id: int, book_id: str, index: int, text: str, pack: bool = True):
+        task = asyncio.create_task(self._align_chunk(chunk_id, book_id, index, text, pack))
+        self.alignment_tasks.add(task)
+        task.add_done_callback(self.alignment_tasks.discard)
+
+    async def _align_chunk(self, chunk_id: int, book_id: str, index: int, text: str, pack: bool = True):
+        try:
+            start = time.perf_counter()
+            samples, rate = await asyncio.to_thread(audio_store.read_samples, book_id, index)
+            timestamps = await run_cpu(align_samples, samples, rate, text)
+            ALIGNMENT_SECONDS.observe(time.perf_counter() - start)
+
+            with SessionLocal() as db:
+                db.query(Chunk).filter(Chunk.id == chunk_id).update(
+                    {"word_timestamps": timestamps},
+                    synchronize_session=False
+                )
+                db.commit()
+        except Exception as e:
+            logger.warning(f"Hizalama hatası | chunk_id={chunk_id}: {e}")
+
+        if pack and AUDIO_STORAGE == "pack":
+            try:
+                if await asyncio.to_thread(audio_store.pack_chunk, book_id, index):
+                    audio_index.mark_stale(book_id)
+            except Exception as e:
+                # WAV yerinde kalır; POST /books/{id}/pack ile tekrar denenir
+                logger.warning(f"Pack’e taşınamadı | book={book_id} chunk={index}: {e}")
+
+    async def align_missing(self, book_id: str) -> int:
+        """
+        Kelime zamanı olmayan tamamlanmış chunk’lar için
+        hizalamayı planlar (eski kitaplar için backfill).
+        """
+        with SessionLocal() as db:
+            rows = (
+                db.query(Chunk.id, Chunk.index, Chunk.text)
+                .filter(
+                    Chunk.book_id == book_id,
+                    Chunk.status == "completed",
+                    Chunk.word_timestamps.is_(None),
+                )
+                .all()
+            )
+
+        for chunk_id, index, text in rows:
+            self._schedule_alignment(chunk_id, book_id, index, text, pack=False)
+        return len(rows)
+
+    async def wait_for_alignment(self):
+        if self.alignment_tasks:
+            await asyncio.gather(*list(self.alignment_tasks))
+
+
+    # -------------------------------------------------
+    # Başka kitaplardan gelen konum bildirimleri
+    #
+    # Sadece dinleyicinin önündeki pencere sentezlenir,
+    # kitabın geri kalanı kendi kuyruk sırasını bekler.
+    # -------------------------------------------------
+    async def _process_window(self, book_id: str, position: int):
+        with SessionLocal() as db:
+            book = db.query(Book).filter(Book.id == book_id).first()
+            if not book:
+                return
+
+            window = self._next_window(db, book_id, position, wrap=False)
+            if not window:
+                return
+
+            logger.info(
+                f"Öncelikli pencere | book={book_id} | "
+                f"Chunk={window[0].index}..{window[-1].index}"
+            )
+
+            self._ensure_model()
+
+            voice_id = book.voice_id or "canan"
+            window = await llama_service.analyze_chunks(db, window)
+            window = await dialogue_service.tag_window(db, book_id, window)
+            for chunk in self._synthesis_order(window, voice_id):
+                await self._synthesize_chunk(db, book_id, chunk, voice_id)
+
+    async def _serve_prefetch_requests(self):
+        while job := job_queue.claim(self.worker_id, kinds=("window",)):
+            await self._run_job(job)
+
+
+    # -------------------------------------------------
+    # Okuyucunun güncel konumu (API başka process’te
+    # olabilir; her seferinde DB’den okunur)
+    # -------------------------------------------------
+    def _reader_position(self, db, book: Book) -> int:
+        db.refresh(book, ["last_chunk_index"])
+        return book.last_chunk_index or 0
 
 
     # -------------------------------------------------
     # Ana iş mantığı
     #
     # Akış:
-    # 1) LLaMA emotion analizi
-    # 2) XTTS model yükle (ilk seferde)
-    # 3) Pending chunk’ları sırayla sentezle
-    # 4) WAV üret → duration hesapla → DB’ye yaz
+    # 1) XTTS model yükle (ilk seferde)
+    # 2) Okuyucu konumundan başlayarak pencere seç
+    # 3) Pencere için LLaMA emotion analizi (+ konuşan
+    #    etiketi, DIALOGUE_LLM=1)
+    # 4) Okuyucu konumundaki chunk ilk, kalanı (ses, duygu)
+    #    gruplarıyla WAV üret → duration
+    #    hesapla → DB’ye yaz
+    # 5) Konum değiştiyse pencereyi baştan seç
     # -------------------------------------------------
     async def process_book(self, book_id: str):
-        logger.info(f"Duygu analizi başlatılıyor: {book_id}")
-        await llama_service.analyze_book_emotions(book_id)
-
-        # XTTS model lazy-load
-        if self.tts is None:
-            logger.info("XTTS v2 yükleniyor...")
-            self.tts = TTS("tts_models/multilingual/multi-dataset/xtts_v2")
-            if self.device == "cuda":
-                self.tts.to(self.device)
-                logger.info("CUDA aktif")
-
-        # Duygu bazlı hız / sıcaklık ayarları
-        # Bu değerler sesin doğal hissini ciddi etkiler
-        emotion_settings = {
-            "happy":   {"speed": 1.05, "temp": 0.95},
-            "sad":     {"speed": 0.98, "temp": 0.90},
-            "angry":   {"speed": 1.10, "temp": 0.82},
-            "neutral": {"speed": 1.00, "temp": 0.90},
-        }
+        # READER_PROFILE ayarlıysa kitap bazında profil çıkarılır
+        with profile_stage(f"process_book-{book_id}"):
+            await self._process_book(book_id)
 
+    async def _process_book(self, book_id: str):
         with SessionLocal() as db:
             book = db.query(Book).filter(Book.id == book_id).first()
             if not book:
                 logger.warning(f"Kitap bulunamadı: {book_id}")
                 return
 
+            has_pending = db.query(Chunk.id).filter(
+                Chunk.book_id == book_id,
+                Chunk.status == "pending"
+            ).first()
+
+            if not has_pending:
+                book.status = "completed"
+                db.commit()
+                exporter.schedule(book_id)
+                return
+
+            self._ensure_model()
+
             voice_id = book.voice_id or "canan"
 
             book.status = "processing"
             db.commit()
 
-            # Sadece pending chunk’lar işlenir
-            chunks = (
-                db.query(Chunk)
-                .filter(Chunk.book_id == book_id, Chunk.status == "pending")
-                .order_by(Chunk.index)
-                .all()
-            )
+            while True:
+                await self._serve_prefetch_requests()
 
-            if not chunks:
-                book.status = "completed"
-                db.commit()
-                return
+                position = self._reader_position(db, book)
+                window = self._next_window(db, book_id, position)
+                if not window:
+                    break
 
-            # Chunk’lar sıralı işlenir (audio continuity için önemli)
-            for chunk in chunks:
-                try:
-                    start_time = time.time()
-
-                    emotion = (
-                        chunk.emotion
-                        if chunk.emotion in emotion_settings
-                        else "neutral"
-                    )
-                    settings = emotion_settings[emotion]
-
-                    speaker_wav = self.resolve_speaker_wav(voice_id, emotion)
-                    if not speaker_wav:
-                        raise FileNotFoundError(
-                            f"Speaker WAV yok | voice={voice_id} emotion={emotion}"
-                        )
-
-                    processed_text = apply_emotion_pauses(chunk.text, emotion)
-                    file_path = os.path.join(
-                        self.output_dir,
-                        f"{book_id}_{chunk.index}.wav"
-                    )
-
-                    logger.info(
-                        f"Sentez | Chunk={chunk.index} | "
-                        f"Voice={voice_id} | Emotion={emotion} | "
-                        f"Speaker={os.path.basename(speaker_wav)}"
-                    )
-
-                    # Torch inference mode (gradients kapalı)
-                    with torch.inference_mode():
-                        self.tts.tts_to_file(
-                            text=processed_text,
-                            speaker_wav=speaker_wav,
-                            language="tr",
-                            file_path=file_path,
-                            speed=settings["speed"],
-                            temperature=settings["temp"],
-                            repetition_penalty=1.1
-                        )
-
-                    # WAV süresi hesaplanır (SRT / video için)
-                    duration = get_wav_duration_seconds(file_path)
-                    if duration:
-                        chunk.duration = float(duration)
-
-                    chunk.audio_path = file_path
-                    chunk.status = "completed"
-                    db.commit()
-
-                    logger.info(
-                        f"Chunk {chunk.index} tamamlandı "
-                        f"({time.time() - start_time:.2f}s)"
-                    )
+                window = await llama_service.analyze_chunks(db, window)
+                window = await dialogue_service.tag_window(db, book_id, window)
 
-                except Exception as e:
-                    logger.error(
-                        f"Sentez hatası | Chunk {chunk.index}: {e}",
-                        exc_info=True
-                    )
-                    chunk.status = "failed"
-                    db.commit()
+                for chunk in self._synthesis_order(window, voice_id):
+                    await self._synthesize_chunk(db, book_id, chunk, voice_id)
+
+                    # Okuyucu atladıysa ya da başka kitap
+                    # öncelik istediyse pencere yeniden seçilir
+                    moved = self._reader_position(db, book) != position
+                    if moved or job_queue.has_waiting("window"):
+                        break
 
             book.status = "completed"
             db.commit()
             logger.info(f"Kitap tamamlandı | book={book_id}")
 
+            # Eksik bölümler + paketler (bölüm bazlı
+            # planlamadan kaçan, ör. restart öncesi bitenler)
+            exporter.schedule(book_id)
+
 
 # Global singleton instance
 tts_service = TTSService()
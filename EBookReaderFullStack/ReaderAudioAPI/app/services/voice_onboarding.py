@@ -0,0 +1,290 @@
+import os
+import re
+import time
+import asyncio
+import logging
+import tempfile
+import subprocess
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.constants import (
+    SPEAKERS_DIR,
+    VOICE_MAX_SECONDS,
+    VOICE_MIN_SECONDS,
+    VOICE_SAMPLE_RATE,
+    resolve_ffmpeg_path,
+)
+from app.core.workers import run_cpu
+from app.services.alignment import voiced_frames
+from app.services.audio_post import integrated_loudness, normalize_loudness, trim_silence, write_mono_pcm
+from app.services.voice_registry import voice_registry
+
+logger = logging.getLogger(__name__)
+
+# ======================================================
+# SES EKLEME (uzun kayıt → referans WAV’lar)
+#
+# Eski yol (video_parcalayici.py) her segment için ayrı
+# ffmpeg açıp kaynağı segment sayısı kadar decode ediyordu.
+# Burada:
+#
+# 1) Kaynak tek ffmpeg ile bir kere decode edilir
+#    (ilk segmentin başından son segmentin sonuna,
+#    mono / VOICE_SAMPLE_RATE / s16le, stdout’a)
+# 2) Akış okunurken sadece segment aralıkları belleğe
+#    kopyalanır; aradaki ses tutulmaz
+# 3) Segmentler CPU pool’da paralel işlenir:
+#    sessizlik kırpma → loudness → doğrulama
+# 4) Geçenler app/speakers/{voice}_{emotion}.wav olarak
+#    atomik yazılır, katalog yenilenir, model bu
+#    process’te yüklüyse latent’lar hemen hesaplanır
+# ======================================================
+
+# Konuşmanın toplam süreye oranı (kırpmadan sonra)
+MIN_SPEECH_RATIO = 0.6
+
+# Tam skala örneklerin oranı bunu geçerse kayıt kırpılmış
+MAX_CLIPPED_RATIO = 0.001
+
+# Konuşma bulunamayan / çok kısık kayıt (LUFS)
+MIN_SOURCE_LUFS = -50.0
+
+# stdout’tan okunan blok (örnek sayısı)
+READ_BLOCK = 1 << 16
+
+VOICE_NAME = re.compile(r"^[a-z0-9]+(?:_[a-z0-9]+)*$")
+EMOTION_NAME = re.compile(r"^[a-z0-9]+$")
+
+
+def parse_time(value) -> float:
+    """
+    "00:01:37", "01:37.5", "97" ya da 97 → saniye.
+    """
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        parts = str(value).strip().split(":")
+        if len(parts) > 3:
+            raise ValueError(f"Geçersiz zaman: {value}")
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+
+    if seconds < 0 or not np.isfinite(seconds):
+        raise ValueError(f"Geçersiz zaman: {value}")
+    return seconds
+
+
+def normalize_voice_id(voice_id: str) -> str:
+    voice_id = voice_id.strip().lower().replace(" ", "_")
+    if not VOICE_NAME.match(voice_id):
+        raise ValueError(f"Geçersiz ses adı: {voice_id}")
+    return voice_id
+
+
+def normalize_emotion(emotion: str) -> str:
+    # Dosya adı "{voice}_{emotion}.wav" son "_"ten bölünür;
+    # ses adında "_" olabilir, duygu adında olamaz
+    emotion = emotion.strip().lower()
+    if not EMOTION_NAME.match(emotion):
+        raise ValueError(f"Geçersiz duygu adı: {emotion}")
+    return emotion
+
+
+# -------------------------------------------------
+# Tek decode: kaynak → segment örnekleri
+#
+# segments: [(start, duration)] (saniye)
+# Dönüş: segment başına float32 mono dizi
+# -------------------------------------------------
+def decode_segments(
+    source_path: str,
+    segments: Sequence[Tuple[float, float]],
+    rate: int = VOICE_SAMPLE_RATE,
+) -> List[np.ndarray]:
+    lo = min(start for start, _ in segments)
+    hi = max(start + duration for start, duration in segments)
+
+    command = [
+        resolve_ffmpeg_path(), "-v", "error", "-nostdin",
+        "-err_detect", "ignore_err",
+        "-ss", f"{lo:.3f}", "-t", f"{hi - lo:.3f}",
+        "-i", source_path,
+        "-vn", "-ac", "1", "-ar", str(rate),
+        "-af", "aresample=async=1",
+        "-f", "s16le", "-",
+    ]
+
+    # Segment aralıkları decode penceresinin başına göre
+    ranges = [
+        (int(round((start - lo) * rate)), int(round((start - lo + duration) * rate)))
+        for start, duration in segments
+    ]
+    buffers = [np.zeros(end - begin, dtype=np.int16) for begin, end in ranges]
+    filled = [0] * len(segments)
+    last = max(end for _, end in ranges)
+
+    # stderr dosyaya: pipe dolup decode’u kilitlemesin
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+        position = 0
+        pending = b""
+        try:
+            while position < last:
+                block = process.stdout.read(READ_BLOCK * 2)
+                if not block:
+                    break
+                block = pending + block
+                usable = len(block) - len(block) % 2
+                pending = block[usable:]
+                pcm = np.frombuffer(block[:usable], dtype="<i2")
+
+                block_end = position + len(pcm)
+                for i, (begin, end) in enumerate(ranges):
+                    a, b = max(begin, position), min(end, block_end)
+                    if a < b:
+                        buffers[i][a - begin:b - begin] = pcm[a - position:b - position]
+                        filled[i] = b - begin
+                position = block_end
+        finally:
+            process.stdout.close()
+            if process.poll() is None:
+                process.kill()
+            returncode = process.wait()
+
+        errors.seek(0)
+        stderr = errors.read().decode("utf-8", "replace").strip()
+
+    if position == 0:
+        raise RuntimeError(f"Kaynak decode edilemedi: {stderr or returncode}")
+
+    # Kaynak segmentten önce bittiyse segment kısa kalır
+    return [buf[:f].astype(np.float32) / 32768.0 for buf, f in zip(buffers, filled)]
+
+
+# -------------------------------------------------
+# Segment işleme + doğrulama (CPU pool’da)
+#
+# Dönüş: (işlenmiş örnekler, rapor); reddedilen
+# segmentte örnekler None, rapor["errors"] dolu.
+# -------------------------------------------------
+def prepare_segment(samples: np.ndarray, rate: int) -> Tuple[Optional[np.ndarray], Dict]:
+    errors = []
+    report = {"source_seconds": round(len(samples) / float(rate), 3)}
+
+    clipped = float(np.mean(np.abs(samples) >= 0.999)) if len(samples) else 0.0
+    report["clipped_ratio"] = round(clipped, 5)
+    if clipped > MAX_CLIPPED_RATIO:
+        errors.append("kayıt kırpılmış (clipping)")
+
+    samples = trim_silence(samples, rate)
+    duration = len(samples) / float(rate)
+    report["seconds"] = round(duration, 3)
+
+    loudness = integrated_loudness(samples, rate)
+    report["source_lufs"] = round(loudness, 2) if loudness is not None else None
+    if loudness is None or loudness < MIN_SOURCE_LUFS:
+        errors.append("konuşma bulunamadı (sessiz)")
+    else:
+        voiced = voiced_frames(samples, rate)
+        ratio = float(voiced.mean()) if voiced.size else 0.0
+        report["speech_ratio"] = round(ratio, 3)
+        if ratio < MIN_SPEECH_RATIO:
+            errors.append(f"konuşma oranı düşük ({ratio:.0%})")
+
+    if duration < VOICE_MIN_SECONDS:
+        errors.append(f"çok kısa ({duration:.1f}s < {VOICE_MIN_SECONDS:g}s)")
+    elif duration > VOICE_MAX_SECONDS:
+        errors.append(f"çok uzun ({duration:.1f}s > {VOICE_MAX_SECONDS:g}s)")
+
+    report["errors"] = errors
+    if errors:
+        return None, report
+
+    samples = normalize_loudness(samples, rate)
+    report["lufs"] = round(integrated_loudness(samples, rate) or 0.0, 2)
+    return samples.astype(np.float32), report
+
+
+class VoiceOnboarding:
+    """
+    Uzun kaynak kayıt + segment listesi → yeni ses.
+    """
+
+    def __init__(self, speakers_dir: str = SPEAKERS_DIR, rate: int = VOICE_SAMPLE_RATE):
+        self.speakers_dir = speakers_dir
+        self.rate = rate
+
+    def _target(self, voice_id: str, emotion: str) -> str:
+        return os.path.join(self.speakers_dir, f"{voice_id}_{emotion}.wav")
+
+    # -------------------------------------------------
+    # segments: [{"emotion", "start", "duration"}]
+    #
+    # Tüm segmentler geçerse yazılır (yarım ses
+    # kaydedilmez); dry_run sadece raporlar.
+    # -------------------------------------------------
+    async def onboard(
+        self, source_path: str, voice_id: str, segments: List[Dict], dry_run: bool = False,
+    ) -> Dict:
+        start_time = time.perf_counter()
+        voice_id = normalize_voice_id(voice_id)
+
+        emotions = [normalize_emotion(s["emotion"]) for s in segments]
+        if len(set(emotions)) != len(emotions):
+            raise ValueError("Aynı duygu birden fazla segmentte")
+        if "neutral" not in emotions and voice_registry.resolve(voice_id, "neutral") is None:
+            # Diğer duygular neutral’a düşer; ilk kayıtta şart
+            raise ValueError("Yeni ses için neutral segment gerekli")
+
+        spans = [(parse_time(s["start"]), parse_time(s["duration"])) for s in segments]
+        if any(duration <= 0 for _, duration in spans):
+            raise ValueError("Segment süresi sıfırdan büyük olmalı")
+
+        decode_start = time.perf_counter()
+        clips = await asyncio.to_thread(decode_segments, source_path, spans, self.rate)
+        decode_seconds = time.perf_counter() - decode_start
+
+        results = await asyncio.gather(*(run_cpu(prepare_segment, clip, self.rate) for clip in clips))
+
+        reports = []
+        for emotion, (start, duration), (_, report) in zip(emotions, spans, results):
+            reports.append({"emotion": emotion, "start": start, "duration": duration, **report})
+        accepted = all(samples is not None for samples, _ in results)
+
+        paths = []
+        if accepted and not dry_run:
+            os.makedirs(self.speakers_dir, exist_ok=True)
+            for emotion, (samples, _), report in zip(emotions, results, reports):
+                path = self._target(voice_id, emotion)
+                await asyncio.to_thread(write_mono_pcm, path, samples, self.rate)
+                report["path"] = path
+                paths.append(path)
+            await asyncio.to_thread(voice_registry.refresh)
+
+        # Model bu process’te yüklüyse latent’lar şimdi;
+        # ayrı worker yeni dosyaları kataloğunda görünce hesaplar
+        latents = 0
+        if paths:
+            from app.services.tts import tts_service
+            latents = await asyncio.to_thread(tts_service.precompute_latents, paths)
+
+        summary = {
+            "voice_id": voice_id,
+            "status": ("checked" if dry_run else "registered") if accepted else "rejected",
+            "segments": reports,
+            "latents": latents,
+            "decode_seconds": round(decode_seconds, 3),
+            "seconds": round(time.perf_counter() - start_time, 3),
+        }
+        logger.info(
+            f"Ses ekleme | voice={voice_id} | {summary['status']} | {len(segments)} segment | "
+            f"decode {summary['decode_seconds']}s | toplam {summary['seconds']}s"
+        )
+        return summary
+
+
+# Global singleton instance
+voice_onboarding = VoiceOnboarding()
@@ -0,0 +1,217 @@
+import os
+import json
+import wave
+import asyncio
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.constants import (
+    SPEAKERS_DIR,
+    VOICE_POLL_INTERVAL,
+    VoiceSample,
+    VoiceStyle,
+    parse_voice_filename,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------
+# Referans WAV’dan metadata çıkarır
+#
+# Dosya başına sadece değiştiğinde bir kez çalışır.
+# -------------------------------------------------
+def read_voice_sample(path: str, emotion: str) -> VoiceSample:
+    with open(path, "rb") as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+
+    with wave.open(path, "rb") as wf:
+        rate = wf.getframerate()
+        frames = wf.getnframes()
+        width = wf.getsampwidth()
+        raw = wf.readframes(frames)
+
+    loudness = -120.0
+    if width == 2 and raw:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        if rms > 0:
+            loudness = round(20 * np.log10(rms), 2)
+
+    return VoiceSample(
+        emotion=emotion,
+        duration=round(frames / float(rate), 3) if rate else 0.0,
+        sample_rate=rate,
+        loudness_dbfs=loudness,
+        content_hash=content_hash,
+    )
+
+
+class VoiceRegistry:
+    """
+    app/speakers klasörünün bellek içi kataloğu.
+
+    - Açılışta bir kez taranır, sonra mtime/size polling
+      ile sadece değişen dosyalar yeniden okunur
+    - (voice, emotion) → speaker wav çözümü tek dict lookup
+      (neutral fallback önceden hesaplanır)
+    - /voices cevabı JSON olarak hazır tutulur, ETag ile döner
+    """
+
+    def __init__(self, speakers_dir: str = SPEAKERS_DIR):
+        self.speakers_dir = speakers_dir
+
+        # filename -> (mtime_ns, size, voice_id, VoiceSample)
+        self._files: Dict[str, tuple] = {}
+
+        # (voice_id, emotion) -> path (fallback dahil)
+        self._resolved: Dict[Tuple[str, str], str] = {}
+
+        self._styles: List[VoiceStyle] = []
+        self.styles_json = b"[]"
+        self.etag = '"empty"'
+
+        self._scanned = False
+        self._watch_task = None
+
+    # -------------------------------------------------
+    # Klasörü stat’lar, değişen dosyaları yeniden okur.
+    # Değişiklik olduysa True döner.
+    # -------------------------------------------------
+    def refresh(self) -> bool:
+        entries = {}
+        if os.path.isdir(self.speakers_dir):
+            for entry in os.scandir(self.speakers_dir):
+                if entry.is_file() and parse_voice_filename(entry.name):
+                    st = entry.stat()
+                    entries[entry.name] = (st.st_mtime_ns, st.st_size)
+
+        unchanged = entries.keys() == self._files.keys() and all(
+            self._files[name][:2] == stat for name, stat in entries.items()
+        )
+        if unchanged and self._scanned:
+            return False
+
+        files = {}
+        for name, (mtime_ns, size) in entries.items():
+            cached = self._files.get(name)
+            if cached and cached[:2] == (mtime_ns, size):
+                files[name] = cached
+                continue
+
+            voice_id, emotion = parse_voice_filename(name)
+            try:
+                sample = read_voice_sample(os.path.join(self.speakers_dir, name), emotion)
+            except Exception as e:
+                logger.warning(f"Speaker WAV okunamadı: {name} | {e}")
+                continue
+            files[name] = (mtime_ns, size, voice_id, sample)
+
+        self._rebuild(files)
+        self._scanned = True
+        logger.info(f"Ses kataloğu güncellendi | {len(files)} dosya | ETag={self.etag}")
+        return True
+
+    def _rebuild(self, files: Dict[str, tuple]):
+        voices: Dict[str, Dict[str, str]] = {}
+        samples: Dict[str, List[VoiceSample]] = {}
+
+        for name, (_, _, voice_id, sample) in files.items():
+            voices.setdefault(voice_id, {})[sample.emotion] = os.path.join(self.speakers_dir, name)
+            samples.setdefault(voice_id, []).append(sample)
+
+        all_emotions = {e for emotions in voices.values() for e in emotions}
+
+        resolved = {}
+        for voice_id, paths in voices.items():
+            fallback = paths.get("neutral")
+            for emotion in all_emotions | {"neutral"}:
+                path = paths.get(emotion, fallback)
+                if path:
+                    resolved[(voice_id, emotion)] = path
+
+        styles = sorted(
+            (
+                VoiceStyle(
+                    id=voice_id,
+                    name=voice_id.replace("_", " ").title(),
+                    emotions=sorted(paths),
+                    samples=sorted(samples[voice_id], key=lambda s: s.emotion),
+                )
+                for voice_id, paths in voices.items()
+            ),
+            key=lambda v: v.name,
+        )
+
+        styles_json = json.dumps(
+            [s.model_dump() for s in styles], ensure_ascii=False
+        ).encode("utf-8")
+
+        # Tek seferde değiştir: okuyucular yarım katalog görmez
+        self._files = files
+        self._resolved = resolved
+        self._styles = styles
+        self.styles_json = styles_json
+        self.etag = '"' + hashlib.sha1(styles_json).hexdigest() + '"'
+
+    # -------------------------------------------------
+    # voice_emotion.wav → voice_neutral.wav → None
+    # -------------------------------------------------
+    def resolve(self, voice_id: str, emotion: str) -> Optional[str]:
+        if not self._scanned:
+            self.refresh()
+
+        voice_id = voice_id.lower().replace(" ", "_")
+        emotion = emotion.lower()
+
+        path = self._resolved.get((voice_id, emotion))
+        if path is None:
+            path = self._resolved.get((voice_id, "neutral"))
+        return path
+
+    def styles(self) -> List[VoiceStyle]:
+        return self._styles
+
+    def speaker_paths(self) -> List[str]:
+        """
+        Katalogdaki tüm referans WAV yolları (neutral’lar önce).
+        """
+        if not self._scanned:
+            self.refresh()
+        return sorted(
+            (os.path.join(self.speakers_dir, name) for name in self._files),
+            key=lambda path: (not path.endswith("_neutral.wav"), path),
+        )
+
+    def versions(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Referans WAV yolu → (mtime_ns, size); latent cache
+        anahtarıyla aynı.
+        """
+        return {
+            os.path.join(self.speakers_dir, name): entry[:2]
+            for name, entry in self._files.items()
+        }
+
+    # -------------------------------------------------
+    # Arka planda periyodik değişiklik kontrolü
+    # -------------------------------------------------
+    async def _watch(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                logger.error(f"Ses kataloğu yenilenemedi: {e}")
+
+    async def start_watcher(self, interval: float = VOICE_POLL_INTERVAL):
+        self.refresh()
+        if self._watch_task is None and interval > 0:
+            self._watch_task = asyncio.create_task(self._watch(interval))
+
+
+# Global singleton instance
+voice_registry = VoiceRegistry()
@@ -1,35 +1,115 @@
-from datetime import timedelta
-
 def format_ts(seconds: float) -> str:
-    ms = int((seconds - int(seconds)) * 1000)
-    total = int(seconds)
+    total, ms = divmod(int(round(seconds * 1000)), 1000)
     h = total // 3600
     m = (total % 3600) // 60
     s = total % 60
     return f"{h:02}:{m:02}:{s:02},{ms:03}"
 
 
-def generate_sentence_srt(chunks):
+def format_vtt_ts(seconds: float) -> str:
+    return format_ts(seconds).replace(",", ".")
+
+
+def chunk_duration(c) -> float:
     """
-    Chunk bazlı SRT üretir
+    Süresi bilinmeyen chunk için kelime sayısından tahmin
+    """
+    return c.duration or (len(c.text.split()) * 0.45)
+
+
+# ============================
+# CUE ÜRETİCİLER
+#
+# chunks: text / duration (/ word_timestamps) alanları
+# olan herhangi bir iterable (ORM nesnesi ya da kolon
+# sorgusundan gelen row). Hepsi generator; bellekte
+# liste tutulmaz.
+# ============================
+
+MAX_WORDS_PER_CUE = 7
+
+
+def iter_sentence_cues(chunks, offset: float = 0.0):
+    """
+    Chunk bazlı cue’lar: (start, end, text)
     Her chunk ekranda tek parça gösterilir
     """
-    srt = []
-    cursor = 0.0
-    idx = 1
+    cursor = offset
+    for c in chunks:
+        dur = chunk_duration(c)
+        yield cursor, cursor + dur, c.text
+        cursor += dur
+
+
+def iter_word_cues(chunks, offset: float = 0.0, max_words: int = MAX_WORDS_PER_CUE):
+    """
+    Kayıtlı kelime zamanlarından (Chunk.word_timestamps)
+    kısa cue’lar üretir: (start, end, text)
+
+    Cue en fazla max_words kelime içerir ve noktalamada
+    kesilir. Kelime zamanı olmayan chunk tek parça gösterilir.
+    """
+    cursor = offset
 
     for c in chunks:
-        dur = c.duration or (len(c.text.split()) * 0.45)
-        start = cursor
-        end = cursor + dur
+        dur = chunk_duration(c)
+        words = c.word_timestamps or []
+
+        if not words:
+            yield cursor, cursor + dur, c.text
+        else:
+            group = []
+            for w in words:
+                group.append(w)
+                if len(group) >= max_words or w["word"][-1] in ".!?;:,":
+                    yield cursor + group[0]["start"], cursor + group[-1]["end"], " ".join(g["word"] for g in group)
+                    group = []
+            if group:
+                yield cursor + group[0]["start"], cursor + group[-1]["end"], " ".join(g["word"] for g in group)
 
-        srt.append(
+        cursor += dur
+
+
+def iter_srt(cues):
+    for idx, (start, end, text) in enumerate(cues, start=1):
+        yield (
             f"{idx}\n"
             f"{format_ts(start)} --> {format_ts(end)}\n"
-            f"{c.text}\n"
+            f"{text}\n\n"
+        )
+
+
+def iter_vtt(cues):
+    yield "WEBVTT\n\n"
+    for start, end, text in cues:
+        yield (
+            f"{format_vtt_ts(start)} --> {format_vtt_ts(end)}\n"
+            f"{text}\n\n"
         )
 
-        cursor = end
-        idx += 1
 
-    return "\n".join(srt), cursor
+# ============================
+# TAM METİN YARDIMCILARI
+# ============================
+
+def generate_sentence_srt(chunks):
+    """
+    Chunk bazlı SRT üretir
+    Her chunk ekranda tek parça gösterilir
+    """
+    cues = list(iter_sentence_cues(chunks))
+    return "".join(iter_srt(cues)), (cues[-1][1] if cues else 0.0)
+
+
+def generate_word_srt(chunks):
+    """
+    Kelime zamanlarına göre SRT üretir (karaoke / kısa altyazı)
+    """
+    return "".join(iter_srt(iter_word_cues(chunks)))
+
+
+def generate_word_vtt(chunks):
+    """
+    Kelime zamanlarına göre WebVTT üretir
+    """
+    return "".join(iter_vtt(iter_word_cues(chunks)))
@@ -0,0 +1,58 @@
+"""
+Bağımsız sentez worker’ı.
+
+API’yi WORKER_MODE=external ile çalıştırıp bir ya da daha
+fazla worker açılır (aynı DATABASE_URL ve oas_assets/
+paylaşıldığı sürece başka makinelerde de olabilir):
+
+    WORKER_MODE=external uvicorn app.main:app
+    python -m app.worker
+"""
+
+import signal
+import asyncio
+import logging
+
+from app.core.constants import STARTUP_MODE
+from app.core.database import ensure_schema
+from app.core.workers import shutdown_cpu_pool
+from app.services.tts import tts_service
+from app.services.emotion_profiles import emotion_profiles
+from app.services.voice_registry import voice_registry
+
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    ensure_schema()
+    await voice_registry.start_watcher()
+    await emotion_profiles.start_watcher()
+
+    if STARTUP_MODE == "warm":
+        await tts_service.warm_up()
+
+    worker = asyncio.create_task(tts_service.run_worker())
+
+    # SIGTERM’de elimizdeki iş hemen kuyruğa bırakılır
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, worker.cancel)
+    except NotImplementedError:
+        pass
+
+    try:
+        await worker
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await tts_service.stop_worker()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_cpu_pool()
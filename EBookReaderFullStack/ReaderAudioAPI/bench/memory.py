@@ -0,0 +1,259 @@
+"""
+Worker bellek benchmark’ı.
+
+Geçici bir SQLite veritabanına --chunks adet "pending"
+chunk’lı tek kitap yazılır ve tts_service.process_book
+sahte sentezle (bench/stubs.py) koşturulur; --stage emotion
+ile chunk’lar neutral yazılır ve sahte Ollama’ya karşı
+llama_service.analyze_book_emotions koşturulur. Her
+--sample-every chunk’ta process RSS’i (ve --tracemalloc
+ile Python heap’i) örneklenir.
+
+Isınmadan sonraki örneklere doğru oturtulur; eğim
+(MB / 1000 chunk) kitap boyuyla büyüyen bellek demektir.
+Düz bellekte eğim ~0’dır.
+
+Kullanım (ReaderAudioAPI klasöründen):
+    python -m bench.memory --chunks 20000
+    python -m bench.memory --chunks 5000 --tracemalloc
+    python -m bench.memory --chunks 5000 --stage emotion
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+API_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(API_ROOT, "bench", "results")
+
+if API_ROOT not in sys.path:
+    sys.path.insert(0, API_ROOT)
+
+from bench.run import _git_revision, _peak_rss_mb, _rss_mb  # noqa: E402
+from bench.stubs import STUB_EMOTIONS, FakeOllamaServer, SilenceSynthesizer, write_silence_wav  # noqa: E402
+from bench.synthetic_epub import _sentence  # noqa: E402
+
+# İlk örneklerin bu oranı eğim hesabına girmez
+# (model / pool / SQLite cache ısınması)
+WARMUP_RATIO = 0.2
+
+
+class MemorySampler:
+    """
+    Her `every` chunk’ta bir bellek örneği alır.
+    """
+
+    def __init__(self, every: int, track_python_memory: bool):
+        self.every = max(1, every)
+        self.track_python_memory = track_python_memory
+        self.count = 0
+        self.samples = []
+
+    def tick(self):
+        self.count += 1
+        if self.count % self.every:
+            return
+        sample = {"chunks": self.count, "rss_mb": round(_rss_mb(), 2)}
+        if self.track_python_memory:
+            current, _ = tracemalloc.get_traced_memory()
+            sample["python_mb"] = round(current / (1024 * 1024), 3)
+        self.samples.append(sample)
+
+
+class SamplingSynthesizer(SilenceSynthesizer):
+    def __init__(self, sampler: MemorySampler, **kwargs):
+        super().__init__(**kwargs)
+        self.sampler = sampler
+
+    def tts_to_file(self, *args, **kwargs):
+        result = super().tts_to_file(*args, **kwargs)
+        self.sampler.tick()
+        return result
+
+
+def slope_per_1k(samples, key: str):
+    """
+    En küçük kareler eğimi, MB / 1000 chunk.
+    """
+    points = [(s["chunks"], s[key]) for s in samples if key in s]
+    points = points[int(len(points) * WARMUP_RATIO):]
+    if len(points) < 2:
+        return None
+
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    if not var:
+        return None
+    cov = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return round(cov / var * 1000, 3)
+
+
+def build_book(args, rng) -> str:
+    from sqlalchemy import insert
+
+    from app.core.database import SessionLocal
+    from app.models.book import Book, Chunk
+
+    book_id = f"00000000-0000-4000-8000-{rng.getrandbits(48):012x}"
+    with SessionLocal() as db:
+        db.add(Book(id=book_id, title="Bellek", voice_id="bench", status="pending"))
+        db.commit()
+
+        # tts: duygu baştan verili, worker LLM’e gitmez;
+        # ölçülen sadece pencere seçimi + sentez + DB yazımı
+        for start in range(0, args.chunks, 1000):
+            rows = [
+                {
+                    "book_id": book_id, "index": i, "chapter": i // 50,
+                    "text": _sentence(rng), "status": "pending",
+                    "emotion": "neutral" if args.stage == "emotion" else STUB_EMOTIONS[i % len(STUB_EMOTIONS)],
+                }
+                for i in range(start, min(args.chunks, start + 1000))
+            ]
+            db.execute(insert(Chunk), rows)
+            db.commit()
+    return book_id
+
+
+async def run_worker(book_id: str, sampler: MemorySampler) -> dict:
+    from app.core.database import SessionLocal
+    from app.models.book import Chunk
+    from app.services.tts import tts_service
+
+    tts_service.tts = SamplingSynthesizer(sampler, sample_rate=8000, seconds_per_word=0.05)
+
+    start = time.perf_counter()
+    await tts_service.process_book(book_id)
+    await tts_service.wait_for_alignment()
+    seconds = time.perf_counter() - start
+
+    with SessionLocal() as db:
+        completed = db.query(Chunk.id).filter(
+            Chunk.book_id == book_id, Chunk.status == "completed"
+        ).count()
+    return {"seconds": round(seconds, 2), "completed": completed}
+
+
+async def run_emotion(book_id: str, sampler: MemorySampler) -> dict:
+    from app.core.database import SessionLocal
+    from app.models.book import Chunk
+    from app.services.llama_emotion import llama_service
+
+    get_emotion = llama_service._get_emotion
+
+    async def sampled(text):
+        emotion = await get_emotion(text)
+        sampler.tick()
+        return emotion
+
+    llama_service._get_emotion = sampled
+    with FakeOllamaServer() as ollama:
+        llama_service.base_url = ollama.base_url
+        start = time.perf_counter()
+        await llama_service.analyze_book_emotions(book_id)
+        seconds = time.perf_counter() - start
+
+    with SessionLocal() as db:
+        completed = db.query(Chunk.id).filter(
+            Chunk.book_id == book_id, Chunk.emotion_analyzed.is_(True)
+        ).count()
+    return {"seconds": round(seconds, 2), "completed": completed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker bellek benchmark")
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--stage", choices=["tts", "emotion"], default="tts")
+    parser.add_argument("--sample-every", type=int, default=250, help="kaç chunk’ta bir örnek")
+    parser.add_argument("--tracemalloc", action="store_true", help="Python heap’ini de örnekle (yavaş)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--keep", action="store_true", help="çalışma klasörünü silme")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+
+    # Sadece bellek ölçülür: ses işleme, pack ve export
+    # kapalı (CPU pool / pack / ffmpeg ölçümü kirletmesin)
+    workdir = tempfile.mkdtemp(prefix="reader-memory-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    os.environ.setdefault("AUDIO_POSTPROCESS", "0")
+    os.environ.setdefault("AUDIO_STORAGE", "files")
+    os.environ.setdefault("EXPORT_PREBUILD", "0")
+    os.chdir(workdir)
+    os.makedirs(os.path.join("app", "speakers"), exist_ok=True)
+    write_silence_wav(os.path.join("app", "speakers", "bench_neutral.wav"))
+
+    from app.core.database import ensure_schema
+    from app.services.search import ensure_index
+    from app.services.tts import tts_service  # noqa: F401 (tüm modeller kayıtlı olsun)
+
+    ensure_schema()
+    ensure_index()
+
+    print(f"Bellek bench | {args.stage} | {args.chunks} chunk | {workdir}")
+    book_id = build_book(args, random.Random(args.seed))
+
+    sampler = MemorySampler(args.sample_every, args.tracemalloc)
+    if args.tracemalloc:
+        tracemalloc.start()
+    try:
+        stage = run_emotion if args.stage == "emotion" else run_worker
+        run = asyncio.run(stage(book_id, sampler))
+    finally:
+        if args.tracemalloc:
+            tracemalloc.stop()
+        os.chdir(API_ROOT)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    samples = sampler.samples
+    summary = {
+        **run,
+        "chunks_per_s": round(run["completed"] / run["seconds"], 1) if run["seconds"] else None,
+        "rss_start_mb": samples[0]["rss_mb"] if samples else None,
+        "rss_end_mb": samples[-1]["rss_mb"] if samples else None,
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "rss_slope_mb_per_1k": slope_per_1k(samples, "rss_mb"),
+        "python_slope_mb_per_1k": slope_per_1k(samples, "python_mb"),
+    }
+
+    print(f"  {args.stage:<10} {summary['completed']}/{args.chunks} chunk | {run['seconds']}s "
+          f"({summary['chunks_per_s']} chunk/s)")
+    print(f"  rss        {summary['rss_start_mb']} → {summary['rss_end_mb']} MB | "
+          f"peak {summary['peak_rss_mb']} MB | eğim {summary['rss_slope_mb_per_1k']} MB/1k chunk")
+    if args.tracemalloc:
+        print(f"  python     eğim {summary['python_slope_mb_per_1k']} MB/1k chunk")
+
+    result = {
+        "timestamp": time.strftime("%Y%m%d-%H%M%S"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": vars(args),
+        "summary": summary,
+        "samples": samples,
+    }
+    path = os.path.join(out_dir, f"memory-{result['timestamp']}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"Sonuç: {path}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
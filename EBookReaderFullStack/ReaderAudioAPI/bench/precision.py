@@ -0,0 +1,265 @@
+"""
+Inference hassasiyeti kalite / hız raporu (gerçek XTTS gerekir).
+
+Her mod (fp32, int8, bf16) ayrı bir process’te yüklenir
+(quantization geri alınamaz), aynı cümleler aynı seed’lerle
+sentezlenir:
+
+- hız    : real-time factor, chunk/s ve çekirdek başına chunk/s
+- kalite : referansa (varsayılan fp32 çıktısı ya da
+           --reference klasörü) göre log-mel benzerliği
+           ve süre oranı
+
+XTTS örnekleme yaptığı için farklı hassasiyetlerde token’lar
+ayrışabilir; bu yüzden frame bazlı değil, zamana göre
+ortalanmış spektral zarf (cosine) karşılaştırılır.
+
+Kullanım (ReaderAudioAPI klasöründen):
+    python -m bench.precision --speaker app/speakers/canan_neutral.wav
+    python -m bench.precision --speaker ... --modes fp32 int8 --threads 4
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+
+import numpy as np
+
+API_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(API_ROOT, "bench", "results")
+
+if API_ROOT not in sys.path:
+    sys.path.insert(0, API_ROOT)
+
+from bench.run import _git_revision  # noqa: E402
+
+SENTENCES = [
+    "Kapı yavaşça açıldı ve içeriye soğuk bir rüzgâr doldu.",
+    "Yıllardır beklediği mektup sonunda elindeydi, ama açmaya cesaret edemiyordu.",
+    "Bunu bir daha yaparsan seni asla affetmeyeceğim!",
+    "Sabah güneşi tepelerin ardından yükselirken köy yeni bir güne uyanıyordu.",
+    "Neden hiçbir şey söylemedin? Her şeyi biliyordun, değil mi?",
+    "Kütüphanenin en üst rafında, tozlu kapaklı eski bir defter duruyordu.",
+]
+
+CHILD_SNIPPET = """
+import sys, json, time
+sys.path.insert(0, {root!r})
+import torch
+from app.services.emotion_profiles import DEFAULT_PROFILES
+from app.services.tts import tts_service, get_wav_duration_seconds
+
+start = time.perf_counter()
+tts_service._ensure_model()
+load = time.perf_counter() - start
+
+# DB’deki profil düzenlemeleri ölçümü etkilemesin
+settings = DEFAULT_PROFILES["neutral"]
+
+# Isındırma (ilk inference maliyeti ölçüme girmez)
+tts_service._synthesize({warm!r}, {speaker!r}, {out!r} + "/_warm.wav", settings)
+
+rows = []
+for i, text in enumerate({sentences!r}):
+    torch.manual_seed(1234 + i)
+    path = f"{out}/{{i:02d}}.wav"
+    t0 = time.perf_counter()
+    tts_service._synthesize(text, {speaker!r}, path, settings)
+    elapsed = time.perf_counter() - t0
+    rows.append({{"file": path, "seconds": elapsed, "audio_seconds": get_wav_duration_seconds(path)}})
+
+print(json.dumps({{"load_seconds": load, "inference": tts_service.inference, "rows": rows}}))
+"""
+
+
+# -------------------------------------------------
+# Kalite metrikleri (NumPy)
+# -------------------------------------------------
+def _mel_filterbank(rate: int, n_fft: int, n_mels: int = 64) -> np.ndarray:
+    def hz_to_mel(f):
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+
+    def mel_to_hz(m):
+        return 700.0 * (10 ** (m / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(0.0), hz_to_mel(rate / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / rate).astype(int)
+
+    bank = np.zeros((n_mels, n_fft // 2 + 1))
+    for m in range(1, n_mels + 1):
+        lo, center, hi = bins[m - 1], bins[m], bins[m + 1]
+        if center > lo:
+            bank[m - 1, lo:center] = (np.arange(lo, center) - lo) / (center - lo)
+        if hi > center:
+            bank[m - 1, center:hi] = (hi - np.arange(center, hi)) / (hi - center)
+    return bank
+
+
+def log_mel_profile(samples: np.ndarray, rate: int, n_fft: int = 1024, hop: int = 256) -> np.ndarray:
+    """
+    Konuşma frame’lerinin ortalama log-mel spektrumu.
+    """
+    if len(samples) < n_fft:
+        samples = np.pad(samples, (0, n_fft - len(samples)))
+
+    count = 1 + (len(samples) - n_fft) // hop
+    frames = np.lib.stride_tricks.as_strided(
+        samples, shape=(count, n_fft), strides=(samples.strides[0] * hop, samples.strides[0])
+    ) * np.hanning(n_fft)
+
+    power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+    mel = np.log10(power @ _mel_filterbank(rate, n_fft).T + 1e-10)
+    # 80 dB dinamik aralık: gürültü tabanı benzerliği domine etmesin
+    mel = np.maximum(mel, mel.max() - 8.0)
+
+    # Sessiz frame’ler profili bozmasın
+    energy = mel.mean(axis=1)
+    voiced = energy > energy.max() - 4.0
+    return mel[voiced].mean(axis=0)
+
+
+def spectral_similarity(a_path: str, b_path: str) -> dict:
+    from app.services.alignment import read_mono_pcm
+
+    a, rate_a = read_mono_pcm(a_path)
+    b, rate_b = read_mono_pcm(b_path)
+    if rate_a != rate_b:
+        raise ValueError(f"Sample rate farklı: {rate_a} != {rate_b}")
+
+    pa, pb = log_mel_profile(a, rate_a), log_mel_profile(b, rate_b)
+    pa, pb = pa - pa.mean(), pb - pb.mean()
+    cosine = float(pa @ pb / (np.linalg.norm(pa) * np.linalg.norm(pb) + 1e-12))
+
+    return {
+        "log_mel_cosine": round(cosine, 4),
+        "duration_ratio": round(len(b) / len(a), 3) if len(a) else None,
+    }
+
+
+# -------------------------------------------------
+# Mod çalıştırma
+# -------------------------------------------------
+def run_mode(mode: str, args, out_dir: str) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    env = dict(os.environ)
+    env["INFERENCE_PRECISION"] = mode
+    if args.threads:
+        env["TORCH_THREADS"] = str(args.threads)
+
+    code = CHILD_SNIPPET.format(
+        root=API_ROOT,
+        speaker=os.path.abspath(args.speaker),
+        out=out_dir,
+        warm=SENTENCES[0],
+        sentences=SENTENCES[: args.sentences],
+    )
+    proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed")
+
+    data = json.loads(proc.stdout.strip().splitlines()[-1])
+    synth = sum(r["seconds"] for r in data["rows"])
+    audio = sum(r["audio_seconds"] or 0 for r in data["rows"])
+    threads = data["inference"].get("threads") or 1
+
+    return {
+        "requested": mode,
+        "inference": data["inference"],
+        "load_seconds": round(data["load_seconds"], 2),
+        "rtf": round(synth / audio, 3) if audio else None,
+        "chunks_per_second": round(len(data["rows"]) / synth, 3),
+        "chunks_per_second_per_core": round(len(data["rows"]) / synth / threads, 4),
+        "files": [r["file"] for r in data["rows"]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XTTS inference hassasiyeti raporu")
+    parser.add_argument("--speaker", required=True, help="referans speaker WAV")
+    parser.add_argument("--modes", nargs="+", default=["fp32", "int8", "bf16"])
+    parser.add_argument("--threads", type=int, default=0, help="TORCH_THREADS (0: varsayılan)")
+    parser.add_argument("--sentences", type=int, default=len(SENTENCES))
+    parser.add_argument("--reference", default=None, help="karşılaştırma WAV klasörü (00.wav, 01.wav, ...)")
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--keep", action="store_true", help="üretilen WAV’ları silme")
+    args = parser.parse_args(argv)
+
+    try:
+        import torch  # noqa: F401
+        import TTS  # noqa: F401
+    except ImportError as e:
+        print(f"Bu benchmark gerçek XTTS gerektirir: {e}")
+        return 2
+
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    workdir = tempfile.mkdtemp(prefix="reader-precision-")
+
+    modes = {}
+    try:
+        for mode in args.modes:
+            print(f"  {mode} ...", flush=True)
+            modes[mode] = run_mode(mode, args, os.path.join(workdir, mode))
+
+        reference = (
+            [os.path.join(args.reference, f"{i:02d}.wav") for i in range(args.sentences)]
+            if args.reference
+            else modes.get("fp32", {}).get("files")
+        )
+        base = modes.get("fp32")
+
+        print(f"\n  {'mode':<6} {'applied':<8} {'RTF':>7} {'chunk/s':>8} {'/core':>8} {'speedup':>8} {'mel cos':>8} {'dur':>6}")
+        for mode, result in modes.items():
+            if reference:
+                scores = [spectral_similarity(r, f) for r, f in zip(reference, result["files"])]
+                result["quality"] = {
+                    "log_mel_cosine": round(float(np.mean([s["log_mel_cosine"] for s in scores])), 4),
+                    "duration_ratio": round(float(np.mean([s["duration_ratio"] for s in scores])), 3),
+                    "per_sentence": scores,
+                }
+            if base:
+                result["speedup_per_core"] = round(
+                    result["chunks_per_second_per_core"] / base["chunks_per_second_per_core"], 2
+                )
+
+            quality = result.get("quality", {})
+            print(
+                f"  {mode:<6} {result['inference']['precision']:<8} {result['rtf']:>7} "
+                f"{result['chunks_per_second']:>8} {result['chunks_per_second_per_core']:>8} "
+                f"{result.get('speedup_per_core', '-'):>8} {quality.get('log_mel_cosine', '-'):>8} "
+                f"{quality.get('duration_ratio', '-'):>6}"
+            )
+            if not args.keep:
+                result.pop("files")
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "timestamp": stamp,
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {"speaker": args.speaker, "threads": args.threads, "sentences": args.sentences},
+        "modes": modes,
+    }
+    if args.keep:
+        result["workdir"] = workdir
+
+    result_path = os.path.join(out_dir, f"precision-{stamp}.json")
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"Sonuç: {result_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""
+Uçtan uca pipeline benchmark’ı.
+
+upload → parse → emotion → tts → align → concat → srt
+
+Ollama ve XTTS yerine bench/stubs.py’deki sahte backend’ler
+kullanılır; internet ve GPU gerekmez. Sonuçlar JSON olarak
+bench/results/ altına yazılır ve --compare ile önceki bir
+çalıştırmaya göre farklar basılır.
+
+Kullanım (ReaderAudioAPI klasöründen):
+    python -m bench.run --chapters 20 --paragraphs 40
+    python -m bench.run --profile sample --compare bench/results/<önceki>.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import logging
+import argparse
+import platform
+import tempfile
+import resource
+import subprocess
+import tracemalloc
+from contextlib import contextmanager
+
+API_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(API_ROOT, "bench", "results")
+
+if API_ROOT not in sys.path:
+    sys.path.insert(0, API_ROOT)
+
+from bench.stubs import FakeOllamaServer, SilenceSynthesizer, write_silence_wav  # noqa: E402
+from bench.synthetic_epub import make_epub  # noqa: E402
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError):
+        return 0.0
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux KB, macOS byte döner
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=API_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+class StageRecorder:
+    def __init__(self, profile: str | None, profile_dir: str, track_python_memory: bool):
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.track_python_memory = track_python_memory
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str, unit: str):
+        from app.core.profiling import profile_stage
+
+        result = {"unit": unit, "items": 0}
+        if self.track_python_memory:
+            tracemalloc.start()
+
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        with profile_stage(f"bench-{name}", mode=self.profile, out_dir=self.profile_dir) as prof:
+            try:
+                yield result
+            finally:
+                elapsed = time.perf_counter() - start
+
+        result["seconds"] = round(elapsed, 4)
+        result["throughput"] = round(result["items"] / elapsed, 2) if elapsed and result["items"] else None
+        result["rss_mb"] = round(_rss_mb(), 1)
+        result["rss_delta_mb"] = round(result["rss_mb"] - rss_before, 1)
+        result["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+        if self.track_python_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["python_peak_mb"] = round(peak / (1024 * 1024), 2)
+        if prof["path"]:
+            result["profile"] = prof["path"]
+
+        self.stages[name] = result
+        rate = f"{result['throughput']} {unit}/s" if result["throughput"] else "-"
+        print(f"  {name:<8} {elapsed:8.3f}s  {rate:>18}  rss={result['rss_mb']}MB")
+
+
+async def run_pipeline(args, recorder: StageRecorder, epub_path: str) -> dict:
+    from fastapi import BackgroundTasks, Request, UploadFile
+
+    from app.api.v2.endpoints.books import upload_book
+    from app.core.database import SessionLocal, ensure_schema
+    from app.models.book import Book, Chunk
+    from app.services.audio_index import audio_index
+    from app.services.job_queue import job_queue
+    from app.services.llama_emotion import llama_service
+    from app.services.search import ensure_index as ensure_search_index
+    from app.services.tts import tts_service
+    from app.utils.srt import generate_sentence_srt
+
+    ensure_schema()
+    ensure_search_index()
+    summary = {}
+
+    with FakeOllamaServer(latency=args.llm_latency) as ollama:
+        llama_service.base_url = ollama.base_url
+
+        # 1) upload
+        with recorder.stage("upload", "MB") as st:
+            tasks = BackgroundTasks()
+            with open(epub_path, "rb") as fh, SessionLocal() as db:
+                response = await upload_book(
+                    request=Request({"type": "http", "client": ("bench", 0), "headers": []}),
+                    background_tasks=tasks,
+                    file=UploadFile(fh, filename="bench.epub"),
+                    voice_id="bench",
+                    speed=1.0,
+                    steps=10,
+                    db=db,
+                )
+            st["items"] = os.path.getsize(epub_path) / (1024 * 1024)
+        book_id = response["book_id"]
+
+        # 2) parse (upload’un planladığı background task’lar)
+        with recorder.stage("parse", "chunks") as st:
+            for task in tasks.tasks:
+                await task.func(*task.args, **task.kwargs)
+            with SessionLocal() as db:
+                st["items"] = db.query(Chunk).filter(Chunk.book_id == book_id).count()
+        summary["chunks"] = recorder.stages["parse"]["items"]
+
+        # Worker çalışmıyor; parser’ın kuyruğa eklediği işi sil
+        job_queue.cancel_book(book_id)
+
+        # 3) emotion
+        with recorder.stage("emotion", "chunks") as st:
+            before = ollama.requests
+            await llama_service.analyze_book_emotions(book_id)
+            st["items"] = ollama.requests - before
+
+        # 4) tts
+        synthesizer = SilenceSynthesizer(rtf=args.tts_rtf)
+        tts_service.tts = synthesizer
+        with recorder.stage("tts", "chunks") as st:
+            await tts_service.process_book(book_id)
+            with SessionLocal() as db:
+                st["items"] = db.query(Chunk).filter(
+                    Chunk.book_id == book_id, Chunk.status == "completed"
+                ).count()
+
+        # 5) kelime hizalama (sentez sırasında planlanan işlerin bitişi)
+        with recorder.stage("align", "chunks") as st:
+            st["items"] = len(tts_service.alignment_tasks)
+            await tts_service.wait_for_alignment()
+
+        with SessionLocal() as db:
+            chunks = (
+                db.query(Chunk)
+                .filter(Chunk.book_id == book_id, Chunk.status == "completed")
+                .order_by(Chunk.index)
+                .all()
+            )
+            summary["audio_seconds"] = round(sum(c.duration or 0 for c in chunks), 2)
+            summary["book_status"] = db.query(Book).filter(Book.id == book_id).first().status
+
+    # 6) concat (download-video ile aynı yol: audio index → tek WAV)
+    wav_path = os.path.join("oas_assets", "audio", f"full_{book_id}.wav")
+    with recorder.stage("concat", "audio_s") as st:
+        audio_index.get(book_id).write_wav(wav_path)
+        st["items"] = summary["audio_seconds"]
+
+    # 7) srt
+    with recorder.stage("srt", "chunks") as st:
+        srt_data, _ = generate_sentence_srt(chunks)
+        with open(os.path.join("oas_assets", "audio", f"{book_id}.srt"), "w", encoding="utf-8") as f:
+            f.write(srt_data)
+        st["items"] = len(chunks)
+
+    return summary
+
+
+def compare(current: dict, previous_path: str):
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)
+
+    print(f"\nKarşılaştırma: {os.path.basename(previous_path)} → bu çalıştırma")
+    for name, stage in current["stages"].items():
+        old = previous.get("stages", {}).get(name, {})
+        if "seconds" not in stage or "seconds" not in old or not old["seconds"]:
+            continue
+        delta = (stage["seconds"] - old["seconds"]) / old["seconds"] * 100
+        print(f"  {name:<8} {old['seconds']:8.3f}s → {stage['seconds']:8.3f}s  ({delta:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ReaderAudioAPI uçtan uca benchmark")
+    parser.add_argument("--chapters", type=int, default=10)
+    parser.add_argument("--paragraphs", type=int, default=30, help="bölüm başına paragraf")
+    parser.add_argument("--sentences", type=int, default=5, help="paragraf başına cümle")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="sahte Ollama gecikmesi (s)")
+    parser.add_argument("--tts-rtf", type=float, default=0.0, help="sahte sentezin CPU yükü (real-time factor)")
+    parser.add_argument("--profile", choices=["cprofile", "sample"], default=None)
+    parser.add_argument("--tracemalloc", action="store_true", help="stage başına Python heap peak’i ölç")
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--compare", default=None, help="önceki sonuç JSON dosyası")
+    parser.add_argument("--keep", action="store_true", help="çalışma klasörünü silme")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    out_dir = os.path.abspath(args.out)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+
+    # Uygulama göreli yollar (oas_assets/, app/speakers/, reader_v2.db)
+    # kullandığı için her şey izole bir çalışma klasöründe koşar.
+    workdir = tempfile.mkdtemp(prefix="reader-bench-")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    # Export encode’ları ölçülen aşamalara karışmasın
+    os.environ.setdefault("EXPORT_PREBUILD", "0")
+    os.chdir(workdir)
+    os.makedirs(os.path.join("app", "speakers"), exist_ok=True)
+    write_silence_wav(os.path.join("app", "speakers", "bench_neutral.wav"))
+
+    epub_path = os.path.join(workdir, "bench.epub")
+    book_params = make_epub(epub_path, args.chapters, args.paragraphs, args.sentences, args.seed)
+
+    print(f"Bench | {book_params['chapters']} bölüm, {book_params['chars']} karakter | {workdir}")
+
+    recorder = StageRecorder(args.profile, os.path.join(out_dir, f"profiles-{stamp}"), args.tracemalloc)
+    try:
+        summary = asyncio.run(run_pipeline(args, recorder, epub_path))
+    finally:
+        os.chdir(API_ROOT)
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    result = {
+        "timestamp": stamp,
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {**book_params, "llm_latency": args.llm_latency, "tts_rtf": args.tts_rtf},
+        "summary": summary,
+        "stages": recorder.stages,
+    }
+
+    result_path = os.path.join(out_dir, f"bench-{stamp}.json")
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"Sonuç: {result_path}")
+
+    if compare_path:
+        compare(result, compare_path)
+
+    return result
+
+
+if __name__ == "__main__":
+    main()
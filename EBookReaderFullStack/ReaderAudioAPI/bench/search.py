@@ -0,0 +1,162 @@
+"""
+Tam metin arama benchmark’ı.
+
+Geçici bir SQLite veritabanında sentetik bir kütüphane
+(--books × --chunks) kurulur; chunk’lar parser gibi
+INSERT edilir, FTS indeksi trigger’larla dolar. Ardından
+kitap içi ve kütüphane aramalarının gecikmesi ölçülür
+(p50 / p95 / max, ms).
+
+Kullanım (ReaderAudioAPI klasöründen):
+    python -m bench.search --books 1000 --chunks 300
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+
+API_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(API_ROOT, "bench", "results")
+
+if API_ROOT not in sys.path:
+    sys.path.insert(0, API_ROOT)
+
+from bench.run import _git_revision  # noqa: E402
+from bench.synthetic_epub import WORDS, _sentence  # noqa: E402
+
+# Kütüphanede seyrek geçen kelime (her RARE_EVERY chunk’ta bir)
+RARE_WORD = "zümrüt"
+RARE_EVERY = 997
+
+QUERIES = {
+    "common": "gece",
+    "two_words": "deniz rüzgar",
+    "prefix": "yürü",
+    "diacritics": "cocuk",
+    "rare": RARE_WORD,
+    "missing": "bulunmayankelime",
+}
+
+
+def build_library(args, rng):
+    from sqlalchemy import insert
+
+    from app.core.database import SessionLocal
+    from app.models.book import Book, Chunk
+
+    book_ids = []
+    start = time.perf_counter()
+    serial = 0
+    with SessionLocal() as db:
+        for b in range(args.books):
+            book_id = f"{b:08d}-0000-4000-8000-{rng.getrandbits(48):012x}"
+            book_ids.append(book_id)
+            db.add(Book(id=book_id, title=f"Kitap {b}", voice_id="bench", status="completed"))
+
+            rows = []
+            for i in range(args.chunks):
+                body = " ".join(_sentence(rng) for _ in range(2))
+                if serial % RARE_EVERY == 0:
+                    body += f" {RARE_WORD.capitalize()} parladı."
+                serial += 1
+                rows.append({
+                    "book_id": book_id, "index": i, "chapter": i // 50, "text": body,
+                    "status": "completed", "emotion": "neutral",
+                    "duration": round(rng.uniform(4.0, 12.0), 3),
+                })
+            db.execute(insert(Chunk), rows)
+            db.commit()
+
+    seconds = time.perf_counter() - start
+    total = args.books * args.chunks
+    print(f"  kütüphane  {args.books} kitap × {args.chunks} chunk = {total} chunk | "
+          f"{seconds:.1f}s ({total / seconds:.0f} chunk/s, FTS trigger’ları dahil)")
+    return book_ids, {"seconds": round(seconds, 2), "chunks": total, "chunks_per_s": round(total / seconds, 1)}
+
+
+def measure(search, repeat):
+    from app.core.database import SessionLocal
+
+    timings = []
+    hits = 0
+    with SessionLocal() as db:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            hits = len(search(db))
+            timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "hits": hits,
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+        "max_ms": round(timings[-1], 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tam metin arama benchmark")
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--chunks", type=int, default=300, help="kitap başına chunk")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--keep", action="store_true", help="veritabanını silme")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="reader-search-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app.core.database import ensure_schema
+    from app.services.search import chunk_search, ensure_index
+
+    ensure_schema()
+    ensure_index()
+
+    rng = random.Random(args.seed)
+    print(f"Arama bench | {workdir}")
+    book_ids, build = build_library(args, rng)
+    probe = [rng.choice(book_ids) for _ in range(args.repeat)]
+
+    results = {}
+    for name, query in QUERIES.items():
+        books = iter(probe * 2)
+        book = measure(
+            lambda db: chunk_search.search(db, query, book_id=next(books), limit=args.limit),
+            args.repeat,
+        )
+        library = measure(lambda db: chunk_search.search(db, query, limit=args.limit), args.repeat)
+        results[name] = {"query": query, "book": book, "library": library}
+        print(f"  {name:<11} kitap  p50 {book['p50_ms']:7.2f} ms  p95 {book['p95_ms']:7.2f} ms | "
+              f"kütüphane p50 {library['p50_ms']:7.2f} ms  p95 {library['p95_ms']:7.2f} ms")
+
+    summary = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "params": vars(args),
+        "build": build,
+        "queries": results,
+        "words": len(WORDS),
+    }
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"search-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"Sonuç: {path}")
+
+    if not args.keep:
+        from app.core.database import engine
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+API açılış / model ısınma benchmark’ı.
+
+- import   : temiz bir process’te `import app.main` süresi
+             (+ -X importtime ile en pahalı modüller)
+- startup  : import + FastAPI startup event’leri (şema,
+             ses kataloğu, worker) bitene kadar geçen süre
+- warmup   : tts_service.warm_up (model yükleme + ilk
+             sentez + speaker latent’ları). Varsayılan olarak
+             stub synthesizer ile; --real-model ile XTTS.
+
+Kullanım (ReaderAudioAPI klasöründen):
+    python -m bench.startup --repeat 5
+    python -m bench.startup --real-model
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+
+API_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(API_ROOT, "bench", "results")
+
+if API_ROOT not in sys.path:
+    sys.path.insert(0, API_ROOT)
+
+from bench.run import _git_revision  # noqa: E402
+from bench.stubs import write_silence_wav  # noqa: E402
+
+IMPORT_SNIPPET = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import app.main
+print(time.perf_counter() - start)
+"""
+
+STARTUP_SNIPPET = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.main.app) as client:
+    started = time.perf_counter()
+    ready = client.get("/health/ready").json()
+print(json.dumps({{"import": imported - start, "startup": started - imported, "ready": ready}}))
+"""
+
+WARMUP_SNIPPET = """
+import sys, time, json, asyncio
+sys.path.insert(0, {root!r})
+from app.services.tts import tts_service
+if not {real!r}:
+    from bench.stubs import SilenceSynthesizer
+    tts_service.tts = SilenceSynthesizer()
+start = time.perf_counter()
+asyncio.run(tts_service.warm_up())
+print(json.dumps({{"seconds": time.perf_counter() - start, **tts_service.readiness()}}))
+"""
+
+
+def _run(code: str, env: dict, cwd: str, importtime: bool = False):
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code]
+    proc = subprocess.run(cmd, cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed")
+    return proc.stdout.strip().splitlines()[-1], proc.stderr
+
+
+def _top_imports(stderr: str, limit: int):
+    """
+    -X importtime çıktısından kümülatif süresi en yüksek
+    üst seviye modüller (ms).
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        indent = len(name) - len(name.lstrip())
+        rows.append((indent, int(cumulative_us), int(self_us), name.strip()))
+
+    if not rows:
+        return []
+
+    # app.main’in altındaki paketler (numpy, sqlalchemy, ...);
+    # alt modüller paketin kümülatif süresinde zaten var
+    outer = min(r[0] for r in rows)
+    top = sorted((r[1:] for r in rows if r[0] > outer and "." not in r[3]), reverse=True)
+    return [
+        {"module": name, "cumulative_ms": round(cum / 1000, 1), "self_ms": round(own / 1000, 1)}
+        for cum, own, name in top[:limit]
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ReaderAudioAPI açılış benchmark’ı")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="raporlanacak en pahalı import sayısı")
+    parser.add_argument("--real-model", action="store_true", help="warmup’ı gerçek XTTS ile ölç")
+    parser.add_argument("--out", default=RESULTS_DIR)
+    args = parser.parse_args(argv)
+
+    out_dir = os.path.abspath(args.out)
+    os.makedirs(out_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+
+    workdir = tempfile.mkdtemp(prefix="reader-startup-")
+    os.makedirs(os.path.join(workdir, "app", "speakers"), exist_ok=True)
+    write_silence_wav(os.path.join(workdir, "app", "speakers", "bench_neutral.wav"))
+
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env["STARTUP_MODE"] = "lazy"
+    # app.main import sırasında ffmpeg arar; ölçüm ffmpeg
+    # kurulu olmayan makinede de yapılabilsin
+    if not shutil.which("ffmpeg") and not env.get("FFMPEG_PATH"):
+        env["FFMPEG_PATH"] = sys.executable
+
+    root = API_ROOT
+    result = {
+        "timestamp": stamp,
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+    try:
+        # İlk çalıştırma .pyc cache’ini ısıtır, ölçüme girmez
+        _run(IMPORT_SNIPPET.format(root=root), env, workdir)
+
+        imports = [float(_run(IMPORT_SNIPPET.format(root=root), env, workdir)[0]) for _ in range(args.repeat)]
+        _, importtime = _run(IMPORT_SNIPPET.format(root=root), env, workdir, importtime=True)
+        result["import"] = {
+            "median_s": round(statistics.median(imports), 4),
+            "min_s": round(min(imports), 4),
+            "runs": [round(x, 4) for x in imports],
+            "top_modules": _top_imports(importtime, args.top),
+        }
+        print(f"  import   {result['import']['median_s']:8.3f}s (median, {args.repeat} run)")
+        for row in result["import"]["top_modules"]:
+            print(f"           {row['cumulative_ms']:8.1f}ms  {row['module']}")
+
+        startups = [json.loads(_run(STARTUP_SNIPPET.format(root=root), env, workdir)[0]) for _ in range(args.repeat)]
+        result["startup"] = {
+            "median_s": round(statistics.median(s["import"] + s["startup"] for s in startups), 4),
+            "events_median_s": round(statistics.median(s["startup"] for s in startups), 4),
+            "ready_after_startup": startups[-1]["ready"],
+        }
+        print(f"  startup  {result['startup']['median_s']:8.3f}s (import + startup event’leri)")
+
+        warm = json.loads(_run(WARMUP_SNIPPET.format(root=root, real=args.real_model), env, workdir)[0])
+        result["warmup"] = {"real_model": args.real_model, **warm}
+        print(f"  warmup   {warm['seconds']:8.3f}s  model={warm['model']} {warm['timings']}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    result_path = os.path.join(out_dir, f"startup-{stamp}.json")
+    with open(result_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2, ensure_ascii=False)
+    print(f"Sonuç: {result_path}")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import json
+import time
+import wave
+import zlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ======================================================
+# OFFLINE STUB BACKENDS
+#
+# Bench pipeline’ı Ollama ve XTTS olmadan CPU üzerinde
+# koşabilsin diye gerçek servislerin yerine geçen
+# sahte implementasyonlar.
+# ======================================================
+
+# Neutral bilerek yok: worker neutral chunk’ları yeniden
+# analiz ettiği için TTS stage’i LLM süresiyle kirlenmesin.
+STUB_EMOTIONS = ("happy", "sad", "angry")
+
+
+class FakeOllamaServer:
+    """
+    /api/generate endpoint’ini taklit eden lokal HTTP sunucu.
+
+    Cevap metnin hash’ine göre deterministik seçilir,
+    `latency` saniye kadar bekleyerek model süresini taklit eder.
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = "127.0.0.1"):
+        self.latency = latency
+        self.requests = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                server.requests += 1
+
+                if server.latency:
+                    time.sleep(server.latency)
+
+                prompt = payload.get("prompt", "")
+                emotion = STUB_EMOTIONS[zlib.crc32(prompt.encode("utf-8")) % len(STUB_EMOTIONS)]
+                body = json.dumps({"response": emotion, "done": True}).encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class SilenceSynthesizer:
+    """
+    XTTS `TTS.api.TTS` yerine geçer: tts_to_file çağrısında
+    metnin beklenen okuma süresi kadar sessizlik yazar.
+
+    rtf > 0 verilirse üretilen ses süresi * rtf kadar
+    CPU meşgul edilerek gerçek sentez yükü taklit edilir.
+    """
+
+    def __init__(self, sample_rate: int = 24000, seconds_per_word: float = 0.45, rtf: float = 0.0):
+        self.sample_rate = sample_rate
+        self.seconds_per_word = seconds_per_word
+        self.rtf = rtf
+        self.calls = 0
+
+    def expected_seconds(self, text: str, speed: float = 1.0) -> float:
+        return max(0.2, len(text.split()) * self.seconds_per_word / (speed or 1.0))
+
+    def tts_to_file(self, text, speaker_wav=None, language=None, file_path=None, speed=1.0, **kwargs):
+        self.calls += 1
+        seconds = self.expected_seconds(text, speed)
+
+        if self.rtf:
+            deadline = time.perf_counter() + seconds * self.rtf
+            while time.perf_counter() < deadline:
+                pass
+
+        with wave.open(file_path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(b"\x00\x00" * int(seconds * self.sample_rate))
+
+        return file_path
+
+    def to(self, device):
+        return self
+
+
+def write_silence_wav(path: str, seconds: float = 3.0, sample_rate: int = 22050):
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sample_rate)
+        wf.writeframes(b"\x00\x00" * int(seconds * sample_rate))
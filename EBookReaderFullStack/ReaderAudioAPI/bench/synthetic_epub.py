@@ -0,0 +1,68 @@
+import random
+
+from ebooklib import epub
+
+# Parser’ın temizleme regex’inden geçen, Türkçe karakterli kelime havuzu
+WORDS = (
+    "kitap ses okuma gece sabah deniz rüzgar şehir sokak kapı pencere "
+    "çocuk kadın adam zaman yol ışık gölge sessizlik yağmur bahar kış "
+    "güzel uzun kısa eski yeni karanlık aydınlık sıcak soğuk yavaş hızlı "
+    "baktı yürüdü düşündü söyledi bekledi güldü ağladı gördü duydu sordu"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+    words[0] = words[0].capitalize()
+    return " ".join(words) + rng.choice([".", ".", ".", "!", "?"])
+
+
+def make_epub(
+    path: str,
+    chapters: int = 10,
+    paragraphs: int = 30,
+    sentences: int = 5,
+    seed: int = 42,
+) -> dict:
+    """
+    Verilen boyutta sentetik bir EPUB üretir.
+
+    Aynı seed ile her zaman aynı metin üretilir; bench
+    sonuçları farklı çalıştırmalar arasında kıyaslanabilir.
+    """
+    rng = random.Random(seed)
+
+    book = epub.EpubBook()
+    book.set_identifier(f"bench-{seed}-{chapters}x{paragraphs}x{sentences}")
+    book.set_title(f"Bench Kitabı {chapters}x{paragraphs}")
+    book.set_language("tr")
+    book.add_author("Bench")
+
+    items = []
+    total_chars = 0
+    for c in range(chapters):
+        body = [f"<h1>Bölüm {c + 1}</h1>"]
+        for _ in range(paragraphs):
+            text = " ".join(_sentence(rng) for _ in range(sentences))
+            total_chars += len(text)
+            body.append(f"<p>{text}</p>")
+
+        item = epub.EpubHtml(title=f"Bölüm {c + 1}", file_name=f"chap_{c + 1}.xhtml", lang="tr")
+        item.content = "<html><body>" + "".join(body) + "</body></html>"
+        book.add_item(item)
+        items.append(item)
+
+    book.toc = items
+    book.spine = ["nav"] + items
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+
+    epub.write_epub(path, book)
+
+    return {
+        "chapters": chapters,
+        "paragraphs": paragraphs,
+        "sentences": sentences,
+        "seed": seed,
+        "chars": total_chars,
+    }
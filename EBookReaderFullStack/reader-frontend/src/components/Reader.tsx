@@ -254,6 +254,28 @@ export default function Reader({
             Video indir
           </button>
 
+          <button
+            onClick={async () => {
+              const res = await api.downloadExport(book.id, "m4b");
+              if (!res.ok) {
+                const body = await res.json().catch(() => null);
+                alert(body?.detail || "M4B indirilemedi");
+                return;
+              }
+              const blob = await res.blob();
+              const url = URL.createObjectURL(blob);
+
+              const a = document.createElement("a");
+              a.href = url;
+              a.download = `${book.title || "audiobook"}.m4b`;
+              a.click();
+              URL.revokeObjectURL(url);
+            }}
+            className="px-4 py-2 rounded-xl bg-white/10 text-white/80 hover:bg-white/20 transition"
+          >
+            M4B indir
+          </button>
+
           <button
             onClick={() => setIsAmbientMuted(!isAmbientMuted)}
             className="text-white/70 hover:text-white"
@@ -216,6 +216,9 @@ export default function Sidebar({
                 </div>
                 <div className="text-[9px] uppercase text-slate-400">
                   {book.status}
+                  {book.total_chunks > 0 && book.progress < 1 && (
+                    <> · {Math.floor(book.progress * 100)}%</>
+                  )}
                 </div>
               </div>
 
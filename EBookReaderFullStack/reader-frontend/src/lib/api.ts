@@ -32,6 +32,9 @@ export interface BookSummary {
   title: string;
   author?: string;
   status: string;
+  total_chunks: number;
+  completed_chunks: number;
+  progress: number;
 }
 
 export const api = {
@@ -79,6 +82,13 @@ export const api = {
   });
 },
 
+  // Offline paket: m4b (bölüm işaretli) ya da mp3 / opus zip
+  downloadExport(bookId: string, fmt: "m4b" | "mp3" | "opus" = "m4b") {
+    return fetch(`${API_BASE_URL}/books/${bookId}/export?fmt=${fmt}`, {
+      method: "GET",
+    });
+  },
+
 
   getChunks: async (id: string, offset: number = 0, limit: number = 50): Promise<Chunk[]> => {
     try {
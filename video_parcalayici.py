@@ -1,58 +1,58 @@
-import subprocess
+"""
+Uzun bir kayıttan (ses ya da video) referans sesleri keser ve
+app/speakers/{voice}_{emotion}.wav olarak kaydeder.
+
+Aynı iş API’de de var: POST /api/v2/voices/onboard. Bu betik
+sadece o servisi komut satırından çağırır (tek decode,
+paralel kırpma / loudness / doğrulama).
+
+Kullanım:
+    python video_parcalayici.py kaynak.wav mert neutral=00:00:40+15 happy=00:02:57+15
+"""
+
 import os
+import sys
+import json
+import asyncio
+import argparse
+
+API_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "EBookReaderFullStack", "ReaderAudioAPI")
+
+
+def parse_segment(value: str) -> dict:
+    # duygu=başlangıç+süre
+    emotion, _, span = value.partition("=")
+    start, _, duration = span.partition("+")
+    if not emotion or not start or not duration:
+        raise argparse.ArgumentTypeError(f"duygu=başlangıç+süre bekleniyor: {value}")
+    return {"emotion": emotion, "start": start, "duration": duration}
 
 
-class AudioCutter:
-    def __init__(self, source_path, output_dir):
-        self.source_path = source_path
-        self.output_dir = output_dir
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Uzun kayıttan referans ses ekler")
+    parser.add_argument("source")
+    parser.add_argument("voice_id")
+    parser.add_argument("segments", nargs="+", type=parse_segment)
+    parser.add_argument("--dry-run", action="store_true", help="sadece doğrula, dosya yazma")
+    args = parser.parse_args(argv)
 
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-            print(f" Klasör oluşturuldu: {self.output_dir}")
+    source = os.path.abspath(args.source)
 
-    def cut_segment(self, start_time, duration, emotion_name):
-        output_name = f"mert_{emotion_name}.wav"
-        output_path = os.path.join(self.output_dir, output_name)
+    # SPEAKERS_DIR API klasörüne göre
+    os.chdir(API_ROOT)
+    sys.path.insert(0, API_ROOT)
 
-        command = [
-            'ffmpeg', '-y',
-            '-err_detect', 'ignore_err',
-            '-ss', str(start_time),
-            '-i', self.source_path,
-            '-t', str(duration),
-            '-ar', '22050',
-            '-ac', '1',
-            '-af', 'aresample=async=1',
-            '-c:a', 'pcm_s16le',
-            output_path
-        ]
+    from app.core.workers import shutdown_cpu_pool
+    from app.services.voice_onboarding import voice_onboarding
 
-        try:
-            subprocess.run(command, check=True)
+    try:
+        report = asyncio.run(voice_onboarding.onboard(source, args.voice_id, args.segments, dry_run=args.dry_run))
+    finally:
+        shutdown_cpu_pool()
 
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                print(f" Başarılı: {emotion_name.capitalize()} ({os.path.getsize(output_path)} bytes)")
-            else:
-                print(f" Kritik Hata: {output_name} oluşturuldu ama dosya BOŞ (0 KB)!")
-        except subprocess.CalledProcessError as e:
-            print(f" FFmpeg hatası: {e}")
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report["status"] != "rejected" else 1
 
 
 if __name__ == "__main__":
-    source_file = r"C:\Users\EXCALIBUR\Desktop\seslik-V3\bb838179947f3bd49bd821ae38ee5557Kurk_Mantolu_Madonna.wav"
-    target_dir = r"C:\Users\EXCALIBUR\Desktop\seslik-V3\EBookReaderFullStack\ReaderAudioAPI\app\speakers"
-
-    cutter = AudioCutter(source_file, target_dir)
-
-    segments = [
-        {"start": "00:01:37", "dur": "15", "emotion": "excited"},
-        {"start": "00:02:57", "dur": "15", "emotion": "happy"},
-        {"start": "00:00:36", "dur": "15", "emotion": "sad"},
-        {"start": "00:00:40", "dur": "15", "emotion": "neutral"}
-    ]
-
-    print(f"--- Operasyon Yeniden Başladı: {target_dir} ---")
-    for seg in segments:
-        cutter.cut_segment(seg["start"], seg["dur"], seg["emotion"])
-    print("--- Kontrol tamamlandı! ---")
\ No newline at end of file
+    sys.exit(main())